@@ -0,0 +1,50 @@
+"""
+Per frame cost of the eager market events against the LazyEvents for typical callbacks.
+
+    python -m benchmarks.bench_events [count]
+"""
+import sys
+import timeit
+
+from zb.model.subscribe_envet import Events, LazyEvents
+
+DEPTH = {
+    'channel': 'BTC_USDT.DepthWhole',
+    'data': {
+        'asks': [[str(41000 + i * 0.5), '0.123'] for i in range(200)],
+        'bids': [[str(40999 - i * 0.5), '0.456'] for i in range(200)],
+        'time': '1640000000000',
+    },
+}
+TRADE = {'channel': 'BTC_USDT.Trade', 'data': [[41250.0, 0.02, 1, 1640000000]] * 50}
+ALL_TICKER = {'channel': 'All.Ticker',
+              'data': {'SYM%d_USDT' % i: [41000.0, 42000.0, 40000.0, 41250.0, 1234.5, 0.61, 1640000000, 268000.0]
+                       for i in range(100)}}
+
+CASES = [
+    ('depth channel', 'DepthEvent', DEPTH, lambda event: event.channel),
+    ('depth best price', 'DepthEvent', DEPTH, lambda event: (event.asks[0].price, event.bids[0].price)),
+    ('depth all levels', 'DepthEvent', DEPTH, lambda event: sum(e.amount for e in event.asks)),
+    ('trade last', 'TradeEvent', TRADE, lambda event: event.data[-1].price),
+    ('trade all', 'TradeEvent', TRADE, lambda event: sum(t.amount for t in event.data)),
+    ('ticker one symbol', 'AllTickerEvent', ALL_TICKER, lambda event: event.data['SYM7_USDT'].close),
+]
+
+
+def frame_time(event_class, message, access, count):
+    def run():
+        access(event_class(**message))
+
+    return min(timeit.repeat(run, number=count, repeat=3)) / count * 1e6
+
+
+def main(count=2000):
+    print('%-20s %14s %14s' % ('access', 'eager us/frm', 'lazy us/frm'))
+    for name, event_name, message, access in CASES:
+        print('%-20s %14.1f %14.1f' % (name,
+                                       frame_time(getattr(Events, event_name), message, access, count),
+                                       frame_time(getattr(LazyEvents, event_name), message, access, count)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
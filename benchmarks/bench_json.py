@@ -0,0 +1,65 @@
+"""
+Decode and encode time of the installed json codecs on websocket frames.
+
+    python -m benchmarks.bench_json [recording]
+
+recording is a file written by zb.recorder.FrameRecorder, its compressed binary frames are inflated first. Synthetic
+depth and all ticker frames are used without it.
+"""
+import random
+import sys
+import timeit
+
+from zb import json_codec
+from zb.compression import FrameDecoder
+from zb.recorder import read_frames
+
+
+def synthetic_frames():
+    rnd = random.Random(7)
+    depth = {
+        'channel': 'BTC_USDT.DepthWhole',
+        'data': {
+            'asks': [[str(round(41000 + i * 0.5, 1)), str(round(rnd.random() * 3, 3))] for i in range(200)],
+            'bids': [[str(round(40999 - i * 0.5, 1)), str(round(rnd.random() * 3, 3))] for i in range(200)],
+            'time': '1640000000000',
+        },
+    }
+    tickers = {
+        'channel': 'All.Ticker',
+        'data': {'SYM%d_USDT' % i: [41000.0, 42000.0, 40000.0, 41250.5, 1234.5, 0.61, 1640000000, 268000.0]
+                 for i in range(100)},
+    }
+    trade = {'channel': 'BTC_USDT.Trade', 'data': [[41250.5, 0.02, 1, 1640000000]]}
+    return [json_codec.JsonCodec.dumps(frame) for frame in (depth, tickers, trade)]
+
+
+def recorded_frames(path):
+    """
+    The json payloads of the frames of a recording, as bytes.
+    """
+    decoder = FrameDecoder()
+    return [message.encode('utf-8') if isinstance(message, str) else decoder.decode(message)
+            for timestamp, message in read_frames(path)]
+
+
+def main(path=None):
+    if path:
+        frames = recorded_frames(path)
+    else:
+        frames = [frame.encode('utf-8') for frame in synthetic_frames()]
+    objects = [json_codec.JsonCodec.loads(frame) for frame in frames]
+    size = sum(len(frame) for frame in frames)
+
+    print('%d frames, %d bytes' % (len(frames), size))
+    print('%-10s %14s %14s' % ('codec', 'loads MB/s', 'dumps MB/s'))
+    for name in json_codec.available_codecs():
+        codec = json_codec.get_codec(name)
+        number = max(1, 2000000 // size)
+        loads = min(timeit.repeat(lambda: [codec.loads(frame) for frame in frames], number=number, repeat=3))
+        dumps = min(timeit.repeat(lambda: [codec.dumps(obj) for obj in objects], number=number, repeat=3))
+        print('%-10s %14.1f %14.1f' % (name, size * number / loads / 1e6, size * number / dumps / 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
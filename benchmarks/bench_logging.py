@@ -0,0 +1,80 @@
+"""
+Cost of the client logging on a signed rest request and on a websocket send.
+
+    python -m benchmarks.bench_logging
+
+Every path is measured with the zb loggers above DEBUG (the default), with DEBUG written to a formatting handler and,
+as the baseline of the releases printing to stdout, with the same strings printed to devnull.
+"""
+import contextlib
+import io
+import logging
+import os
+import timeit
+
+import zb
+from zb import log
+from zb.websocket_connection import WebsocketConnection
+
+PARAMS = {'symbol': 'BTC_USDT', 'side': 1, 'amount': 0.01, 'price': 41000.5, 'action': 1, 'entrustType': 1}
+MESSAGE = '{"channel":"BTC_USDT.Depth","action":"subscribe","size":10}'
+
+
+class NullSocket(object):
+    def send(self, data):
+        pass
+
+
+def best_ns(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e9
+
+
+def paths():
+    api = zb.TradeApi('api-key', 'secret-key')
+    connection = WebsocketConnection('api-key', 'secret-key', 'ws://localhost', None)
+    connection.ws = NullSocket()
+
+    def prepare():
+        return api.prepare_request('/Server/api/v2/trade/order', 'private', 'POST', dict(PARAMS))
+
+    def prepare_print():
+        url, headers, body = prepare()
+        print('sign string:', '2022-01-01T00:00:00.000ZPOST/Server/api/v2/trade/order' + body)
+        print('method: POST, url: ' + url + ', header: ' + str(headers) + ', request: ' + str(PARAMS))
+
+    def send_print():
+        print('[Sub][' + str(connection.id) + '] Send data to server: ' + MESSAGE)
+        connection.send(MESSAGE)
+
+    yield 'rest.prepare_request', prepare, prepare_print
+    yield 'ws.send', lambda: connection.send(MESSAGE), send_print
+
+
+def main(number=20000):
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(logging.Formatter(log.FORMAT))
+    root = log.get_logger()
+    print('%-22s %14s %14s %14s' % ('path', 'off ns/op', 'debug ns/op', 'print ns/op'))
+    for name, func, print_func in paths():
+        log.set_level(logging.WARNING)
+        off = best_ns(func, number)
+
+        root.addHandler(handler)
+        log.set_level(logging.DEBUG)
+        try:
+            debug = best_ns(func, number)
+        finally:
+            root.removeHandler(handler)
+            log.set_level(logging.NOTSET)
+            handler.stream.seek(0)
+            handler.stream.truncate()
+
+        log.set_level(logging.WARNING)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            printed = best_ns(print_func, number)
+        log.set_level(logging.NOTSET)
+        print('%-22s %14.0f %14.0f %14.0f' % (name, off, debug, printed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Construction time and memory of the ResultModel market models against the FastModels.
+
+    python -m benchmarks.bench_models [count]
+"""
+import sys
+import timeit
+import tracemalloc
+
+from zb.model.market import Models, FastModels
+
+SAMPLES = {
+    'DepthEntry': ['41234.5', '0.123'],
+    'Kline': [41200.0, 41300.0, 41100.0, 41250.0, 12.5, 1640000000],
+    'Trade': [41250.0, 0.02, 1, 1640000000],
+    'Ticker': [41000.0, 42000.0, 40000.0, 41250.0, 1234.5, 0.61, 1640000000, 268000.0],
+}
+
+
+def construct_time(model, sample, count):
+    json_parse = model.json_parse
+    return min(timeit.repeat(lambda: json_parse(sample), number=count, repeat=3)) / count * 1e9
+
+
+def memory(model, sample, count):
+    json_parse = model.json_parse
+    tracemalloc.start()
+    items = [json_parse(sample) for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size / count
+
+
+def main(count=100000):
+    print('%-12s %14s %14s %14s %14s' % ('model', 'dict ns/obj', 'fast ns/obj', 'dict B/obj', 'fast B/obj'))
+    for name, sample in SAMPLES.items():
+        slow = getattr(Models, name)
+        fast = getattr(FastModels, name)
+        print('%-12s %14.0f %14.0f %14.0f %14.0f' % (name,
+                                                     construct_time(slow, sample, count),
+                                                     construct_time(fast, sample, count),
+                                                     memory(slow, sample, count),
+                                                     memory(fast, sample, count)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,45 @@
+"""
+Signatures per second of the HmacSigner against preparing the key per call, as ApiClient.generate_sign did.
+
+    python -m benchmarks.bench_sign
+"""
+import base64
+import hashlib
+import hmac
+import timeit
+from datetime import datetime, timezone
+
+from zb.signer import HmacSigner, utc_timestamp
+
+SECRET = 'f' * 40
+PATH = '/Server/api/v2/trade/order'
+PARAMS = {'symbol': 'BTC_USDT', 'side': 1, 'amount': 0.01, 'price': 41000.5, 'action': 1, 'entrustType': 1}
+
+
+def per_call_sign(params):
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+    param_str = '&'.join([k + '=' + str(params[k]) for k in sorted(params) if params[k] is not None and params[k] != ''])
+    content = timestamp + 'POST' + PATH + param_str
+    key = SECRET.encode('utf-8')
+    return timestamp, str(base64.b64encode(hmac.new(key, content.encode('utf-8'), digestmod=hashlib.sha256).digest()),
+                          'utf-8')
+
+
+def main(number=50000):
+    signer = HmacSigner(SECRET, hashed=True)
+
+    def fast_sign(params):
+        timestamp = utc_timestamp()
+        return timestamp, signer.sign(timestamp, 'POST', PATH, params)
+
+    print('%-20s %14s %14s' % ('', 'per call', 'HmacSigner'))
+    for name, old, new in (('timestamp', lambda: datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
+                            utc_timestamp),
+                           ('order signatures', lambda: per_call_sign(PARAMS), lambda: fast_sign(PARAMS)),
+                           ('login signatures', lambda: per_call_sign({}), lambda: fast_sign(None))):
+        old_rate, new_rate = (number / min(timeit.repeat(func, number=number, repeat=3)) for func in (old, new))
+        print('%-20s %12.0f/s %12.0f/s' % (name, old_rate, new_rate))
+
+
+if __name__ == '__main__':
+    main()
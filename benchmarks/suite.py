@@ -0,0 +1,220 @@
+"""
+Benchmarks of the client hot paths, the results are printed and written as json to compare releases.
+
+    python -m benchmarks.suite [-o results.json] [--quick] [-k filter]
+
+Every result is {"name", "value", "unit"}. ns/op and us/frame are the best of 3 runs, lower is better, ticks/s is
+higher is better.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import timeit
+from unittest.mock import patch
+
+import zb
+from zb import log
+from zb.client import ApiClient
+from zb.market_api import MarketApi
+from zb.mock_server import MockExchange
+from zb.model.constant import Interval
+from zb.model.market import Models, FastModels
+from zb.signer import HmacSigner, utc_timestamp
+from zb.websocket_connection import WebsocketConnection
+from benchmarks.bench_models import SAMPLES
+
+FRAMES = {
+    'depth': ('subscribe_depth_event', ('btc_usdt', None), {'channel': 'BTC_USDT.Depth', 'data': {
+        'asks': [['41001.5', '0.3']], 'bids': [['41000', '1.2'], ['40999.5', '0']], 'time': '1640000000000'}}),
+    'depth_whole': ('subscribe_whole_depth_event', ('btc_usdt', None), {'channel': 'BTC_USDT.DepthWhole', 'type': 'Whole', 'data': {
+        'asks': [[str(41001 + i * 0.5), '0.3'] for i in range(50)],
+        'bids': [[str(41000 - i * 0.5), '1.2'] for i in range(50)], 'time': '1640000000000'}}),
+    'kline': ('subscribe_kline_event', ('btc_usdt', None, Interval.MIN_1), {'channel': 'BTC_USDT.KLine_1M', 'data': [
+        [41200.0, 41300.0, 41100.0, 41250.0, 12.5, 1640000000]]}),
+    'trade': ('subscribe_trade_event', ('btc_usdt', None), {'channel': 'BTC_USDT.Trade', 'data': [
+        [41250.0, 0.02, 1, 1640000000]] * 5}),
+    'ticker': ('subscribe_ticker_event', ('btc_usdt', None), {'channel': 'BTC_USDT.Ticker', 'data': [
+        41000.0, 42000.0, 40000.0, 41250.0, 1234.5, 0.61, 1640000000, 268000.0]}),
+    'all_ticker': ('subscribe_all_ticker_event', (None,), {'channel': 'All.Ticker', 'data': {
+        'SYM%d_USDT' % i: [41000.0, 42000.0, 40000.0, 41250.0, 1234.5, 0.61, 1640000000] for i in range(50)}}),
+    'mark_price': ('subscribe_mark_price_event', ('btc_usdt', None), {'channel': 'BTC_USDT.mark', 'data': '41250.5'}),
+}
+
+
+def best_ns(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e9
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Keep the output of the user callbacks and the websocket engines out of the terminal.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_sign(number):
+    params = {'symbol': 'BTC_USDT', 'side': 1, 'amount': 0.01, 'price': 41000.5, 'action': 1, 'entrustType': 1}
+    secret = 'f' * 40
+    yield 'sign.generate_sign', best_ns(lambda: ApiClient.generate_sign('2022-01-01T00:00:00.000Z', 'POST',
+                                                                          '/Server/api/v2/trade/order', params,
+                                                                          secret), number), 'ns/op'
+    signer = HmacSigner(secret, hashed=True)
+    yield 'sign.signer', best_ns(lambda: signer.sign('2022-01-01T00:00:00.000Z', 'POST', '/Server/api/v2/trade/order',
+                                                     params), number), 'ns/op'
+    yield 'sign.timestamp', best_ns(utc_timestamp, number), 'ns/op'
+
+
+class CannedPool(object):
+    """
+    Answers every request at once, leaving the client overhead of an endpoint method.
+    """
+
+    class Response(object):
+        status_code = 200
+        content = b'{"code":10000,"desc":"ok","data":{"orderId":"1"}}'
+        text = content.decode()
+
+    def request(self, method, url, **kwargs):
+        return self.Response
+
+
+def bench_rest(number):
+    api = zb.TradeApi('api-key', 'secret-key')
+    params = {'symbol': 'BTC_USDT', 'side': 1, 'amount': 0.01, 'price': 41000.5, 'action': 1, 'entrustType': 1}
+    yield 'rest.prepare_request.private_post', best_ns(
+        lambda: api.prepare_request('/Server/api/v2/trade/order', 'private', 'POST', dict(params)), number), 'ns/op'
+    yield 'rest.prepare_request.private_get', best_ns(
+        lambda: api.prepare_request('/Server/api/v2/trade/getOrder', 'private', 'GET', {'symbol': 'BTC_USDT', 'orderId': 1}),
+        number), 'ns/op'
+    api = zb.TradeApi('api-key', 'secret-key', session_pool=CannedPool())
+    api.verbose = False
+    yield 'rest.endpoint.private_post', best_ns(lambda: api.private_post_create_order(dict(params)), number), 'ns/op'
+    yield 'rest.endpoint.private_get', best_ns(
+        lambda: api.private_get_order({'symbol': 'BTC_USDT', 'orderId': 1}), number), 'ns/op'
+    market = MarketApi()
+    yield 'rest.prepare_request.public_get', best_ns(
+        lambda: market.prepare_request('/api/public/v1/depth', 'public', 'GET', {'symbol': 'BTC_USDT', 'size': 5}),
+        number), 'ns/op'
+
+    with MockExchange(api_key='api-key', secret_key='secret-key') as exchange:
+        api = zb.TradeApi('api-key', 'secret-key', api_host=exchange.url)
+        api.verbose = False
+        count = max(number // 50, 20)
+        yield 'rest.request.private_get_local', best_ns(lambda: api.get_undone_orders('BTC_USDT'), count) / 1000, 'us/op'
+
+
+def bench_on_message(number):
+    for lazy in (False, True):
+        with patch.object(WebsocketConnection, 'connect'):
+            client = zb.MarketClient(lazy_events=lazy, fast_models=lazy)
+            for name, (method, args, frame) in FRAMES.items():
+                getattr(client, method)(*args)
+            connections = {channel: conn for conn in client.connections for channel in conn.requests}
+
+        for name, (method, args, frame) in FRAMES.items():
+            message = json.dumps(frame)
+            connection = connections[frame['channel']]
+            yield 'ws.on_message.%s%s' % (name, '.lazy' if lazy else ''), \
+                best_ns(lambda: connection.on_message(message), number) / 1000, 'us/frame'
+
+
+def bench_models(number):
+    for name, sample in SAMPLES.items():
+        for label, models in (('dict', Models), ('fast', FastModels)):
+            json_parse = getattr(models, name).json_parse
+            yield 'model.%s.%s' % (name, label), best_ns(lambda: json_parse(sample), number), 'ns/op'
+
+
+def bench_ticks(number, seconds=2.0):
+    """
+    Events delivered per second by MarketClient from a stand-in pushing as fast as it can.
+    """
+    with MockExchange(push_interval_ms=0) as exchange:
+        count = [0]
+        started = threading.Event()
+
+        def callback(event):
+            count[0] += 1
+            started.set()
+
+        with quiet():
+            client = zb.MarketClient(url=exchange.ws_url())
+            client.subscribe_ticker_event('btc_usdt', callback)
+            client.subscribe_trade_event('eth_usdt', callback)
+            try:
+                started.wait(5)
+                first = count[0]
+                time.sleep(seconds)
+                ticks = (count[0] - first) / seconds
+            finally:
+                for connection in client.connections:
+                    connection.close_on_hand()
+    yield 'e2e.market_client.local', ticks, 'ticks/s'
+
+
+# the first segment of the result names: benchmark
+BENCHMARKS = {
+    'sign': bench_sign,
+    'rest': bench_rest,
+    'ws': bench_on_message,
+    'model': bench_models,
+    'e2e': bench_ticks,
+}
+
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', help='write the results to this json file')
+    parser.add_argument('-k', '--filter', default='', help='only run the results whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='fewer iterations, for smoke testing')
+    args = parser.parse_args(argv)
+    number = 200 if args.quick else 5000
+    log.set_level(logging.WARNING)
+    logging.getLogger('websocket').setLevel(logging.WARNING)
+
+    results = []
+    group = args.filter.split('.')[0]
+    for name, benchmark in BENCHMARKS.items():
+        if group in BENCHMARKS and group != name:
+            continue
+        with quiet():
+            measured = list(benchmark(number))
+        for name, value, unit in measured:
+            if args.filter in name:
+                results.append({'name': name, 'value': round(value, 3), 'unit': unit})
+                print('%-45s %14.3f %s' % (name, value, unit))
+
+    report = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': int(time.time()),
+        'quick': args.quick,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+"""
+Fakes shared by the offline tests
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from zb.websocket_connection import WebsocketConnection
+
+
+def patch_connections(test_case):
+    """
+    Keep the websocket clients created during the test offline: their connections never connect and no watch dog
+    runs. The test opens a connection with on_open(Socket()) and feeds it with on_message.
+    """
+    for patcher in (patch.object(WebsocketConnection, 'connect'), patch('zb.subscription_client.WebSocketWatchDog')):
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+
+
+class Socket(object):
+    """
+    The socket of an offline connection, sent keeps the messages parsed.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+    def close(self):
+        pass
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET with a successful exchange response carrying data().
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def data(self):
+        return []
+
+    def do_GET(self):
+        body = json.dumps({'code': 10000, 'desc': 'success', 'data': self.data()}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpServerTestCase(TestCase):
+    """
+    Serves the handler on a local port for the tests of the class, at url.
+    """
+    handler = JsonHandler
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), cls.handler)
+        cls.url = 'http://127.0.0.1:%d' % cls.server.server_address[1]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
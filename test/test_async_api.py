@@ -0,0 +1,85 @@
+import asyncio
+
+import zb
+from zb.async_client import AsyncSessionPool
+
+from test.helpers import HttpServerTestCase, JsonHandler
+
+
+class _Handler(JsonHandler):
+    posted = []
+
+    def data(self):
+        if self.path.startswith('/api/public/v1/depth'):
+            return {'asks': [['101.5', '2']], 'bids': [['100.5', '3']], 'time': 1629450718756}
+        elif self.path.startswith('/Server/api/v2/Positions/getPositions'):
+            return [{'symbol': 'BTC_USDT', 'sign': self.headers.get('ZB-SIGN')}]
+        elif self.path.startswith('/Server/api/v2/trade/cancelAlgo'):
+            return [{'id': '1', 'code': 10000}]
+        return [[1.0, 2.0, 0.5, 1.5, 10.0, 1629450718]]
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.posted.append(self.path)
+        self.do_GET()
+
+
+class TestAsyncApi(HttpServerTestCase):
+    handler = _Handler
+
+    def test_concurrent_requests(self):
+        async def run():
+            pool = AsyncSessionPool(limit=10)
+            market_api = zb.AsyncMarketApi(api_host=self.url, session_pool=pool)
+            account_api = zb.AsyncAccountApi('key', 'secret', api_host=self.url, session_pool=pool)
+            market_api.verbose = False
+            account_api.verbose = False
+            try:
+                depths = await asyncio.gather(*[market_api.get_depth('btc_usdt') for _ in range(20)])
+                klines = await market_api.get_kline('btc_usdt')
+                positions = await account_api.get_positions('btc_usdt')
+            finally:
+                await pool.close()
+            return depths, klines, positions
+
+        depths, klines, positions = asyncio.run(run())
+        self.assertEqual(20, len(depths))
+        self.assertEqual(101.5, depths[0].asks[0].price)
+        self.assertEqual(1.5, klines[0].close)
+        self.assertIsNotNone(positions[0].sign)
+
+    def test_shared_methods(self):
+        trade_api = zb.TradeApi('key', 'secret', api_host=self.url)
+        async_trade_api = zb.AsyncTradeApi('key', 'secret', api_host=self.url, session_pool=AsyncSessionPool())
+        trade_api.verbose = False
+        async_trade_api.verbose = False
+
+        async def run():
+            try:
+                return await async_trade_api.cancel_algos('BTC_USDT', ['1'])
+            finally:
+                await async_trade_api.close()
+
+        self.assertEqual('1', trade_api.cancel_algos('BTC_USDT', ['1'])[0].id)
+        self.assertEqual('1', asyncio.run(run())[0].id)
+        self.assertEqual(['/Server/api/v2/trade/cancelAlgo'] * 2, _Handler.posted)
+
+    def test_pool_across_event_loops(self):
+        pool = AsyncSessionPool()
+        market_api = zb.AsyncMarketApi(api_host=self.url, session_pool=pool)
+        market_api.verbose = False
+
+        async def run():
+            return await market_api.get_depth('btc_usdt')
+
+        # the session of the first loop is left open, the second loop must not reuse it
+        self.assertEqual(101.5, asyncio.run(run()).asks[0].price)
+        self.assertEqual(101.5, asyncio.run(run()).asks[0].price)
+        self.assertEqual(1, len(pool._sessions))
+
+        async def close():
+            await market_api.get_depth('btc_usdt')
+            await pool.close()
+
+        asyncio.run(close())
+        self.assertEqual({}, pool._sessions)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import socket
+import threading
+from unittest import TestCase
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+import zb
+from zb.errors import NetworkError, RequestTimeout
+from zb.model.constant import FuturesAccountType
+
+
+async def _serve(received):
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            data = json.loads(message.data)
+            received.append(data)
+            if data.get('action') == 'subscribe' and data['channel'].endswith('.Ticker'):
+                for close in (1.5, 2.5):
+                    await ws.send_str(json.dumps({'channel': data['channel'], 'data': [1, 2, 0.5, close, 10, 0.1, 1629450718]}))
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/ws/public/v1', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, 'ws://127.0.0.1:%d/ws/public/v1' % port
+
+
+def _refused_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return 'ws://127.0.0.1:%d/ws/public/v1' % port
+
+
+class TestAsyncMarketClient(TestCase):
+    def setUp(self):
+        if web is None:
+            self.skipTest('aiohttp is not installed')
+
+    def test_stream(self):
+        async def run():
+            received = []
+            runner, url = await _serve(received)
+            client = zb.AsyncMarketClient(url=url)
+            try:
+                stream = client.stream('BTC_USDT.Ticker')
+                first = asyncio.ensure_future(stream.__anext__())
+                sub_1 = await client.subscribe_ticker_event('btc_usdt', None)
+                sub_2 = await client.subscribe_trade_event('btc_usdt', None)
+                connections = len(client.connections)
+                event = await asyncio.wait_for(first, 5)
+                second = await asyncio.wait_for(stream.__anext__(), 5)
+                await client.unsubscribe_event(channel='BTC_USDT.Trade')
+                await asyncio.sleep(0.1)
+                await stream.aclose()
+            finally:
+                await client.close()
+                await runner.cleanup()
+            return sub_1, sub_2, connections, event, second, received
+
+        sub_1, sub_2, connections, event, second, received = asyncio.run(run())
+        self.assertNotEqual(sub_1, sub_2)
+        self.assertEqual(1, connections)
+        self.assertEqual(1.5, event.data.close)
+        self.assertEqual(2.5, second.data.close)
+        self.assertIn({'action': 'unsubscribe', 'channel': 'BTC_USDT.Trade'}, received)
+
+    def test_connect_failure(self):
+        async def run(**kwargs):
+            client = zb.AsyncMarketClient(url=_refused_url(), **kwargs)
+            try:
+                with self.assertRaises(NetworkError) as raised:
+                    await asyncio.wait_for(client.subscribe_ticker_event('btc_usdt', None), 5)
+                return raised.exception, client.connections
+            finally:
+                await client.close()
+
+        error, connections = asyncio.run(run(is_auto_connect=False))
+        self.assertNotIsInstance(error, RequestTimeout)
+        self.assertEqual([], connections)
+
+        error, connections = asyncio.run(run(receive_limit_ms=300, connection_delay_failure=0.05))
+        self.assertIsInstance(error, RequestTimeout)
+        self.assertEqual([], connections)
+
+
+class TestAsyncWsAccountClient(TestCase):
+    def setUp(self):
+        if web is None:
+            self.skipTest('aiohttp is not installed')
+
+    def test_login_timeout(self):
+        async def run():
+            # the server never acknowledges the login
+            received = []
+            runner, url = await _serve(received)
+            client = zb.AsyncWsAccountClient('key', 'secret', url=url, request_timeout_ms=300)
+            try:
+                waiter = asyncio.ensure_future(client.login())
+                await asyncio.sleep(0.05)
+                waiter.cancel()
+                login = client.login_map[FuturesAccountType.BASE_USDT]
+                cancelled = login.cancelled()
+
+                with self.assertRaises(RequestTimeout):
+                    await client.get_order(None, 'BTC_USDT', order_id=1)
+                return cancelled, login, client.connection_map, client.connections, received
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        cancelled, login, connection_map, connections, received = asyncio.run(run())
+        self.assertFalse(cancelled)
+        self.assertIsInstance(login.exception(0), RequestTimeout)
+        self.assertEqual({}, connection_map)
+        self.assertEqual([], connections)
+        self.assertEqual(['login'], [message['action'] for message in received])
+
+    def test_timeout_on_loop(self):
+        async def run():
+            received = []
+            runner, url = await _serve(received)
+            client = zb.AsyncWsAccountClient('key', 'secret', url=url, request_timeout_ms=200)
+            threads = []
+            try:
+                with self.assertRaises(RequestTimeout):
+                    await client.subscribe('BTC_USDT.Order', {}, None, None, lambda error: threads.append(threading.get_ident()))
+                await asyncio.sleep(0)
+                return threads, threading.get_ident()
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        # the error handlers run on the event loop, not on the timer thread
+        threads, loop_thread = asyncio.run(run())
+        self.assertEqual([loop_thread], threads)
@@ -0,0 +1,119 @@
+import threading
+from email.utils import formatdate
+from unittest import TestCase
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import zb
+from zb.clock_sync import ClockSync
+from zb.errors import InvalidSign, ZbApiException
+from zb.mock_server import MockExchange
+
+
+class TestClockSync(TestCase):
+    def test_date_samples_converge(self):
+        clock = ClockSync()
+        offset = 5250
+        # 10ms round trips at different phases of the second stamped by the Date header
+        for sent in range(1000000, 1010000, 370):
+            server_ms = (sent + 5 + offset) // 1000 * 1000
+            clock.add_sample(sent, server_ms, sent + 10, 1000)
+        self.assertAlmostEqual(offset, clock.offset_ms, delta=10)
+        self.assertLessEqual(clock.uncertainty_ms, 20)
+        self.assertEqual(10, clock.rtt_ms())
+
+    def test_observe_response(self):
+        clock = ClockSync()
+        clock.observe_response(1640995200100, 1640995200120, formatdate(1640995203.5, usegmt=True))
+        self.assertEqual(((3000 - 120) + (4000 - 100)) // 2, clock.offset_ms)
+        clock.observe_response(1, 2, None)
+        clock.observe_response(1, 2, 'not a date')
+        self.assertEqual(1, clock.stats()['samples'])
+
+    def test_events_bound_the_offset(self):
+        clock = ClockSync()
+        for received, lag in ((1000, 30), (2000, 12), (3000, 20)):
+            clock.observe_event(received - 700 - lag, received)
+        self.assertEqual(-712, clock.offset_ms)
+        self.assertIsNone(clock.uncertainty_ms)
+        self.assertEqual(8, clock.latency_ms(3000 - 720, 3000))
+
+    def test_contradicting_samples(self):
+        clock = ClockSync()
+        clock.add_sample(1000, 1000, 1050)
+        clock.add_sample(2000, 3000, 2010)
+        self.assertEqual(995, clock.offset_ms)
+
+    def test_window(self):
+        clock = ClockSync(window_ms=1000)
+        clock.add_sample(0, 500, 10)
+        clock.add_sample(5000, 5000, 5010)
+        self.assertEqual(-5, clock.offset_ms)
+
+
+class TestClockSyncMockExchange(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if aiohttp is None:
+            raise cls.skipTest(cls, 'aiohttp is not installed')
+        cls.exchange = MockExchange(push_interval_ms=20, seed=1, clock_offset_ms=5000, timestamp_window_ms=1500).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.exchange.stop()
+
+    def test_signed_requests(self):
+        api = zb.TradeApi(self.exchange.api_key, self.exchange.secret_key, api_host=self.exchange.url)
+        api.verbose = False
+        self.assertRaises(InvalidSign, api.get_undone_orders, 'BTC_USDT')
+
+        clock = ClockSync()
+        market = zb.MarketApi(api_host=self.exchange.url, clock_sync=clock)
+        market.verbose = False
+        market.get_mark_price('BTC_USDT')
+        self.assertAlmostEqual(5000, clock.offset_ms, delta=1000)
+
+        api = zb.TradeApi(self.exchange.api_key, self.exchange.secret_key, api_host=self.exchange.url, clock_sync=clock)
+        api.verbose = False
+        self.assertEqual([], api.get_undone_orders('BTC_USDT'))
+
+    def test_market_client(self):
+        clock = ClockSync()
+        received = threading.Event()
+        depths = []
+
+        def callback(event):
+            depths.append(event)
+            if len(depths) >= 5:
+                received.set()
+
+        client = zb.MarketClient(url=self.exchange.ws_url(), clock_sync=clock)
+        client.subscribe_depth_event('btc_usdt', callback)
+        try:
+            self.assertTrue(received.wait(5))
+        finally:
+            for connection in client.connections:
+                connection.close_on_hand()
+        self.assertGreaterEqual(clock.offset_ms, 5000 - 1000)
+        self.assertLess(clock.offset_ms, 5000 + 50)
+
+    def test_account_login(self):
+        client = zb.WsAccountClient(self.exchange.api_key, self.exchange.secret_key, url=self.exchange.ws_url(True))
+        try:
+            self.assertRaises(ZbApiException, client.login(wait=False).result, 5)
+        finally:
+            for connection in client.connections:
+                connection.close_on_hand()
+
+        clock = ClockSync()
+        clock.add_sample(0, 5000, 0)
+        client = zb.WsAccountClient(self.exchange.api_key, self.exchange.secret_key, url=self.exchange.ws_url(True),
+                                    clock_sync=clock)
+        try:
+            self.assertEqual('10000', client.get_account(None).result(5).data['account']['available'])
+        finally:
+            for connection in client.connections:
+                connection.close_on_hand()
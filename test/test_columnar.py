@@ -0,0 +1,26 @@
+import math
+from unittest import TestCase, skipIf
+
+import zb
+from zb.model import columnar
+from zb.model.subscribe_envet import KlineEvent
+
+
+@skipIf(columnar.numpy is None, 'numpy is not installed')
+class TestColumnarKlines(TestCase):
+    def test_get_kline(self):
+        api = zb.MarketApi()
+        api.public_get_kline = lambda params: [[1, 2, 0.5, 1.5, 10, 1600000000], ['1.5', '3', '1', '2', '20', '1600000060']]
+
+        klines = api.get_kline('btc_usdt', columnar=True)
+        self.assertEqual([1.5, 2.0], klines['close'].tolist())
+        self.assertEqual([1600000000, 1600000060], klines['timestamp'].tolist())
+        self.assertEqual(30.0, klines['volume'].sum())
+
+    def test_mark_kline_event(self):
+        event = KlineEvent(columnar=True, channel='BTC_USDT.mark_1M', data=[[1, 2, 0.5, 1.5, 1600000000]])
+        self.assertTrue(math.isnan(event.data['volume'][0]))
+        self.assertEqual(1600000000, event.data['timestamp'][0])
+
+    def test_empty(self):
+        self.assertEqual(0, len(columnar.parse_klines([])))
@@ -0,0 +1,111 @@
+import asyncio
+import gzip
+import json
+import zlib
+from unittest import TestCase
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+import zb
+from zb.compression import FrameDecoder
+from zb.errors import NotSupported
+
+from test.helpers import patch_connections
+
+DEPTH = {'channel': 'BTC_USDT.DepthWhole', 'data': {'asks': [['41000.5', '0.1']] * 200, 'bids': [['40999', '2']] * 200,
+                                                    'time': '1640000000000'}}
+
+
+def _deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TestFrameDecoder(TestCase):
+    def test_decode(self):
+        decoder = FrameDecoder()
+        raw = json.dumps(DEPTH).encode('utf-8')
+        for frame in (gzip.compress(raw), zlib.compress(raw), _deflate(raw), gzip.compress(raw)):
+            self.assertEqual(raw, decoder.decode(frame))
+        self.assertEqual(raw, decoder.decode(raw))
+        self.assertEqual(4, decoder.frames)
+        self.assertGreater(decoder.ratio(), 10)
+
+    def test_json_with_leading_whitespace(self):
+        decoder = FrameDecoder()
+        for frame in (b'  {"channel":"BTC_USDT.Ticker"}', b'\r\n\t[1, 2]', b''):
+            self.assertEqual(frame, decoder.decode(frame))
+        self.assertEqual(0, decoder.frames)
+
+    def test_truncated(self):
+        decoder = FrameDecoder()
+        frame = gzip.compress(json.dumps(DEPTH).encode('utf-8'))
+        self.assertRaises(zlib.error, decoder.decode, frame[:len(frame) // 2])
+        self.assertEqual(json.dumps(DEPTH).encode('utf-8'), decoder.decode(frame))
+
+
+class TestCompressedFrames(TestCase):
+    def setUp(self):
+        patch_connections(self)
+
+    def test_binary_frames(self):
+        client = zb.MarketClient()
+        events, errors = [], []
+        client.subscribe_whole_depth_event('btc_usdt', events.append, size=200, error_handler=errors.append)
+        conn = client.connections[0]
+
+        conn.on_message(gzip.compress(json.dumps(DEPTH).encode('utf-8')))
+        conn.on_message(b'\x1f\x8b\x08corrupt')
+        self.assertEqual(1, len(events))
+        self.assertEqual(200, len(events[0].asks))
+        self.assertEqual(1, len(errors))
+
+    def test_compress_requires_asyncio(self):
+        self.assertRaises(NotSupported, zb.MarketClient, compress=True)
+
+
+class TestPermessageDeflate(TestCase):
+    def setUp(self):
+        if web is None:
+            self.skipTest('aiohttp is not installed')
+
+    def test_negotiate(self):
+        async def run():
+            negotiated = []
+
+            async def handler(request):
+                ws = web.WebSocketResponse(compress=True)
+                await ws.prepare(request)
+                negotiated.append(ws.compress)
+                async for message in ws:
+                    data = json.loads(message.data)
+                    if data.get('action') == 'subscribe':
+                        await ws.send_str(json.dumps(dict(DEPTH, channel=data['channel'])))
+                return ws
+
+            app = web.Application()
+            app.router.add_get('/ws/public/v1', handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = runner.addresses[0][1]
+
+            client = zb.AsyncMarketClient(url='ws://127.0.0.1:%d/ws/public/v1' % port, compress=True)
+            try:
+                stream = client.stream('BTC_USDT.DepthWhole')
+                first = asyncio.ensure_future(stream.__anext__())
+                await client.subscribe_whole_depth_event('btc_usdt', None, size=200)
+                event = await asyncio.wait_for(first, 5)
+                await stream.aclose()
+            finally:
+                await client.close()
+                await runner.cleanup()
+            return negotiated, event
+
+        negotiated, event = asyncio.run(run())
+        self.assertTrue(negotiated[0])
+        self.assertEqual(200, len(event.bids))
@@ -0,0 +1,47 @@
+import json
+from unittest import TestCase
+
+import zb
+from zb.conflator import Conflator
+
+from test.helpers import patch_connections
+
+
+class TestConflator(TestCase):
+    def setUp(self):
+        patch_connections(self)
+        self.client = zb.MarketClient()
+
+    def test_conflator(self):
+        parsed = []
+        conflator = Conflator()
+        for price in (1, 2, 3):
+            conflator.update('BTC_USDT', price, lambda raw: parsed.append(raw) or raw * 10)
+        self.assertEqual(30, conflator.get('BTC_USDT'))
+        self.assertEqual(30, conflator.get('BTC_USDT'))
+        self.assertEqual([3], parsed)
+        self.assertEqual({'keys': 1, 'updates': 3, 'coalesced': 2}, conflator.stats())
+        self.assertEqual({}, conflator.pop_updated())
+
+    def test_ticker(self):
+        conflator = Conflator()
+        updated = []
+        self.client.subscribe_ticker_event('btc_usdt', updated.append, conflator=conflator)
+        conn = self.client.connections[0]
+        for close in (1.5, 1.6, 1.7):
+            conn.on_message(json.dumps({'channel': 'BTC_USDT.Ticker', 'data': [1, 2, 0.5, close, 10, 0.1, 1629450718]}))
+
+        self.assertEqual([['BTC_USDT']] * 3, updated)
+        self.assertEqual(1.7, conflator.get('BTC_USDT').data.close)
+        self.assertEqual(2, conflator.coalesced)
+
+    def test_all_ticker(self):
+        conflator = Conflator()
+        self.client.subscribe_all_ticker_event(None, conflator=conflator)
+        conn = self.client.connections[0]
+        conn.on_message(json.dumps({'channel': 'All.Ticker', 'data': {'BTC_USDT': [1, 2, 0.5, 1.5, 10, 0.1, 1629450718],
+                                                                      'ETH_USDT': [1, 2, 0.5, 2.5, 10, 0.1, 1629450718]}}))
+        updated = conflator.pop_updated()
+        self.assertEqual(['BTC_USDT', 'ETH_USDT'], sorted(updated))
+        self.assertEqual('ETH_USDT.Ticker', updated['ETH_USDT'].channel)
+        self.assertEqual(2.5, updated['ETH_USDT'].data.close)
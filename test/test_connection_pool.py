@@ -0,0 +1,38 @@
+import zb
+from zb.connection_pool import SessionPool
+
+from test.helpers import HttpServerTestCase
+
+
+class TestSessionPool(HttpServerTestCase):
+    def test_reuse_connection(self):
+        pool = SessionPool()
+        for _ in range(5):
+            pool.request('GET', self.url + '/ping')
+
+        stats = pool.stats()
+        self.assertEqual(5, stats['requests'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(4, stats['hits'])
+
+    def test_recycle_idle(self):
+        pool = SessionPool(max_idle_ms=1)
+        pool.request('GET', self.url + '/ping')
+        pool._last_used -= 10
+        pool.request('GET', self.url + '/ping')
+
+        stats = pool.stats()
+        self.assertEqual(1, stats['recycled'])
+        self.assertEqual(2, stats['misses'])
+
+    def test_shared_by_clients(self):
+        pool = SessionPool()
+        market_api = zb.MarketApi(api_host=self.url, session_pool=pool)
+        account_api = zb.AccountApi('key', 'secret', api_host=self.url, session_pool=pool)
+        market_api.verbose = False
+
+        market_api.get_market_list()
+        market_api.get_market_list()
+
+        self.assertIs(market_api.session_pool, account_api.session_pool)
+        self.assertEqual(1, market_api.pool_stats()['hits'])
@@ -0,0 +1,71 @@
+import json
+import threading
+from unittest import TestCase
+
+import zb
+from zb.dispatcher import Dispatcher
+from zb.model.constant import OverflowPolicy
+
+from test.helpers import patch_connections
+
+
+class TestDispatcher(TestCase):
+    def setUp(self):
+        self.gate = threading.Event()
+        self.received = []
+        self.done = threading.Event()
+        self.started = threading.Event()
+
+    def handler(self, message):
+        self.started.set()
+        self.gate.wait(1)
+        self.received.append(message)
+        if message == 'last':
+            self.done.set()
+
+    def submit_all(self, policy):
+        dispatcher = Dispatcher(workers=2, maxsize=2, policy=policy)
+        self.addCleanup(dispatcher.close)
+        dispatcher.submit('BTC_USDT.Ticker', self.handler, 1)
+        self.assertTrue(self.started.wait(1))
+        for message in (2, 3, 4, 'last'):
+            dispatcher.submit('BTC_USDT.Ticker', self.handler, message)
+        self.gate.set()
+        self.assertTrue(self.done.wait(1))
+        return dispatcher.stats()['BTC_USDT.Ticker']
+
+    def test_drop_oldest(self):
+        stats = self.submit_all(OverflowPolicy.DROP_OLDEST)
+        self.assertEqual([1, 4, 'last'], self.received)
+        self.assertEqual(2, stats['dropped'])
+        self.assertEqual(2, stats['max_depth'])
+
+    def test_conflate(self):
+        stats = self.submit_all(OverflowPolicy.CONFLATE)
+        self.assertEqual([1, 'last'], self.received)
+        self.assertEqual(3, stats['dropped'])
+
+    def test_block(self):
+        dispatcher = Dispatcher(workers=1, maxsize=1, policy=OverflowPolicy.BLOCK)
+        self.addCleanup(dispatcher.close)
+        self.gate.set()
+        for message in range(20):
+            dispatcher.submit('BTC_USDT.Trade', self.handler, message)
+        dispatcher.submit('BTC_USDT.Trade', self.handler, 'last')
+        self.assertTrue(self.done.wait(1))
+        self.assertEqual(list(range(20)) + ['last'], self.received)
+        self.assertEqual(0, dispatcher.stats()['BTC_USDT.Trade']['dropped'])
+
+    def test_client(self):
+        patch_connections(self)
+        client = zb.MarketClient(dispatch_workers=1, overflow_policy=OverflowPolicy.CONFLATE)
+        self.addCleanup(client.dispatcher.close)
+
+        reader = threading.current_thread()
+        threads = []
+        client.subscribe_ticker_event('btc_usdt', lambda event: (threads.append(threading.current_thread()), self.done.set()))
+        client.connections[0].on_message(json.dumps({'channel': 'BTC_USDT.Ticker', 'data': [1, 2, 0.5, 1.5, 10, 0.1, 1629450718]}))
+
+        self.assertTrue(self.done.wait(1))
+        self.assertIsNot(reader, threads[0])
+        self.assertEqual(1, client.dispatch_stats()['BTC_USDT.Ticker']['dispatched'])
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from zb.model.market import Kline, Ticker, Trade, FastKline, FastTicker, FastTrade, FastDepthEntry, Depth
+from zb.model.subscribe_envet import DepthEvent, KlineEvent
+
+
+class TestFastModels(TestCase):
+    def test_same_fields(self):
+        for slow, fast, sample in ((Kline, FastKline, [1, 2, 3, 4, 5, 1600000000]),
+                                   (Trade, FastTrade, [41250.0, 0.02, 1, 1600000000]),
+                                   (Ticker, FastTicker, [1, 2, 3, 4, 5, 0.5, 1600000000, 7])):
+            self.assertEqual(slow.json_parse(sample).to_dict(), fast.json_parse(sample).to_dict())
+            self.assertEqual(slow.json_parse(sample).trade_time(), fast.json_parse(sample).trade_time())
+        self.assertFalse(hasattr(FastDepthEntry.json_parse(['1', '2']), 'trade_time'))
+
+    def test_immutable(self):
+        kline = FastKline.json_parse([1, 2, 3, 4, 1600000000])
+        self.assertIsNone(kline.volume)
+        self.assertEqual(1600000000, kline.timestamp)
+        with self.assertRaises(AttributeError):
+            kline.close = 1.0
+        with self.assertRaises(AttributeError):
+            kline.extra = 1.0
+
+    def test_events(self):
+        depth = Depth(entry_class=FastDepthEntry, asks=[['2', '1']], bids=[['1', '3']])
+        self.assertEqual((2.0, 1.0), depth.asks[0])
+
+        event = DepthEvent(model_class=FastDepthEntry, channel='BTC_USDT.Depth', data={'bids': [['1', '3']]})
+        self.assertEqual(3.0, event.bids[0].amount)
+        self.assertNotIn('model_class', event)
+
+        event = KlineEvent(channel='BTC_USDT.KLine_1M', data=[[1, 2, 3, 4, 5, 1600000000]])
+        self.assertIsInstance(event.data[0], Kline)
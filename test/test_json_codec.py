@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+from zb import json_codec
+from zb.errors import NotSupported
+
+
+class TestJsonCodec(TestCase):
+    def tearDown(self):
+        json_codec.set_codec()
+
+    def test_codecs(self):
+        message = {'channel': 'BTC_USDT.Depth', 'data': {'asks': [['41000.5', '0.1']], 'time': 1640000000000}}
+        for name in json_codec.available_codecs():
+            codec = json_codec.set_codec(name)
+            self.assertEqual(name, codec.name)
+            text = json_codec.dumps(message)
+            self.assertIsInstance(text, str)
+            self.assertEqual(message, json_codec.loads(text))
+            self.assertEqual(message, json_codec.loads(text.encode('utf-8')))
+
+    def test_default(self):
+        self.assertEqual(json_codec.available_codecs()[0], json_codec.codec.name)
+        self.assertRaises(NotSupported, json_codec.get_codec, 'yaml')
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import TestCase
+
+from zb.kline_backfill import KlineBackfill, KlineStore
+from zb.model.constant import Interval
+
+
+class _MarketApi(object):
+    enable_rate_limit = False
+
+    def __init__(self):
+        self.sizes = []
+        self.throttled = []
+
+    def throttle(self, path, api):
+        self.throttled.append((path, api))
+
+    def public_get_kline(self, params):
+        self.sizes.append(params['size'])
+        now = int(time.time()) // 60 * 60
+        return [[1, 2, 0.5, 1.5, 10, now - 60 * i] for i in range(params['size'])]
+
+    def public_get_mark_kline(self, params):
+        return [[1, 2, 0.5, 1.5, 1600000000], [1, 2, 0.5, 1.5, 1600000060]]
+
+    public_get_kline.template = SimpleNamespace(path='/api/public/v1/kline', api='public')
+    public_get_mark_kline.template = SimpleNamespace(path='/api/public/v1/markKline', api='public')
+
+
+class TestKlineBackfill(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_store(self):
+        store = KlineStore(os.path.join(self.root, 'BTC_USDT_1M.bin'))
+        self.assertEqual(2, store.append([[1, 2, 0.5, 1.5, 10, 120], [1, 2, 0.5, 1.5, 10, 60], [1, 2, 0.5, 1.5, 10, 60]]))
+        self.assertEqual(1, store.append([[1, 2, 0.5, 1.5, 10, 120], [1, 2, 0.5, 1.5, 20, 180]]))
+        self.assertEqual(3, len(KlineStore(store.path)))
+        self.assertEqual(180, KlineStore(store.path).last_timestamp())
+        self.assertEqual([120, 180], [k.timestamp for k in store.read(since=120)])
+        self.assertEqual(20.0, store.read()[-1].volume)
+
+    def test_backfill(self):
+        api = _MarketApi()
+        backfill = KlineBackfill(api, self.root)
+
+        result = backfill.run([('btc_usdt', Interval.MIN_1), ('btc_usdt', Interval.MIN_1, 'mark_kline')])
+        self.assertEqual(1439, result[('kline', 'BTC_USDT', Interval.MIN_1)])
+        self.assertEqual(1, result[('mark_kline', 'BTC_USDT', Interval.MIN_1)])
+        # every request is throttled, the settings of the caller's client are left alone
+        self.assertFalse(api.enable_rate_limit)
+        self.assertEqual(len(api.sizes) + 1, len(api.throttled))
+        self.assertIn(('/api/public/v1/markKline', 'public'), api.throttled)
+
+        # the client throttles itself
+        api.enable_rate_limit = True
+        throttled = len(api.throttled)
+        backfill.backfill('btc_usdt', Interval.MIN_1)
+        self.assertEqual(throttled, len(api.throttled))
+        self.assertTrue(api.enable_rate_limit)
+
+        self.assertLessEqual(backfill.backfill('btc_usdt', Interval.MIN_1), 1)
+        self.assertLessEqual(api.sizes[-1], 3)
+        self.assertGreaterEqual(len(backfill.store('btc_usdt', Interval.MIN_1)), 1439)
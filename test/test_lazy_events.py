@@ -0,0 +1,58 @@
+import json
+from unittest import TestCase
+
+import zb
+from zb.model.market import FastModels
+from zb.model.subscribe_envet import Events, LazyEvents, LazyEvent
+
+from test.helpers import patch_connections
+
+DEPTH = {'channel': 'BTC_USDT.Depth', 'data': {'asks': [['41001', '0.5'], ['41002', '1']], 'bids': [['41000', '2']],
+                                               'time': '1640000000000'}}
+TRADE = {'channel': 'BTC_USDT.Trade', 'data': [[41250.0, 0.02, 1, 1640000000], [41251.0, 0.5, -1, 1640000001]]}
+ALL_TICKER = {'channel': 'All.Ticker', 'data': {'BTC_USDT': [1, 2, 0.5, 1.5, 10, 0.1, 1629450718],
+                                                'ETH_USDT': [1, 2, 0.5, 2.5, 10, 0.1, 1629450718]}}
+
+
+class TestLazyEvents(TestCase):
+    def test_same_values(self):
+        for name, message in (('DepthEvent', DEPTH), ('TradeEvent', TRADE), ('AllTickerEvent', ALL_TICKER)):
+            eager = getattr(Events, name)(**message)
+            lazy = getattr(LazyEvents, name)(**message)
+            self.assertEqual(eager.channel, lazy.channel)
+            if name == 'DepthEvent':
+                self.assertEqual(eager.asks, list(lazy.asks))
+                self.assertEqual(eager.bids[-1], lazy.bids[-1])
+            elif name == 'TradeEvent':
+                self.assertEqual(eager.data, list(lazy.data))
+            else:
+                self.assertEqual(eager.data, dict(lazy.data))
+
+    def test_parse_on_access(self):
+        parsed = []
+
+        class Entry(object):
+            @staticmethod
+            def json_parse(item):
+                parsed.append(item)
+                return FastModels.DepthEntry.json_parse(item)
+
+        event = LazyEvents.DepthEvent(model_class=Entry, **DEPTH)
+        self.assertEqual('BTC_USDT.Depth', event['channel'])
+        self.assertEqual([], parsed)
+        self.assertEqual(41001.0, event.asks[0].price)
+        self.assertEqual(41001.0, event.asks[0].price)
+        self.assertEqual([['41001', '0.5']], parsed)
+        self.assertEqual(2, len(event.asks))
+        self.assertEqual([41002.0], [e.price for e in event.asks[1:]])
+
+    def test_client(self):
+        patch_connections(self)
+        client = zb.MarketClient(lazy_events=True, fast_models=True)
+        events = []
+        client.subscribe_trade_event('btc_usdt', events.append)
+        client.connections[0].on_message(json.dumps(TRADE))
+
+        self.assertIsInstance(events[0], LazyEvent)
+        self.assertEqual(41251.0, events[0].data[-1].price)
+        self.assertEqual(TRADE, events[0].to_dict())
@@ -0,0 +1,83 @@
+import logging
+from unittest import TestCase
+
+import zb
+from zb import log
+from zb.websocket_connection import WebsocketConnection
+
+
+class Unprintable(object):
+    """Fails the test if the logging formats it"""
+
+    def __str__(self):
+        raise AssertionError('formatted while logging is disabled')
+
+    __repr__ = __str__
+
+
+class NullSocket(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLog(TestCase):
+    def setUp(self):
+        self.handler = Records()
+        log.get_logger().addHandler(self.handler)
+
+    def tearDown(self):
+        log.get_logger().removeHandler(self.handler)
+        log.sample(1)
+        for name in (None,) + log.SUBSYSTEMS:
+            log.set_level(logging.NOTSET, name)
+
+    def test_subsystem_loggers(self):
+        self.assertEqual('zb.ws.account', log.get_logger(log.ACCOUNT).name)
+        log.set_level(logging.DEBUG, log.REST)
+        self.assertTrue(log.get_logger(log.REST).isEnabledFor(logging.DEBUG))
+        self.assertFalse(log.get_logger(log.WS).isEnabledFor(logging.DEBUG))
+
+    def test_no_formatting_when_disabled(self):
+        log.set_level(logging.WARNING)
+        connection = WebsocketConnection('api-key', 'secret-key', 'ws://localhost', None)
+        connection.ws = NullSocket()
+        message = Unprintable()
+        connection.send(message)
+        self.assertEqual([message], connection.ws.sent)
+
+        api = zb.TradeApi('api-key', 'secret-key')
+        api.prepare_request('/Server/api/v2/trade/order', 'private', 'POST', {'symbol': 'BTC_USDT', 'amount': 1})
+        self.assertEqual([], self.handler.records)
+
+    def test_debug_enabled(self):
+        log.set_level(logging.DEBUG, log.SIGN)
+        zb.TradeApi('api-key', 'secret-key').prepare_request('/Server/api/v2/trade/getOrder', 'private', 'GET',
+                                                            {'symbol': 'BTC_USDT'})
+        self.assertEqual(['zb.sign'], [record.name for record in self.handler.records])
+        self.assertTrue(self.handler.records[0].getMessage().endswith('GET/Server/api/v2/trade/getOrdersymbol=BTC_USDT'))
+
+    def test_sampling(self):
+        log.set_level(logging.DEBUG, log.WS)
+        sampling = log.sample(10, log.WS)
+        logger = log.get_logger(log.WS)
+        for i in range(100):
+            logger.debug('message %d', i)
+        logger.warning('never dropped')
+        self.assertEqual(11, len(self.handler.records))
+        self.assertEqual('message 10', self.handler.records[1].getMessage())
+        self.assertEqual(90, sampling.dropped)
+
+        self.assertIsNone(log.sample(1, log.WS))
+        self.assertEqual([], logger.filters)
@@ -0,0 +1,81 @@
+import json
+from unittest import TestCase
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import zb
+from zb.errors import ZbApiException
+from zb.metrics import Histogram, MetricsCollector, exchange_time_ms
+from zb.utils import Utils
+
+from test.helpers import patch_connections
+
+
+class TestHistogram(TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 10001):
+            histogram.record(value)
+        self.assertEqual(10000, histogram.count)
+        self.assertEqual(1, histogram.percentile(0))
+        self.assertAlmostEqual(5000, histogram.percentile(50), delta=5000 * 0.016)
+        self.assertAlmostEqual(9900, histogram.percentile(99), delta=9900 * 0.016)
+        self.assertEqual(10000, histogram.percentile(100))
+        self.assertIsNone(Histogram().percentile(50))
+
+
+class TestWebsocketMetrics(TestCase):
+    def setUp(self):
+        patch_connections(self)
+
+    def test_frames(self):
+        collector = MetricsCollector()
+        client = zb.MarketClient(instrumentation=collector)
+        client.subscribe_trade_event('btc_usdt', lambda event: None)
+        conn = client.connections[0]
+        now = Utils.milliseconds() // 1000
+        for _ in range(3):
+            conn.on_message(json.dumps({'channel': 'BTC_USDT.Trade', 'data': [[100.5, 1, 1, now - 2]]}))
+        conn.re_connect_in_delay(1)
+
+        summary = collector.summary()
+        self.assertEqual(3, summary['frames']['BTC_USDT.Trade']['count'])
+        self.assertEqual(3, summary['frames']['BTC_USDT.Trade']['parse']['count'])
+        self.assertGreaterEqual(summary['lag']['BTC_USDT.Trade']['min'], 1000)
+        self.assertEqual(1, summary['reconnects'][conn.url])
+        text = collector.prometheus()
+        self.assertIn('zb_ws_frames_total{channel="BTC_USDT.Trade"} 3', text)
+        self.assertIn('zb_ws_parse_seconds_count{channel="BTC_USDT.Trade"} 3', text)
+
+    def test_exchange_time(self):
+        self.assertEqual(1629450718000, exchange_time_ms({'channel': 'BTC_USDT.Ticker', 'data': [1, 2, 0.5, 1.5, 10, 0.1, 1629450718]}))
+        self.assertEqual(1640000000000, exchange_time_ms({'channel': 'BTC_USDT.DepthWhole', 'data': {'time': '1640000000000'}}))
+        self.assertIsNone(exchange_time_ms({'channel': 'BTC_USDT.mark', 'data': '41000'}))
+
+
+class TestRestMetrics(TestCase):
+    def setUp(self):
+        if aiohttp is None:
+            self.skipTest('aiohttp is not installed')
+
+    def test_rest(self):
+        from zb.mock_server import MockExchange
+
+        collector = MetricsCollector()
+        with MockExchange() as exchange:
+            api = zb.TradeApi(exchange.api_key, exchange.secret_key, api_host=exchange.url, instrumentation=collector)
+            api.verbose = False
+            api.get_undone_orders('BTC_USDT')
+            exchange.error_rate = 1
+            self.assertRaises(ZbApiException, api.cancel_all_orders, 'BTC_USDT')
+
+        summary = collector.summary()
+        get = 'GET /Server/api/v2/trade/getUndoneOrders'
+        for phase in ('sign', 'network', 'parse', 'total'):
+            self.assertEqual(1, summary['rest'][get + ' ' + phase]['count'])
+        self.assertEqual(1, summary['rest']['POST /Server/api/v2/trade/cancelAllOrders serialize']['count'])
+        self.assertEqual({'POST /Server/api/v2/trade/cancelAllOrders': 1}, summary['rest_errors'])
+        self.assertIn('zb_rest_seconds_count{endpoint="%s",phase="network"} 1' % get, collector.prometheus())
@@ -0,0 +1,91 @@
+import threading
+from unittest import TestCase
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import zb
+from zb.errors import InvalidSign, ZbApiException
+from zb.model.constant import OrderSide
+from zb.mock_server import MockExchange
+
+
+def _close(client):
+    for connection in client.connections:
+        connection.close_on_hand()
+
+
+class TestMockExchange(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if aiohttp is None:
+            raise cls.skipTest(cls, 'aiohttp is not installed')
+        cls.exchange = MockExchange(push_interval_ms=20, seed=1).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.exchange.stop()
+
+    def test_market_api(self):
+        api = zb.MarketApi(api_host=self.exchange.url)
+        depth = api.get_depth('btc_usdt', size=10)
+        self.assertEqual(10, len(depth.asks))
+        self.assertLess(depth.bids[0].price, depth.asks[0].price)
+        self.assertEqual(5, len(api.get_kline('btc_usdt', size=5)))
+        self.assertIn('ETH_USDT', api.get_ticker())
+        self.assertNotEqual(self.exchange.url, zb.MarketApi().urls['api'])
+
+    def test_trade_api(self):
+        api = zb.TradeApi(self.exchange.api_key, self.exchange.secret_key, api_host=self.exchange.url)
+        api.verbose = False
+        order_id = api.order('BTC_USDT', OrderSide.SIDE_OPEN_LONG, 1, 100.5)
+        self.assertEqual(100.5, api.get_order('BTC_USDT', order_id=order_id).price)
+        api.cancel_order('BTC_USDT', order_id=order_id)
+        self.assertEqual([], api.get_undone_orders('BTC_USDT'))
+
+        wrong = zb.TradeApi(self.exchange.api_key, 'wrong', api_host=self.exchange.url)
+        wrong.verbose = False
+        self.assertRaises(InvalidSign, wrong.get_undone_orders, 'BTC_USDT')
+
+    def test_error_injection(self):
+        api = zb.MarketApi(api_host=self.exchange.url)
+        api.verbose = False
+        self.exchange.error_rate = 1
+        try:
+            self.assertRaises(ZbApiException, api.get_trade, 'btc_usdt')
+        finally:
+            self.exchange.error_rate = 0
+
+    def test_market_client(self):
+        received = threading.Event()
+        events = []
+
+        def callback(event):
+            events.append(event)
+            if len(events) >= 3:
+                received.set()
+
+        client = zb.MarketClient(url=self.exchange.ws_url())
+        client.subscribe_ticker_event('btc_usdt', callback)
+        try:
+            self.assertTrue(received.wait(5))
+        finally:
+            _close(client)
+        self.assertEqual('BTC_USDT.Ticker', events[0].channel)
+        self.assertGreater(events[0].data.close, 0)
+
+    def test_account_client(self):
+        client = zb.WsAccountClient(self.exchange.api_key, self.exchange.secret_key, url=self.exchange.ws_url(True))
+        try:
+            event = client.get_account(None).result(5)
+            self.assertEqual('10000', event.data['account']['available'])
+        finally:
+            _close(client)
+
+        client = zb.WsAccountClient(self.exchange.api_key, 'wrong', url=self.exchange.ws_url(True))
+        try:
+            self.assertRaises(ZbApiException, client.login(wait=False).result, 5)
+        finally:
+            _close(client)
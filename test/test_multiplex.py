@@ -0,0 +1,93 @@
+import json
+from unittest import TestCase
+
+import zb
+from zb.model.constant import ConnectionState
+
+from test.helpers import patch_connections, Socket
+
+
+class TestMultiplex(TestCase):
+    def setUp(self):
+        patch_connections(self)
+        self.client = zb.MarketClient(url='wss://fapi.zb.com/ws/public/v1', max_channels_per_connection=2)
+
+    def test_pack_channels(self):
+        events = []
+        sub_1 = self.client.subscribe_ticker_event('btc_usdt', events.append)
+        sub_2 = self.client.subscribe_trade_event('btc_usdt', events.append)
+        sub_3 = self.client.subscribe_ticker_event('eth_usdt', events.append)
+
+        self.assertEqual(2, len(self.client.connections))
+        conn = self.client.connections[0]
+        self.assertIsNotNone(conn.find_request(sub_1))
+        self.assertIsNotNone(conn.find_request(sub_2))
+        self.assertIsNone(conn.find_request(sub_3))
+
+        socket = Socket()
+        conn.on_open(socket)
+        self.assertEqual(['BTC_USDT.Ticker', 'BTC_USDT.Trade'], [m['channel'] for m in socket.sent])
+
+        conn.on_message(json.dumps({'channel': 'BTC_USDT.Trade', 'data': [[100.5, 1, 1, 1629450718]]}))
+        conn.on_message(json.dumps({'channel': 'BTC_USDT.Ticker', 'data': [1, 2, 0.5, 1.5, 10, 0.1, 1629450718]}))
+        self.assertEqual('BTC_USDT.Trade', events[0].channel)
+        self.assertEqual(100.5, events[0].data[0].price)
+        self.assertEqual(1.5, events[1].data.close)
+
+    def test_resubscribe_and_unsubscribe(self):
+        self.client.subscribe_ticker_event('btc_usdt', print)
+        self.client.subscribe_trade_event('btc_usdt', print)
+        conn = self.client.connections[0]
+        conn.on_open(Socket())
+
+        socket = Socket()
+        conn.state = ConnectionState.IDLE
+        conn.on_open(socket)
+        self.assertEqual(2, len(socket.sent))
+
+        self.client.unsubscribe_event(channel='BTC_USDT.Trade')
+        self.assertEqual({'action': 'unsubscribe', 'channel': 'BTC_USDT.Trade'}, socket.sent[-1])
+        self.assertEqual(['BTC_USDT.Ticker'], list(conn.requests))
+
+    def test_same_channel_subscriptions(self):
+        first, second = [], []
+        sub_1 = self.client.subscribe_ticker_event('btc_usdt', first.append)
+        sub_2 = self.client.subscribe_ticker_event('btc_usdt', second.append)
+        self.assertNotEqual(sub_1, sub_2)
+        self.assertEqual(1, len(self.client.connections))
+
+        conn = self.client.connections[0]
+        socket = Socket()
+        conn.on_open(socket)
+        self.assertEqual(1, len(socket.sent))
+
+        conn.on_message(json.dumps({'channel': 'BTC_USDT.Ticker', 'data': [1, 2, 0.5, 1.5, 10, 0.1, 1629450718]}))
+        self.assertEqual(1, len(first))
+        self.assertEqual(1, len(second))
+
+        # only the first subscription goes, the channel stays subscribed for the second
+        self.client.unsubscribe_event(conn_id=sub_1)
+        self.assertEqual(1, len(socket.sent))
+        conn.on_message(json.dumps({'channel': 'BTC_USDT.Ticker', 'data': [1, 2, 0.5, 2.5, 10, 0.1, 1629450718]}))
+        self.assertEqual(1, len(first))
+        self.assertEqual(2.5, second[-1].data.close)
+
+        self.client.unsubscribe_event(conn_id=sub_2)
+        self.assertEqual({'action': 'unsubscribe', 'channel': 'BTC_USDT.Ticker'}, socket.sent[-1])
+        self.assertEqual([], self.client.connections)
+
+    def test_unsubscribe_one_subscription_of_a_connection(self):
+        ticker = self.client.subscribe_ticker_event('btc_usdt', print)
+        self.client.subscribe_trade_event('btc_usdt', print)
+        conn = self.client.connections[0]
+        socket = Socket()
+        conn.on_open(socket)
+
+        self.client.unsubscribe_event(conn_id=ticker)
+        self.assertEqual({'action': 'unsubscribe', 'channel': 'BTC_USDT.Ticker'}, socket.sent[-1])
+        self.assertEqual(['BTC_USDT.Trade'], list(conn.requests))
+        self.assertEqual([conn], self.client.connections)
+
+        # the id of the connection itself still closes it with all its channels
+        self.client.unsubscribe_event(conn_id=conn.id)
+        self.assertEqual([], self.client.connections)
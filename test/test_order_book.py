@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from unittest import TestCase
+
+import zb
+from zb.model.market import Depth
+from zb.order_book import OrderBook
+
+from test.helpers import patch_connections
+
+
+class _MarketApi(object):
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_depth(self, symbol, size=5):
+        self.release.wait(5)
+        return Depth(asks=[['101', '1'], ['102', '2']], bids=[['100', '1'], ['99', '3']], time=100)
+
+
+class TestOrderBook(TestCase):
+    def setUp(self):
+        self.book = OrderBook('btc_usdt')
+        self.book.apply({'channel': 'BTC_USDT.Depth', 'type': 'Whole',
+                         'data': {'asks': [['101', '1'], ['102', '2'], ['103', '3']],
+                                  'bids': [['100', '1'], ['99', '2'], ['98', '3']], 'time': 100}})
+
+    def test_snapshot(self):
+        self.assertTrue(self.book.is_synced)
+        self.assertEqual((101.0, 1.0), self.book.best_ask())
+        self.assertEqual((100.0, 1.0), self.book.best_bid())
+        self.assertEqual(1.0, self.book.spread())
+        self.assertEqual(([(101.0, 1.0), (102.0, 2.0)], [(100.0, 1.0), (99.0, 2.0)]), self.book.top(2))
+
+    def test_update(self):
+        self.book.apply({'channel': 'BTC_USDT.Depth',
+                         'data': {'asks': [['101', '0'], ['101.5', '4']], 'bids': [['99.5', '1']], 'time': 101}})
+        self.assertEqual((101.5, 4.0), self.book.best_ask())
+        self.assertEqual([(100.0, 1.0), (99.5, 1.0), (99.0, 2.0)], self.book.bids.top(3))
+        self.assertEqual(3, len(self.book.asks))
+
+    def test_vwap(self):
+        self.assertAlmostEqual((101 * 1 + 102 * 2) / 3.0, self.book.vwap(3))
+        self.assertAlmostEqual((100 * 1 + 99 * 1) / 2.0, self.book.vwap(2, is_buy=False))
+        self.assertIsNone(self.book.vwap(100))
+
+    def test_out_of_sync(self):
+        self.book.apply({'channel': 'BTC_USDT.Depth', 'data': {'asks': [['101', '1']], 'time': 99}})
+        self.assertEqual(1, self.book.dropped_count)
+
+        self.book.apply({'channel': 'BTC_USDT.Depth', 'data': {'bids': [['101', '1']], 'time': 102}})
+        self.assertTrue(self.book.is_crossed())
+        self.assertTrue(self.book.needs_resync())
+
+        self.book.seed(_MarketApi())
+        self.assertFalse(self.book.needs_resync())
+        self.assertEqual(1, self.book.resync_count)
+        self.assertEqual((100.0, 1.0), self.book.best_bid())
+
+
+class TestOrderBookSubscription(TestCase):
+    def setUp(self):
+        patch_connections(self)
+
+    def test_book_and_depth_events_on_one_channel(self):
+        client = zb.MarketClient()
+        books, events = [], []
+        client.subscribe_order_book('btc_usdt', books.append)
+        client.subscribe_depth_event('btc_usdt', events.append)
+
+        client.connections[0].on_message(json.dumps({
+            'channel': 'BTC_USDT.Depth', 'type': 'Whole',
+            'data': {'asks': [['101', '1']], 'bids': [['100', '1']], 'time': 100}}))
+        self.assertEqual((101.0, 1.0), books[0].best_ask())
+        self.assertEqual(101.0, events[0].asks[0].price)
+
+    def test_seed_off_the_reader_thread(self):
+        client = zb.MarketClient()
+        market_api = _MarketApi()
+        market_api.release.clear()
+        books = []
+        client.subscribe_order_book('btc_usdt', books.append, market_api=market_api)
+
+        # the snapshot is loading, the updates are buffered instead of blocking the connection
+        connection = client.connections[0]
+        connection.on_message(json.dumps({'channel': 'BTC_USDT.Depth', 'data': {'asks': [['101', '5']], 'time': 99}}))
+        connection.on_message(json.dumps({'channel': 'BTC_USDT.Depth', 'data': {'bids': [['99', '0']], 'time': 101}}))
+        book = books[-1]
+        self.assertFalse(book.is_synced)
+        self.assertIsNone(book.best_ask())
+
+        market_api.release.set()
+        deadline = time.monotonic() + 5
+        while not book.is_synced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # the update older than the snapshot is dropped, the newer one applied on top of it
+        with book.lock:
+            self.assertTrue(book.is_synced)
+            self.assertEqual((101.0, 1.0), book.best_ask())
+            self.assertEqual([(100.0, 1.0)], book.bids.top(5))
+            self.assertEqual(1, book.dropped_count)
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from unittest import TestCase
+
+import zb
+from zb.client import ApiClient
+from zb.rate_limiter import RateLimiter, TokenBucket
+
+
+class TestRateLimiter(TestCase):
+    def test_bucket(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        for _ in range(5):
+            self.assertEqual(0, bucket.reserve())
+        self.assertAlmostEqual(0.02, bucket.reserve(), delta=0.005)
+        self.assertAlmostEqual(0.04, bucket.reserve(), delta=0.005)
+
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreater(time.monotonic() - start, 0.04)
+
+    def test_bucket_async(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+
+        async def run():
+            await asyncio.gather(*[bucket.acquire_async() for _ in range(5)])
+
+        start = time.monotonic()
+        asyncio.run(run())
+        self.assertGreater(time.monotonic() - start, 0.035)
+
+    def test_endpoint_group(self):
+        self.assertEqual('public', RateLimiter.endpoint_group('public', '/api/public/v1/depth'))
+        self.assertEqual('trade', RateLimiter.endpoint_group('private', '/Server/api/v2/trade/order'))
+        self.assertEqual('fund', RateLimiter.endpoint_group('private', ' /Server/api/v2/Fund/getAccount'))
+
+    def test_shared_budget(self):
+        limiter = RateLimiter()
+        trade_api = zb.TradeApi('key', 'secret', rate_limiter=limiter)
+        account_api = zb.AccountApi('key', 'secret', rate_limiter=limiter)
+        other_api = zb.TradeApi('other', 'secret', rate_limiter=limiter)
+
+        bucket = trade_api.rate_bucket('/Server/api/v2/trade/order', 'private')
+        self.assertIs(bucket, account_api.rate_bucket('/Server/api/v2/trade/getOrder', 'private'))
+        self.assertIsNot(bucket, account_api.rate_bucket('/Server/api/v2/Fund/getAccount', 'private'))
+        self.assertIsNot(bucket, other_api.rate_bucket('/Server/api/v2/trade/order', 'private'))
+
+    def test_legacy_rate_limit(self):
+        with self.assertWarns(DeprecationWarning):
+            client = ApiClient(config={'rate_limit': 500, 'rate_limits': {'trade': {'rate': 20}},
+                                       'rate_limiter': RateLimiter()})
+        self.assertEqual({'rate': 2.0, 'capacity': 1}, client.rate_limits['default'])
+        self.assertEqual(2.0, client.rate_bucket('/Server/api/v2/config/marketList').rate)
+        self.assertEqual(20, client.rate_bucket('/Server/api/v2/trade/order', 'private').rate)
+        self.assertFalse(hasattr(client, 'rate_limit'))
@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+import zb
+from zb.recorder import FrameRecorder, FrameReplay, read_frames
+
+from test.helpers import patch_connections
+
+
+def _ticker(symbol, close):
+    return json.dumps({'channel': symbol + '.Ticker', 'data': [1, 2, 0.5, close, 10, 0.1, 1629450718]})
+
+
+class TestRecorder(TestCase):
+    def setUp(self):
+        patch_connections(self)
+        self.path = os.path.join(tempfile.mkdtemp(), 'session.rec.gz')
+
+    def _client(self, recorder=None, **kwargs):
+        events = []
+        client = zb.MarketClient(recorder=recorder, **kwargs)
+        client.subscribe_ticker_event('btc_usdt', events.append)
+        client.subscribe_ticker_event('eth_usdt', events.append)
+        return client, events
+
+    def test_record_and_replay(self):
+        with FrameRecorder(self.path) as recorder:
+            client, events = self._client(recorder)
+            conn = client.connections[0]
+            conn.on_message(_ticker('BTC_USDT', 1.5))
+            conn.on_message(gzip.compress(_ticker('ETH_USDT', 2.5).encode('utf-8')))
+        with FrameRecorder(self.path) as recorder:
+            recorder.record(_ticker('BTC_USDT', 3.5))
+
+        frames = list(read_frames(self.path))
+        self.assertEqual(3, len(frames))
+        self.assertIsInstance(frames[0][1], str)
+        self.assertIsInstance(frames[1][1], bytes)
+        self.assertLessEqual(frames[0][0], frames[1][0])
+
+        replayed, replayed_events = self._client(max_channels_per_connection=1)
+        self.assertEqual(2, len(replayed.connections))
+        self.assertEqual(3, FrameReplay(self.path).replay(replayed))
+        self.assertEqual([1.5, 2.5], [e.data.close for e in events])
+        self.assertEqual([1.5, 2.5, 3.5], [e.data.close for e in replayed_events])
+        self.assertEqual(['BTC_USDT.Ticker', 'ETH_USDT.Ticker', 'BTC_USDT.Ticker'], [e.channel for e in replayed_events])
+
+    def test_unclosed_recording(self):
+        with FrameRecorder(self.path) as recorder:
+            recorder.record(_ticker('BTC_USDT', 1.5))
+
+        # a session that crashed before closing its recorder
+        recorder = FrameRecorder(self.path)
+        self.addCleanup(recorder.close)
+        for close in (2.5, 3.5):
+            recorder.record(_ticker('BTC_USDT', close), timestamp=int(close * 1e9))
+        recorder.flush()
+        self.assertEqual(3, len(list(read_frames(self.path))))
+
+        # cut within the last frame
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(self.path, 'wb') as f:
+            f.write(data[:-8])
+        self.assertEqual(2, len(list(read_frames(self.path))))
+
+        client, events = self._client()
+        self.assertEqual(2, FrameReplay(self.path).replay(client.connections[0]))
+        self.assertEqual([1.5, 2.5], [e.data.close for e in events])
+
+    def test_sessions_after_a_crash(self):
+        def crashed_session(cut):
+            recorder = FrameRecorder(self.path)
+            for close in (2.5, 3.5):
+                recorder.record(_ticker('BTC_USDT', close), timestamp=int(close * 1e9))
+            recorder.flush()
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            recorder.close()
+            # the file as the crash left it, without the end of the member
+            with open(self.path, 'wb') as f:
+                f.write(data[:len(data) - cut])
+
+        for cut, closes in ((0, [1.5, 2.5, 3.5, 4.5]), (8, [1.5, 2.5, 4.5])):
+            with FrameRecorder(self.path) as recorder:
+                recorder.record(_ticker('BTC_USDT', 1.5))
+            crashed_session(cut)
+            with FrameRecorder(self.path) as recorder:
+                recorder.record(_ticker('BTC_USDT', 4.5))
+
+            client, events = self._client()
+            self.assertEqual(len(closes), FrameReplay(self.path).replay(client.connections[0]))
+            self.assertEqual(closes, [e.data.close for e in events])
+            os.remove(self.path)
+
+    def test_pace(self):
+        with FrameRecorder(self.path) as recorder:
+            recorder.record(_ticker('BTC_USDT', 1.5), timestamp=0)
+            recorder.record(_ticker('BTC_USDT', 2.5), timestamp=200000000)
+
+        client, events = self._client()
+        start = time.perf_counter()
+        FrameReplay(self.path, speed=2).replay(client.connections[0])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(2, len(events))
@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+import zb
+from zb.client import RequestTemplate
+from zb.model.constant import FuturesAccountType
+
+
+class TestRequestTemplate(TestCase):
+    def test_is_qc(self):
+        self.assertTrue(RequestTemplate.is_qc({'futuresAccountType': FuturesAccountType.BASE_QC.value}))
+        self.assertTrue(RequestTemplate.is_qc({'futuresAccountType': '2'}))
+        self.assertTrue(RequestTemplate.is_qc({'symbol': 'btc_qc'}))
+        self.assertTrue(RequestTemplate.is_qc({'futuresAccountType': 1, 'symbol': 'BTC_QC'}))
+        self.assertFalse(RequestTemplate.is_qc({'futuresAccountType': 1, 'symbol': 'BTC_USDT'}))
+        self.assertFalse(RequestTemplate.is_qc({'futuresAccountType': '', 'symbol': None}))
+        self.assertFalse(RequestTemplate.is_qc({}))
+
+    def test_generated_methods_share_templates(self):
+        template = zb.TradeApi('api-key', 'secret-key').private_post_create_order.template
+        self.assertIs(template, RequestTemplate.of('/Server/api/v2/trade/order', 'private', 'POST'))
+        self.assertIs(template, zb.TradeApi('api-key', 'secret-key').private_post_create_order.template)
+        self.assertEqual(('/Server/api/v2/trade/order', '/qc/Server/api/v2/trade/order'), template.paths)
+        self.assertTrue(template.private and template.has_body and not template.formatted)
+
+    def test_prepare_request(self):
+        api = zb.TradeApi('api-key', 'secret-key', api_host='http://localhost')
+        url, headers, body = api.prepare_request('/Server/api/v2/trade/order', 'private', 'POST',
+                                                 {'symbol': 'BTC_QC', 'amount': 1})
+        self.assertEqual('http://localhost/qc/Server/api/v2/trade/order', url)
+        self.assertEqual('application/json; charset=UTF-8', headers['Content-Type'])
+        self.assertIn('ZB-SIGN', headers)
+        self.assertEqual({'symbol': 'BTC_QC', 'amount': 1}, zb.json_codec.loads(body))
+
+        url, headers, body = api.prepare_request('/api/public/v1/depth', 'public', 'GET', {'symbol': 'BTC_USDT'})
+        self.assertEqual(('http://localhost/api/public/v1/depth', None, None), (url, headers, body))
+
+        template = RequestTemplate('/Server/api/v2/{kind}/order', 'public', 'POST')
+        url, headers, body = api.prepare_request(template.path, template.api, template.method, {'kind': 'trade'},
+                                                 template=template)
+        self.assertEqual('http://localhost/Server/api/v2/trade/order', url)
+        self.assertIsNot(RequestTemplate.JSON_HEADERS, headers)
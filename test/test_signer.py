@@ -0,0 +1,49 @@
+import base64
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from zb.client import ApiClient
+from zb.signer import HmacSigner, TimestampFormatter, canonical_params
+
+
+def reference_sign(timestamp, method, path, params, secret_key):
+    key = hashlib.sha1(secret_key.encode('utf-8')).hexdigest().encode('utf-8')
+    keys = sorted(params or {})
+    param_str = '&'.join([k + '=' + str(params[k]) for k in keys if params[k] is not None and params[k] != ''])
+    content = timestamp + method + path + param_str
+    return str(base64.b64encode(hmac.new(key, content.encode('utf-8'), digestmod=hashlib.sha256).digest()), 'utf-8')
+
+
+class TestSigner(TestCase):
+    secret_key = 'd67355ca-3e20-41fc-8e14-bfdf506f72fc'
+    params = {'symbol': 'BTC_USDT', 'side': 1, 'amount': 0.01, 'price': 41000.5, 'clientOrderId': None, 'extend': '',
+              'reduceOnly': False}
+
+    def test_sign(self):
+        signer = HmacSigner(self.secret_key)
+        for params in (self.params, None, {}):
+            expected = reference_sign('2022-01-01T00:00:00.000Z', 'POST', '/Server/api/v2/trade/order', params,
+                                      self.secret_key)
+            self.assertEqual(expected, signer.sign('2022-01-01T00:00:00.000Z', 'POST', '/Server/api/v2/trade/order',
+                                                   params))
+        # the prepared state is not consumed by a signature
+        self.assertEqual(signer.sign('t', 'GET', '/p'), signer.sign('t', 'GET', '/p'))
+
+        hashed = hashlib.sha1(self.secret_key.encode('utf-8')).hexdigest()
+        self.assertEqual(signer.sign('t', 'GET', '/p', self.params),
+                         ApiClient.generate_sign('t', 'GET', '/p', self.params, hashed))
+
+    def test_canonical_params(self):
+        self.assertEqual('amount=0.01&price=41000.5&reduceOnly=False&side=1&symbol=BTC_USDT',
+                         canonical_params(self.params))
+        self.assertEqual('', canonical_params(None))
+
+    def test_timestamp(self):
+        formatter = TimestampFormatter()
+        for ms in (1640995200000, 1640995200007, 1640995200999, 1640995201050, 0):
+            expected = datetime.fromtimestamp(ms / 1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.') + \
+                '%03dZ' % (ms % 1000)
+            self.assertEqual(expected, formatter.format(ms))
+        self.assertRegex(formatter.format(), r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$')
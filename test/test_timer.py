@@ -0,0 +1,82 @@
+import threading
+import time
+from unittest import TestCase
+
+from zb.model.constant import ConnectionState
+from zb.timer import TimerScheduler
+from zb.utils import Utils
+from zb.websocket_watch_dog import WebSocketWatchDog
+
+
+class _Connection(object):
+    id = 1
+
+    def __init__(self):
+        self.state = ConnectionState.CONNECTED
+        self.last_receive_time = Utils.milliseconds()
+        self.delay_in_second = -1
+        self.sent = []
+        self.connected = threading.Event()
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def in_delay_connection(self):
+        return self.delay_in_second != -1
+
+    def re_connect_in_delay(self, delay_in_second):
+        self.delay_in_second = delay_in_second
+
+    def connect(self):
+        self.connected.set()
+
+
+class TestTimerScheduler(TestCase):
+    def test_order_and_cancel(self):
+        scheduler = TimerScheduler()
+        fired = []
+        done = threading.Event()
+        scheduler.call_later(0.06, lambda: (fired.append(3), done.set()))
+        scheduler.call_later(0.02, lambda: fired.append(1))
+        timer = scheduler.call_later(0.04, lambda: fired.append(2))
+        timer.cancel()
+
+        self.assertTrue(done.wait(1))
+        self.assertEqual([1, 3], fired)
+        self.assertEqual(0, len(scheduler))
+
+    def test_cancelled_timers_dropped(self):
+        scheduler = TimerScheduler()
+        done = threading.Event()
+        timers = [scheduler.call_later(60, done.set) for _ in range(1000)]
+        scheduler.call_later(0.02, lambda: done.set())
+        for timer in timers[:600]:
+            timer.cancel()
+        # the cancelled timers do not wait for their deadline in the heap
+        self.assertLessEqual(len(scheduler), 500)
+        self.assertTrue(done.wait(1))
+        for timer in timers[600:]:
+            timer.cancel()
+        self.assertEqual(0, len(scheduler))
+
+    def test_watch_dog(self):
+        watch_dog = WebSocketWatchDog(receive_limit_ms=50, connection_delay_failure=0.05, scheduler=TimerScheduler())
+        watch_dog.ping_interval = 0.02
+        connection = _Connection()
+        watch_dog.on_connection_created(connection)
+
+        time.sleep(0.03)
+        self.assertIn('{"action":"ping"}', connection.sent)
+
+        self.assertTrue(connection.connected.wait(1))
+        self.assertEqual(ConnectionState.IDLE, connection.state)
+        self.assertEqual(0, watch_dog.connection_count())
+
+    def test_closed(self):
+        watch_dog = WebSocketWatchDog(receive_limit_ms=20, scheduler=TimerScheduler())
+        connection = _Connection()
+        watch_dog.on_connection_created(connection)
+        watch_dog.on_connection_closed(connection)
+        time.sleep(0.05)
+        self.assertEqual(-1, connection.delay_in_second)
+        self.assertEqual(0, watch_dog.connection_count())
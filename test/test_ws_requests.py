@@ -0,0 +1,118 @@
+import json
+from unittest import TestCase
+
+import zb
+from zb.errors import RequestTimeout, SubscribeException
+from zb.model.constant import FuturesAccountType, OrderSide
+
+from test.helpers import patch_connections, Socket
+
+
+class TestWsRequests(TestCase):
+    def setUp(self):
+        patch_connections(self)
+        self.client = zb.WsAccountClient('key', 'secret', request_timeout_ms=200)
+        self.login = self.client.login(wait=False)
+        self.conn = self.client.connection_map[FuturesAccountType.BASE_USDT]
+        self.socket = Socket()
+        self.conn.on_open(self.socket)
+        self.respond(channel='login', data='success')
+
+    def respond(self, **message):
+        self.conn.on_message(json.dumps(message))
+
+    def test_login_queue(self):
+        self.assertIsNotNone(self.client.login_latency_ms())
+        self.client.connection_map.clear()
+
+        request = self.client.get_order(None, 'BTC_USDT', order_id=1)
+        conn = self.client.connection_map[FuturesAccountType.BASE_USDT]
+        self.assertIsNot(self.conn, conn)
+        socket = Socket()
+        conn.on_open(socket)
+        self.assertEqual(['login'], [m['channel'] for m in socket.sent])
+
+        conn.on_message(json.dumps({'channel': 'login', 'data': 'success'}))
+        self.assertEqual(['login', 'Trade.getOrder'], [m['channel'] for m in socket.sent])
+        self.assertEqual(request.request_id, socket.sent[1]['id'])
+        self.assertTrue(self.client.login_map[FuturesAccountType.BASE_USDT].done())
+
+    def test_login_failed(self):
+        self.client.connection_map.clear()
+        request = self.client.get_order(None, 'BTC_USDT', order_id=1)
+        conn = self.client.connection_map[FuturesAccountType.BASE_USDT]
+        conn.on_open(Socket())
+        conn.on_message(json.dumps({'channel': 'login', 'errorCode': '10014', 'errorMsg': 'invalid sign'}))
+        self.assertRaises(SubscribeException, self.client.login_map[FuturesAccountType.BASE_USDT].result, 1)
+        self.assertRaises(SubscribeException, request.result, 1)
+
+    def test_login_timeout(self):
+        self.client.connection_map.clear()
+        request = self.client.get_order(None, 'BTC_USDT', order_id=1)
+        conn = self.client.connection_map[FuturesAccountType.BASE_USDT]
+        socket = Socket()
+        conn.on_open(socket)
+
+        self.assertRaises(RequestTimeout, self.client.login_map[FuturesAccountType.BASE_USDT].result, 1)
+        self.assertRaises(RequestTimeout, request.result, 1)
+        self.assertEqual(['login'], [m['channel'] for m in socket.sent])
+        self.assertNotIn(FuturesAccountType.BASE_USDT, self.client.connection_map)
+        self.assertNotIn(conn, self.client.connections)
+
+        # the next request logs in again on a new connection
+        request = self.client.get_order(None, 'BTC_USDT', order_id=2)
+        conn = self.client.connection_map[FuturesAccountType.BASE_USDT]
+        socket = Socket()
+        conn.on_open(socket)
+        conn.on_message(json.dumps({'channel': 'login', 'data': 'success'}))
+        self.assertEqual(['login', 'Trade.getOrder'], [m['channel'] for m in socket.sent])
+        conn.on_message(json.dumps({'channel': 'Trade.getOrder', 'id': request.request_id, 'data': '2'}))
+        self.assertEqual('2', request.result(1).data)
+
+    def test_login_wait_timeout(self):
+        self.client.pending.timeout_ms = 50
+        self.assertRaises(RequestTimeout, self.client.login, FuturesAccountType.BASE_QC)
+        self.assertNotIn(FuturesAccountType.BASE_QC, self.client.connection_map)
+
+    def test_correlation(self):
+        first, second = [], []
+        request_1 = self.client.order(first.append, 'BTC_USDT', OrderSide.SIDE_OPEN_LONG, 1, 100)
+        request_2 = self.client.order(second.append, 'BTC_USDT', OrderSide.SIDE_OPEN_LONG, 2, 100)
+        self.assertEqual([request_1.request_id, request_2.request_id], [m.get('id') for m in self.socket.sent[1:]])
+
+        self.respond(channel='Trade.order', id=request_2.request_id, data='2')
+        self.respond(channel='Trade.order', id=request_1.request_id, data='1')
+        self.assertEqual('1', request_1.result(1).data)
+        self.assertEqual('2', request_2.result(1).data)
+        self.assertEqual(['1'], [e.data for e in first])
+        self.assertEqual(['2'], [e.data for e in second])
+        self.assertIsNotNone(request_1.latency_ms)
+
+    def test_fifo_without_id(self):
+        request_1 = self.client.get_order(None, 'BTC_USDT', order_id=1)
+        request_2 = self.client.get_order(None, 'BTC_USDT', order_id=2)
+        self.respond(channel='Trade.getOrder', data='1')
+        self.assertEqual('1', request_1.result(1).data)
+        self.assertFalse(request_2.done())
+
+        self.respond(channel='Trade.getOrder', errorCode='10001', errorMsg='failed')
+        self.assertRaises(SubscribeException, request_2.result, 1)
+
+    def test_timeout_and_push(self):
+        request = self.client.cancel_order(None, 'BTC_USDT', order_id=1)
+        self.assertIsNone(self.client.subscribe_order_change(print, 'BTC_USDT'))
+        request.sent_time -= 250
+        self.client.pending.expire()
+        self.assertRaises(RequestTimeout, request.result, 0)
+        self.assertEqual(0, len(self.client.pending))
+
+    def test_single_request_timeout(self):
+        errors = []
+        request = self.client.cancel_order(None, 'BTC_USDT', order_id=1, error_handler=errors.append)
+        self.assertRaises(RequestTimeout, request.result, 1)
+        self.assertEqual([RequestTimeout], [type(error) for error in errors])
+        self.assertEqual(0, len(self.client.pending))
+
+        # a late response is not dispatched to the expired request
+        self.respond(channel='Trade.cancelOrder', id=request.request_id, data='1')
+        self.assertEqual(1, len(errors))
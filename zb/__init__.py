@@ -9,6 +9,12 @@ from zb.market_api import MarketApi
 from zb.trade_api import TradeApi
 from zb.subscription_client import MarketClient
 from zb.subscription_client import WsAccountClient
+from zb.async_client import AsyncApiClient
+from zb.async_market_api import AsyncMarketApi
+from zb.async_trade_api import AsyncTradeApi
+from zb.async_account_api import AsyncAccountApi
+from zb.async_subscription_client import AsyncMarketClient
+from zb.async_subscription_client import AsyncWsAccountClient
 
 __all__ = [
     'AccountApi',
@@ -17,4 +23,10 @@ __all__ = [
     'TradeApi',
     'MarketClient',
     'WsAccountClient',
+    'AsyncApiClient',
+    'AsyncMarketApi',
+    'AsyncTradeApi',
+    'AsyncAccountApi',
+    'AsyncMarketClient',
+    'AsyncWsAccountClient',
 ]
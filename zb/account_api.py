@@ -1,41 +1,53 @@
 from typing import List
 
-from zb.client import ApiClient
+from zb.client import ApiClient, api_method
 from zb.model.account import *
 from zb.model.constant import *
 
 
 class AccountApi(ApiClient):
-    def __init__(self, api_key, secret_key, api_host=None):
-        describe = {
-            'apis': {
-                'private': {
-                    'get': {
-                        'account': '/Server/api/v2/Fund/getAccount',
-                        'positions': '/Server/api/v2/Positions/getPositions',
-                        'margin_info': '/Server/api/v2/Positions/marginInfo',
-                        'nominal_value': '/Server/api/v2/Positions/getNominalValue',
-                        'bill': '/Server/api/v2/Fund/getBill',
-                        'bill_type_list': '/Server/api/v2/Fund/getBillTypeList',
-                        'margin_history': '/Server/api/v2/Fund/marginHistory',
-                        'setting': ' /Server/api/v2/setting/get',
-                        'balance': '/Server/api/v2/Fund/balance',
-                    },
-                    'post': {
-                        'update_margin': '/Server/api/v2/Positions/updateMargin',
-                        'set_leverage': '/Server/api/v2/setting/setLeverage',
-                        'set_positions_mode': ' /Server/api/v2/setting/setPositionsMode',
-                        'set_margin_mode': ' /Server/api/v2/setting/setMarginMode',
-                        'update_append_usd_value': ' /Server/api/v2/Positions/updateAppendUSDValue',
-                        'set_margin_coins': ' /Server/api/v2/Positions/setMarginCoins',
-
-                    },
+    describe = {
+        'apis': {
+            'private': {
+                'get': {
+                    'account': '/Server/api/v2/Fund/getAccount',
+                    'positions': '/Server/api/v2/Positions/getPositions',
+                    'margin_info': '/Server/api/v2/Positions/marginInfo',
+                    'nominal_value': '/Server/api/v2/Positions/getNominalValue',
+                    'bill': '/Server/api/v2/Fund/getBill',
+                    'bill_type_list': '/Server/api/v2/Fund/getBillTypeList',
+                    'margin_history': '/Server/api/v2/Fund/marginHistory',
+                    'setting': ' /Server/api/v2/setting/get',
+                    'balance': '/Server/api/v2/Fund/balance',
                 },
-            }
-        }
-
-        super().__init__(api_key, secret_key, api_host, describe)
+                'post': {
+                    'update_margin': '/Server/api/v2/Positions/updateMargin',
+                    'set_leverage': '/Server/api/v2/setting/setLeverage',
+                    'set_positions_mode': ' /Server/api/v2/setting/setPositionsMode',
+                    'set_margin_mode': ' /Server/api/v2/setting/setMarginMode',
+                    'update_append_usd_value': ' /Server/api/v2/Positions/updateAppendUSDValue',
+                    'set_margin_coins': ' /Server/api/v2/Positions/setMarginCoins',
 
+                },
+            },
+        }
+    }
+
+    def __init__(self, api_key, secret_key, api_host=None, session_pool=None, rate_limiter=None, instrumentation=None,
+                 clock_sync=None):
+        config = dict(self.describe)
+        if session_pool is not None:
+            config['session_pool'] = session_pool
+        if rate_limiter is not None:
+            config['rate_limiter'] = rate_limiter
+        if instrumentation is not None:
+            config['instrumentation'] = instrumentation
+        if clock_sync is not None:
+            config['clock_sync'] = clock_sync
+
+        super().__init__(api_key, secret_key, api_host, config)
+
+    @api_method
     def get_account(self, convert_unit='usd', futures_account_type=FuturesAccountType.BASE_USDT) -> Account:
         """
         合约账户信息
@@ -47,12 +59,12 @@ class AccountApi(ApiClient):
             'convertUnit': convert_unit,
             'futuresAccountType': futures_account_type.value
         }
-        account = self.private_get_account(params)
-        print(account)
+        account = yield self.private_get_account(params)
         return Account(**account)
 
     PositionsList = List[Positions]
 
+    @api_method
     def get_positions(self, symbol: str, side=None, futures_account_type=FuturesAccountType.BASE_USDT) -> PositionsList:
         """
         所有合约仓位/单个合约仓位(marketId+side过滤)
@@ -68,10 +80,11 @@ class AccountApi(ApiClient):
         if side:
             params['side'] = side
 
-        positions = self.private_get_positions(params)
+        positions = yield self.private_get_positions(params)
 
         return [Positions(**position) for position in positions]
 
+    @api_method
     def get_margin_info(self, position_id: int, futures_account_type=FuturesAccountType.BASE_USDT) -> MarginInfo:
         """
         4.3 保证金信息查询（最大保证金增加数量，最大保证金提取数量，预计强平价格）
@@ -85,9 +98,10 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value
         }
 
-        result = self.private_get_margin_info(params)
+        result = yield self.private_get_margin_info(params)
         return MarginInfo(**result)
 
+    @api_method
     def set_leverage(self, symbol: str, leverage: int, futures_account_type=FuturesAccountType.BASE_USDT) -> PositionsSettingResult:
         """
         4.5 仓位杠杆设置
@@ -102,10 +116,11 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value
         }
 
-        result = self.private_post_set_leverage(params)
+        result = yield self.private_post_set_leverage(params)
 
         return PositionsSettingResult(**result)
 
+    @api_method
     def set_positions_mode(self, symbol: str, positions_mode: PositionsMode, futures_account_type=FuturesAccountType.BASE_USDT) -> PositionsSettingResult:
         """
         4.6 仓位持仓模式设置
@@ -121,10 +136,11 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value
         }
 
-        result = self.private_post_set_positions_mode(params)
+        result = yield self.private_post_set_positions_mode(params)
 
         return PositionsSettingResult(**result)
 
+    @api_method
     def set_margin_mode(self, symbol: str, margin_mode: MarginMode, futures_account_type=FuturesAccountType.BASE_USDT) -> PositionsSettingResult:
         """
         4.7 仓位保证金模式设置
@@ -140,10 +156,11 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value
         }
 
-        result = self.private_post_set_margin_mode(params)
+        result = yield self.private_post_set_margin_mode(params)
 
         return PositionsSettingResult(**result)
 
+    @api_method
     def get_nominal_value(self, symbol: str, side: int, futures_account_type=FuturesAccountType.BASE_USDT) -> NominalValueResult:
         """
         4.8 查看用户当前头寸.
@@ -160,12 +177,13 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value,
         }
 
-        result = self.private_get_nominal_value(params)
+        result = yield self.private_get_nominal_value(params)
 
         return NominalValueResult(**result)
 
     BillResultList = List[BillResult]
 
+    @api_method
     def get_bill(self, currency=None, bill_type=None, start_time=None, end_time=None,
                  futures_account_type=FuturesAccountType.BASE_USDT, page=1, size=10) -> BillResultList:
         """
@@ -195,10 +213,11 @@ class AccountApi(ApiClient):
         if end_time:
             params['endTime'] = end_time
 
-        data = self.private_get_bill(params)
+        data = yield self.private_get_bill(params)
 
         return [BillResult(**item) for item in data['list']]
 
+    @api_method
     def get_bill_type_list(self) -> List[BillTypeResult]:
         """
         4.10 查询账单类型信息list
@@ -206,10 +225,11 @@ class AccountApi(ApiClient):
         :return:  List[BillTypeResult]
         """
 
-        result = self.private_get_bill_type_list()
+        result = yield self.private_get_bill_type_list()
 
         return [BillTypeResult(**item) for item in result]
 
+    @api_method
     def get_margin_history(self, symbol: str, type=None, start_time=None, end_time=None, page=1, size=10) -> List[MarginHistoryResult]:
         """
         4.11 逐仓保证金变动历史
@@ -235,10 +255,11 @@ class AccountApi(ApiClient):
         if end_time:
             params['endTime'] = end_time
 
-        data = self.private_get_margin_history(params)
+        data = yield self.private_get_margin_history(params)
 
         return [MarginHistoryResult(**item) for item in data['list']]
 
+    @api_method
     def get_setting(self, symbol: str, futures_account_type=FuturesAccountType.BASE_USDT) -> PositionsSettingResult:
         """
         4.12 仓位配置信息查询
@@ -253,10 +274,11 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value,
         }
 
-        result = self.private_get_setting(params)
+        result = yield self.private_get_setting(params)
 
         return PositionsSettingResult(**result)
 
+    @api_method
     def get_balance(self, currency_name=None, futures_account_type=FuturesAccountType.BASE_USDT) -> List[BalanceResult]:
         """
         4.13 通过userid，currencyId查询资金
@@ -271,10 +293,11 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value,
         }
 
-        result = self.private_get_balance(params)
+        result = yield self.private_get_balance(params)
 
         return [BalanceResult(**item) for item in result]
 
+    @api_method
     def update_append_usd_value(self, position_id: int, max_additional_usd_value: float, futures_account_type=FuturesAccountType.BASE_USDT) -> str:
         """
         4.14 设置自动追加保证金
@@ -293,8 +316,9 @@ class AccountApi(ApiClient):
         if position_id:
             params['positionsId'] = position_id
 
-        return self.private_post_update_append_usd_value(params)
+        return (yield self.private_post_update_append_usd_value(params))
 
+    @api_method
     def set_margin_coins(self, symbol: str, margin_coins: str, futures_account_type=FuturesAccountType.BASE_USDT) -> PositionsSettingResult:
         """
         4.15 设置保证金使用顺序
@@ -312,6 +336,6 @@ class AccountApi(ApiClient):
             'futuresAccountType': futures_account_type.value,
         }
 
-        result = self.private_post_set_margin_coins(params)
+        result = yield self.private_post_set_margin_coins(params)
 
         return PositionsSettingResult(**result)
@@ -0,0 +1,12 @@
+"""
+Account Api, asyncio version
+"""
+from zb.account_api import AccountApi
+from zb.async_client import AsyncApiClient
+
+
+class AsyncAccountApi(AsyncApiClient, AccountApi):
+    """
+    The asyncio counterpart of AccountApi, every method returns a coroutine with the same arguments and result. The
+    methods are the api_methods of AccountApi, driven by AsyncApiClient.
+    """
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""zb asyncio client"""
+import asyncio
+import logging
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from zb import json_codec
+from zb.client import ApiClient, logger
+from zb.errors import *
+from zb.utils import Utils
+
+
+class AsyncSessionPool(object):
+    """
+    A keep-alive ``aiohttp.ClientSession`` shared by the asyncio rest clients, so hundreds of requests can be in flight
+    on one event loop over one pooled connection set. A session is bound to the loop that created it, so every running
+    loop gets its own, e.g. one per ``asyncio.run``.
+
+    :member
+        limit:              The maximum number of simultaneous connections, 0 for no limit.
+        limit_per_host:     The maximum number of simultaneous connections to the same host, 0 for no limit.
+        keepalive_timeout:  Close idle connections after this time, in milliseconds.
+    """
+    _default = None
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=60000):
+        if aiohttp is None:
+            raise NotSupported("The asyncio client requires aiohttp, run `pip install aiohttp`.")
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        # Key: event loop, Value: aiohttp.ClientSession
+        self._sessions = dict()
+
+    @classmethod
+    def default(cls):
+        """
+        The process wide pool used by every asyncio client that was not given one explicitly.
+        """
+        if cls._default is None:
+            cls._default = AsyncSessionPool()
+        return cls._default
+
+    def session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            # the sessions of the finished loops can not be used nor closed anymore
+            for finished in [other for other in self._sessions if other.is_closed()]:
+                del self._sessions[finished]
+            connector = aiohttp.TCPConnector(limit=self.limit,
+                                             limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout / 1000.0)
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """
+        Close the session of the running loop.
+        """
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+class _Response(object):
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers if headers is not None else {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json_codec.loads(self.content)
+
+
+class AsyncApiClient(ApiClient):
+    """
+    The asyncio counterpart of ApiClient. Every generated endpoint method returns a coroutine.
+    """
+
+    @staticmethod
+    def default_session_pool():
+        return AsyncSessionPool.default()
+
+    async def request(self, path, api='public', method="GET", params={}, headers=None, template=None):
+        if self.enable_rate_limit:
+            await self.throttle(path, api)
+
+        self.last_rest_request_Timestamp = Utils.milliseconds()
+
+        timings = {} if self.instrumentation is not None else None
+        url, headers, body = self.prepare_request(path, api, method, params, headers, timings, template)
+
+        response = None
+        try:
+            if self.verbose and logger.isEnabledFor(logging.DEBUG):
+                logger.debug('method: %s, url: %s, header: %s, request: %s', method, url, headers, params)
+
+            clock_sync = self.clock_sync
+            if clock_sync is not None:
+                sent = Utils.milliseconds()
+            if timings is not None:
+                start = time.perf_counter_ns()
+            session = self.session_pool.session()
+            timeout = aiohttp.ClientTimeout(total=self.timeout / 1000.0)
+            if method == "GET":
+                query = {k: v for k, v in params.items() if v is not None}
+                request = session.request(method, url, params=query, headers=headers, timeout=timeout)
+            else:
+                request = session.request(method, url, data=body, headers=headers, timeout=timeout)
+
+            async with request as resp:
+                response = _Response(resp.status, await resp.read(), resp.headers)
+            if timings is not None:
+                timings['network'] = time.perf_counter_ns() - start
+            if clock_sync is not None:
+                clock_sync.observe_response(sent, Utils.milliseconds(), response.headers.get('Date'))
+
+            if self.verbose:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('method: %s, url: %s, response: %s', method, url, response.text)
+            else:
+                self.handle_fail(response, method, url)
+
+            if timings is None:
+                return json_codec.loads(response.content)['data']
+
+            start = time.perf_counter_ns()
+            data = json_codec.loads(response.content)['data']
+            timings['parse'] = time.perf_counter_ns() - start
+            self.instrumentation.on_rest(api, method, path, timings, response.status_code)
+            return data
+
+        except asyncio.TimeoutError as e:
+            self.report_error(api, method, path, timings, response, e)
+            self.raise_error(RequestTimeout, method, url, e)
+        except ValueError as e:
+            self.report_error(api, method, path, timings, response, e)
+            self.raise_error(BadResponse, method, url, e, response.text if response else None)
+        except KeyError as e:
+            self.report_error(api, method, path, timings, response, e)
+            self.raise_error(BadResponse, method, url, e, response.text)
+        except ZbApiException as e:
+            self.report_error(api, method, path, timings, response, e)
+            raise
+
+    async def throttle(self, path='', api='public'):
+        await self.rate_bucket(path, api).acquire_async()
+
+    async def close(self):
+        await self.session_pool.close()
+
+    async def drive(self, calls):
+        """
+        Run the generator of an api_method, every call it yields is awaited and its result sent back.
+        """
+        result = None
+        try:
+            while True:
+                result = await calls.send(result)
+        except StopIteration as stop:
+            return stop.value
@@ -0,0 +1,12 @@
+"""
+Market Data Api, asyncio version
+"""
+from zb.async_client import AsyncApiClient
+from zb.market_api import MarketApi
+
+
+class AsyncMarketApi(AsyncApiClient, MarketApi):
+    """
+    The asyncio counterpart of MarketApi, every method returns a coroutine with the same arguments and result. The
+    methods are the api_methods of MarketApi, driven by AsyncApiClient.
+    """
@@ -0,0 +1,335 @@
+"""
+asyncio websocket engine, all connections of a client live on the running event loop
+"""
+import asyncio
+import logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from zb.errors import NetworkError, NotSupported, RequestTimeout
+from zb.model.constant import ConnectionState, FuturesAccountType
+from zb.pending_requests import PendingRequests
+from zb.subscription_client import MarketClient, WsAccountClient
+from zb.utils import Utils
+from zb.websocket_connection import WebsocketConnection
+
+
+class AsyncWebsocketConnection(WebsocketConnection):
+    """
+    A websocket connection driven by a task on the event loop instead of a thread. Liveness checks, pings and
+    reconnects are handled by the task itself, no watch dog is involved.
+    """
+
+    def __init__(self, client, url, request=None):
+        super().__init__(client._api_key, client._secret_key, url, None, request, recorder=client.recorder,
+                         instrumentation=client.instrumentation, clock_sync=client.clock_sync)
+        self.client = client
+        self.reconnect_count = 0
+        self._outgoing = asyncio.Queue()
+        self._connected = asyncio.Event()
+        self._closing = False
+        self._task = None
+        # The error of the last failed connect
+        self.error = None
+
+    def connect(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def wait_connected(self, timeout=None):
+        """
+        Wait until the socket is open.
+
+        :param timeout: In seconds, None to wait as long as the connection is retried.
+        :raise RequestTimeout: The socket did not open within the timeout.
+        :raise NetworkError: The connection gave up, it was closed or failed without auto reconnect.
+        """
+        if self._connected.is_set():
+            return
+        if self._task is None:
+            raise NetworkError("[Sub][%s] Not connecting" % self.id)
+        connected = asyncio.ensure_future(self._connected.wait())
+        try:
+            await asyncio.wait({connected, self._task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            connected.cancel()
+        if self._connected.is_set():
+            return
+        if self._task.done():
+            raise NetworkError("[Sub][%s] Failed to connect to %s: %s" % (self.id, self.url, self.error))
+        raise RequestTimeout("[Sub][%s] Not connected to %s within %ss" % (self.id, self.url, timeout))
+
+    def send(self, data):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("[Sub][%s] Send data to server: %s", self.id, data)
+        self._outgoing.put_nowait(data)
+
+    def on_open(self, ws):
+        self.logger.info("[Sub][%s] Connected to server", self.id)
+        self.ws = ws
+        self.last_receive_time = Utils.milliseconds()
+        # everything queued for the previous socket is superseded by the resubscription
+        while not self._outgoing.empty():
+            self._outgoing.get_nowait()
+        self._subscribe_all()
+        self._connected.set()
+
+    def on_close(self):
+        self._closing = True
+        if self._task is not None:
+            self._task.cancel()
+        self.logger.info("[Sub][%s] Closing normally", self.id)
+
+    async def close(self):
+        """
+        Unsubscribe every channel, flush the pending messages and close the socket.
+        """
+        for request in self._channel_requests():
+            if request.unsubscription_handler is not None and self.state == ConnectionState.CONNECTED:
+                request.unsubscription_handler(self)
+        self._closing = True
+        if self.ws is not None and not self.ws.closed:
+            while not self._outgoing.empty():
+                await self.ws.send_str(self._outgoing.get_nowait())
+            await self.ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                async with self.client.session().ws_connect(self.url, compress=15 if self.client.compress else 0) as ws:
+                    self.on_open(ws)
+                    writer = asyncio.ensure_future(self._write(ws))
+                    pinger = asyncio.ensure_future(self._ping())
+                    try:
+                        await self._read(ws)
+                    finally:
+                        writer.cancel()
+                        pinger.cancel()
+                self.state = ConnectionState.IDLE
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                self.state = ConnectionState.CLOSED_ON_ERROR
+                self.error = e
+                self.on_error("Unexpected error: " + str(e))
+
+            self._connected.clear()
+            if self._closing or not self.client.is_auto_connect:
+                break
+
+            self.reconnect_count += 1
+            if self.instrumentation is not None:
+                self.instrumentation.on_reconnect(self.url)
+            self.logger.warning("[Sub][%s] Reconnect in %ss", self.id, self.client.connection_delay_failure)
+            await asyncio.sleep(self.client.connection_delay_failure)
+
+    async def _read(self, ws):
+        while True:
+            try:
+                message = await ws.receive(timeout=self.client.receive_limit_ms / 1000.0)
+            except asyncio.TimeoutError:
+                self.logger.warning("[Sub][%s] No response from server", self.id)
+                return
+
+            if message.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                self.on_message(message.data)
+            elif message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED):
+                return
+            elif message.type == aiohttp.WSMsgType.ERROR:
+                self.on_error("Unexpected error: " + str(ws.exception()))
+                return
+
+    async def _write(self, ws):
+        while True:
+            data = await self._outgoing.get()
+            await ws.send_str(data)
+
+    async def _ping(self):
+        while True:
+            await asyncio.sleep(5)
+            self.send('{"action":"ping"}')
+
+
+class AsyncSubscriptionMixin(object):
+    """
+    Runs the subscriptions of a client on the asyncio engine: subscribe and unsubscribe are awaitable and the events
+    of a channel can be consumed with ``async for event in client.stream(channel)``.
+    """
+    supports_compress = True
+
+    def __init__(self, *args, **kwargs):
+        if aiohttp is None:
+            raise NotSupported("The asyncio websocket engine requires aiohttp, run `pip install aiohttp`.")
+
+        self._session = kwargs.pop('session', None)
+        self._owns_session = self._session is None
+        self._streams = dict()
+        super().__init__(*args, **kwargs)
+
+    def _create_watch_dog(self):
+        return None
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def _new_connection(self, url, request=None):
+        connection = AsyncWebsocketConnection(self, url, request)
+        self.connections.append(connection)
+        connection.connect()
+        return connection
+
+    def _create_connection(self, channel, callback, json_parser, error_handler=None, **kwargs):
+        request = self._build_request(channel, callback, json_parser, error_handler, **kwargs)
+        return self._new_connection(self._connection_url(Utils.safe_integer(kwargs, "futuresAccountType")), request)
+
+    def _publish(self, channel, event):
+        for queue in self._streams.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _stream_callback(self, channel, callback):
+        def update_callback(event):
+            if callback is not None:
+                callback(event)
+            self._publish(channel, event)
+
+        return update_callback
+
+    async def stream(self, channel, maxsize=0):
+        """
+        Iterate the events of a subscribed channel, e.g. ``BTC_USDT.Ticker``. With ``maxsize`` the oldest events are
+        dropped when the consumer falls behind.
+        """
+        queue = asyncio.Queue(maxsize)
+        self._streams.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._streams[channel].remove(queue)
+
+    async def close(self):
+        for connection in self.connections[:]:
+            await connection.close()
+        self.connections.clear()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+
+
+class AsyncMarketClient(AsyncSubscriptionMixin, MarketClient):
+    """
+    MarketClient on the asyncio engine. Every ``subscribe_*`` method returns an awaitable resolved with the subscription
+    id once the connection carrying the channel is open, the callback may be None when the channel is consumed by
+    stream().
+    """
+
+    async def _subscribe_event(self, channel, callback, json_parser, size, error_handler):
+        futures_account_type = FuturesAccountType.BASE_QC.value if channel.find("_QC") > 0 else None
+        request = self._build_request(channel=channel,
+                                      callback=self._stream_callback(channel, callback),
+                                      json_parser=json_parser,
+                                      error_handler=error_handler,
+                                      size=size,
+                                      futuresAccountType=futures_account_type)
+        url = self._connection_url(futures_account_type)
+
+        conn = None
+        for connection in self.connections:
+            if connection.url == url and connection.channel_count() < self.max_channels_per_connection:
+                conn = connection
+                break
+
+        if conn is None:
+            conn = self._new_connection(url)
+        conn.add_request(request)
+
+        try:
+            await conn.wait_connected(self.receive_limit_ms / 1000.0)
+        except (NetworkError, asyncio.CancelledError):
+            # a failed subscription leaves nothing behind
+            conn.remove_request(channel, request)
+            if conn.channel_count() == 0 and conn in self.connections:
+                self.connections.remove(conn)
+                await conn.close()
+            raise
+        return request.id
+
+    async def unsubscribe_event(self, conn_id=None, channel=None):
+        """
+        See MarketClient.unsubscribe_event.
+        """
+        for conn in self.connections[:]:
+            request = conn.find_request(conn_id) if conn_id else None
+            if request is not None:
+                conn.remove_request(request.channel, request)
+                if conn.channel_count() == 0:
+                    await conn.close()
+                    self.connections.remove(conn)
+            elif conn_id and conn.id == conn_id:
+                await conn.close()
+                self.connections.remove(conn)
+            elif channel and channel in conn.requests:
+                conn.remove_request(channel)
+                if conn.channel_count() == 0:
+                    await conn.close()
+                    self.connections.remove(conn)
+
+
+class AsyncWsAccountClient(AsyncSubscriptionMixin, WsAccountClient):
+    """
+    WsAccountClient on the asyncio engine. login, subscribe, unsubscribe and every request method return awaitables.
+    """
+
+    def _create_pending_requests(self, timeout_ms):
+        return PendingRequests(timeout_ms, on_loop=True)
+
+    def _login_handlers(self, futures_account_type=FuturesAccountType.BASE_USDT):
+        json_parser, callback, error_handler = super()._login_handlers(futures_account_type)
+
+        def update_callback(event):
+            callback(event)
+            self._publish(Utils.safe_string(event, 'channel'), event)
+
+        return json_parser, update_callback, error_handler
+
+    async def login(self, futures_account_type=FuturesAccountType.BASE_USDT):
+        """
+        Log in and wait for the acknowledgement, see WsAccountClient.login.
+        """
+        request = self._start_login(futures_account_type)
+        await self._wait(request)
+        return request
+
+    async def _wait(self, request):
+        # the request is completed by its response or failed by its timer, a cancelled waiter leaves it pending
+        waiter = asyncio.wrap_future(request)
+        # its outcome is kept on the request, not reported as never retrieved once nobody awaits the waiter
+        waiter.add_done_callback(lambda future: future.cancelled() or future.exception())
+        return await asyncio.shield(waiter)
+
+    async def subscribe(self, channel, data, callback, json_parser, error_handler, futures_account_type=FuturesAccountType.BASE_USDT):
+        """
+        :return: The response event, None for the push channels. Requests awaited concurrently are pipelined on the
+                 connection.
+        """
+        if futures_account_type not in self.connection_map:
+            self._start_login(futures_account_type)
+
+        message, request = self._register(channel, data, callback, json_parser, error_handler)
+        self._send(futures_account_type, message, request)
+        if request is None:
+            return None
+        return await self._wait(request)
+
+    async def unsubscribe(self, channel, futures_account_type=FuturesAccountType.BASE_USDT, ):
+        super().unsubscribe(channel, futures_account_type)
@@ -0,0 +1,12 @@
+"""
+Trade Api, asyncio version
+"""
+from zb.async_client import AsyncApiClient
+from zb.trade_api import TradeApi
+
+
+class AsyncTradeApi(AsyncApiClient, TradeApi):
+    """
+    The asyncio counterpart of TradeApi, every method returns a coroutine with the same arguments and result. The
+    methods are the api_methods of TradeApi, driven by AsyncApiClient.
+    """
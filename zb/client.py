@@ -1,31 +1,110 @@
 # -*- coding: utf-8 -*-
 
 """zb client"""
-import base64
 import collections
 import functools
 import hashlib
-import hmac
-import json
+import logging
 import time
-from datetime import datetime
+import warnings
 from typing import List
 
-import requests
 from requests import Timeout
 
+from zb import json_codec, log
+from zb.connection_pool import SessionPool
 from zb.errors import *
 from zb.model.common import Symbol, Currency, AssistPrice
+from zb.model.constant import FuturesAccountType
+from zb.rate_limiter import RateLimiter
+from zb.signer import HmacSigner, utc_timestamp
 from zb.utils import Utils
 
+logger = log.get_logger(log.REST)
+
+
+class RequestTemplate(object):
+    """
+    The parts of an endpoint request that do not depend on the call, resolved once when define_rest_api generates the
+    endpoint method: the usdt and qc margined paths, whether the path has {parameters} to format and the headers of
+    the request body.
+    """
+    __slots__ = ('path', 'api', 'method', 'paths', 'formatted', 'private', 'has_body', 'headers')
+
+    JSON_HEADERS = {'Content-Type': 'application/json; charset=UTF-8'}
+    QC_ACCOUNT = FuturesAccountType.BASE_QC.value
+
+    def __init__(self, path, api='public', method='GET'):
+        self.path = path
+        self.api = api
+        self.method = method
+        self.paths = (path, '/qc' + path)
+        self.formatted = '{' in path
+        self.private = api == 'private'
+        self.has_body = method != 'GET'
+        self.headers = self.JSON_HEADERS if self.has_body else None
+
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def of(cls, path, api='public', method='GET'):
+        """
+        The shared template of an endpoint, the requests not made by a generated method are resolved once as well.
+        """
+        return cls(path, api, method)
+
+    @classmethod
+    def is_qc(cls, params):
+        """
+        Whether the request is for the qc margined futures, by its futuresAccountType or else its symbol.
+        """
+        if not isinstance(params, dict):
+            return False
+        account = params.get('futuresAccountType')
+        if account is not None and Utils.safe_integer(params, 'futuresAccountType') == cls.QC_ACCOUNT:
+            return True
+        symbol = params.get('symbol')
+        return symbol is not None and str(symbol).upper().endswith('QC')
+
+    def resolve_path(self, params):
+        """
+        :return: The path of the margin of the request, not formatted yet as it is signed unformatted.
+        """
+        return self.paths[1] if self.is_qc(params) else self.paths[0]
+
+    def __repr__(self):
+        return 'RequestTemplate(%r, %r, %r)' % (self.path, self.api, self.method)
+
+
+def api_method(calls):
+    """
+    Turn a generator building the params of the endpoint calls and parsing their results into a client method, so the
+    blocking and the asyncio clients share one definition. The generator yields every call of the client it makes,
+    ``data = yield self.public_get_depth(params)``, and is sent back its result by ApiClient.drive, the asyncio
+    client awaiting it first.
+    """
+    @functools.wraps(calls)
+    def method(self, *args, **kwargs):
+        return self.drive(calls(self, *args, **kwargs))
+
+    return method
+
 
 class ApiClient(object):
     enable_rate_limit = False
     last_rest_request_Timestamp = 0
-    rate_limit = 2000  # milliseconds = seconds * 1000
     timeout = 10000  # milliseconds = seconds * 1000
-    verbose = True
+    verbose = True  # log requests and responses to zb.rest at DEBUG, the responses are then not checked by handle_fail
     lan = 'cn'  # cn, en, kr
+    session_pool = None  # SessionPool, shared by all clients unless configured
+    rate_limiter = None  # RateLimiter, shared by all clients unless configured
+    instrumentation = None  # Instrumentation receiving the request timings, see zb.metrics
+    clock_sync = None  # ClockSync fed the Date of the responses and stamping the signed requests, see zb.clock_sync
+    # requests per second and burst size of each endpoint group, see RateLimiter.endpoint_group
+    rate_limits = {
+        'public': {'rate': 10, 'capacity': 10},
+        'trade': {'rate': 10, 'capacity': 10},
+        'default': {'rate': 5, 'capacity': 5},
+    }
 
     markets = None
     markets_by_id = None
@@ -52,81 +131,169 @@ class ApiClient(object):
     def __init__(self, api_key=None, secret_key=None, api_host=None, config={}):
 
         for key in config:
+            if key == 'rate_limit':
+                continue
             if hasattr(self, key) and isinstance(getattr(self, key), dict):
                 setattr(self, key, self.deep_extend(getattr(self, key), config[key]))
             else:
                 setattr(self, key, config[key])
+        if config.get('rate_limit'):
+            # the former fixed gap in milliseconds between two requests of any endpoint
+            warnings.warn("The rate_limit config is deprecated, use rate_limits.", DeprecationWarning, stacklevel=2)
+            limit = {'rate': 1000.0 / config['rate_limit'], 'capacity': 1}
+            self.rate_limits = self.deep_extend({group: limit for group in self.rate_limits},
+                                                config.get('rate_limits', {}))
 
         if api_key:
             self.__api_key = api_key
         if secret_key:
             self.__secret_key = hashlib.sha1(secret_key.encode('utf-8')).hexdigest()
+            self.__signer = HmacSigner(self.__secret_key, hashed=True)
 
         if api_host:
-            self.urls['api'] = api_host
+            # per instance, the class dict is shared by every client
+            self.urls = dict(self.urls, api=api_host)
+
+        if self.session_pool is None:
+            self.session_pool = self.default_session_pool()
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimiter.default()
+        self._buckets = dict()
 
         self.define_rest_api(self.apis, 'request')
 
-    def request(self, path, api='public', method="GET", params={}, headers=None):
+    def request(self, path, api='public', method="GET", params={}, headers=None, template=None):
         if self.enable_rate_limit:
-            self.throttle()
+            self.throttle(path, api)
 
         self.last_rest_request_Timestamp = Utils.milliseconds()
 
-        from zb.model.constant import FuturesAccountType
-        futures_account_type = Utils.safe_integer(params, "futuresAccountType")
-        symbol = Utils.safe_string(params, "symbol")
-        if futures_account_type == FuturesAccountType.BASE_QC.value:
-            path = "/qc" + path
-        elif symbol is not None and symbol.upper().endswith("QC"):
-            path = "/qc" + path
-
-        if api == 'private':
-            headers = self.sign(path, method, params, headers)
-
-        # 设置路径参数
-        path = path.format(**params)
-        url = self.urls['api'] + path
+        timings = {} if self.instrumentation is not None else None
+        url, headers, body = self.prepare_request(path, api, method, params, headers, timings, template)
 
         response = None
         try:
-            if self.verbose:
-                print('method:', method, ', url :', url, ', header:', headers, ", request:", params)
-
+            if self.verbose and logger.isEnabledFor(logging.DEBUG):
+                logger.debug('method: %s, url: %s, header: %s, request: %s', method, url, headers, params)
+
+            clock_sync = self.clock_sync
+            if clock_sync is not None:
+                sent = Utils.milliseconds()
+            if timings is not None:
+                start = time.perf_counter_ns()
             if method == "GET":
-                response = requests.get(url, params=params, headers=headers)
+                response = self.session_pool.request(method, url, params=params, headers=headers)
             else:
-                headers['Content-Type'] = 'application/json; charset=UTF-8'
-                response = requests.post(url, data=json.dumps(params, separators=(',', ':')), headers=headers)
+                response = self.session_pool.request(method, url, data=body, headers=headers)
+            if timings is not None:
+                timings['network'] = time.perf_counter_ns() - start
+            if clock_sync is not None:
+                clock_sync.observe_response(sent, Utils.milliseconds(), response.headers.get('Date'))
 
             if self.verbose:
-                print('method:', method, ', url:', url, ", response:", response.text)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('method: %s, url: %s, response: %s', method, url, response.text)
             else:
                 self.handle_fail(response, method, url)
 
-            return response.json()['data']
+            if timings is None:
+                return json_codec.loads(response.content)['data']
+
+            start = time.perf_counter_ns()
+            data = json_codec.loads(response.content)['data']
+            timings['parse'] = time.perf_counter_ns() - start
+            self.instrumentation.on_rest(api, method, path, timings, response.status_code)
+            return data
 
         except Timeout as e:
+            self.report_error(api, method, path, timings, response, e)
             self.raise_error(RequestTimeout, method, url, e)
         except ValueError as e:
+            self.report_error(api, method, path, timings, response, e)
             self.raise_error(BadResponse, method, url, e, response.text)
         except KeyError as e:
+            self.report_error(api, method, path, timings, response, e)
             self.raise_error(BadResponse, method, url, e, response.text)
+        except ZbApiException as e:
+            self.report_error(api, method, path, timings, response, e)
+            raise
+
+    def report_error(self, api, method, path, timings, response, error):
+        if timings is not None:
+            self.instrumentation.on_rest(api, method, path, timings, response.status_code if response is not None else None,
+                                         error)
+
+    def prepare_request(self, path, api='public', method="GET", params={}, headers=None, timings=None, template=None):
+        """
+        Resolve the full url, the signed headers and the request body of a rest call.
+
+        :param timings: Dict receiving the sign and serialize time in nanoseconds, None to skip the timing.
+        :param template: The RequestTemplate of the endpoint, looked up by path, api and method if None.
+        :return: (url, headers, body), body is None for GET requests
+        """
+        if template is None:
+            template = RequestTemplate.of(path, api, method)
+        path = template.resolve_path(params)
+
+        if template.private:
+            if timings is not None:
+                start = time.perf_counter_ns()
+            headers = self.sign(path, method, params, headers)
+            if timings is not None:
+                timings['sign'] = time.perf_counter_ns() - start
 
-    def throttle(self):
-        now = float(Utils.milliseconds())
-        elapsed = now - self.last_rest_request_Timestamp
-        if elapsed < self.rate_limit:
-            delay = self.rate_limit - elapsed
-            time.sleep(delay / 1000.0)
+        # 设置路径参数
+        if template.formatted:
+            path = path.format(**params)
+        url = self.urls['api'] + path
+
+        body = None
+        if template.has_body:
+            if headers is None:
+                headers = dict(template.headers)
+            else:
+                headers.update(template.headers)
+            if timings is not None:
+                start = time.perf_counter_ns()
+            body = json_codec.dumps(params)
+            if timings is not None:
+                timings['serialize'] = time.perf_counter_ns() - start
+
+        return url, headers, body
+
+    @staticmethod
+    def default_session_pool():
+        return SessionPool.default()
+
+    def pool_stats(self) -> dict:
+        """
+        Connection reuse counters of the session pool used by this client, see SessionPool.stats
+        """
+        return self.session_pool.stats()
+
+    def throttle(self, path='', api='public'):
+        self.rate_bucket(path, api).acquire()
+
+    def rate_bucket(self, path='', api='public'):
+        """
+        The token bucket limiting the endpoint, shared with the other clients of the same api key.
+        """
+        bucket = self._buckets.get((api, path))
+        if bucket is None:
+            group = RateLimiter.endpoint_group(api, path)
+            limit = self.rate_limits.get(group) or self.rate_limits['default']
+            api_key = getattr(self, '_ApiClient__api_key', None) if api == 'private' else None
+            bucket = self.rate_limiter.bucket(api_key, group, limit['rate'], limit.get('capacity'))
+            self._buckets[(api, path)] = bucket
+        return bucket
 
     def sign(self, path, method='GET', params=None, headers=None):
         if self.__api_key == '' or self.__secret_key == '':
             raise AuthenticationError('Api key and secret key must not be empty.')
 
-        timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        timestamp = utc_timestamp(self.clock_sync.now_ms() if self.clock_sync is not None else None)
 
-        sign = self.generate_sign(timestamp, method, path, params, self.__secret_key)
+        sign = self.__signer.sign(timestamp, method, path, params)
 
         new_headers = {
             'ZB-APIKEY': self.__api_key,
@@ -139,31 +306,20 @@ class ApiClient(object):
 
         return new_headers
 
-    @staticmethod
-    def __build_sort_param(params):
-        if params is None:
-            return ''
-
-        keys = sorted(params)
-        return '&'.join([k + '=' + str(params[k]) for k in keys if params[k] is not None and params[k] != ''])
-
     @staticmethod
     def generate_sign(timestamp, method, path, params, secret_key):
-        param_str = ApiClient.__build_sort_param(params)
-        content = timestamp + method + path + param_str
-        print("sign string :", content)
-
-        key = secret_key.encode('utf-8')
-        sign = base64.b64encode(hmac.new(key, content.encode('utf-8'), digestmod=hashlib.sha256).digest())
-        return str(sign, 'utf-8')
+        """
+        Sign with the hex SHA1 ``secret_key``, the clients keep an HmacSigner instead of preparing the key per call.
+        """
+        return HmacSigner(secret_key, hashed=True).sign(timestamp, method, path, params)
 
     def handle_fail(self, response, method=None, url=None):
         if 404 == response.status_code:
             raise NotSupported("not supported.")
-        body = response.json()
+        body = json_codec.loads(response.content)
         code = body['code']
         if 10000 != code:
-            message = 'method: ' + method + ', url: ' + url + ', error code: ' + code + ", message: " + body['desc']
+            message = 'method: ' + method + ', url: ' + url + ', error code: ' + str(code) + ", message: " + body['desc']
 
             if code in self.exceptions:
                 exception_class = self.exceptions[code]
@@ -171,37 +327,52 @@ class ApiClient(object):
             else:
                 raise ZbApiException(message)
 
+    def drive(self, calls):
+        """
+        Run the generator of an api_method, every call it yields has already returned and is sent back as is.
+        """
+        result = None
+        try:
+            while True:
+                result = calls.send(result)
+        except StopIteration as stop:
+            return stop.value
+
     SymbolList = List[Symbol]
 
+    @api_method
     def load_markets(self, reload=False) -> SymbolList:
         if reload or not self.markets:
-            self.markets = self.get_symbols()
+            self.markets = yield self.get_symbols()
             self.markets_by_id = Utils.index_by(self.markets, "id")
             self.markets_by_name = Utils.index_by(self.markets, "marketName")
 
         return self.markets
 
+    @api_method
     def get_symbols(self) -> SymbolList:
-        data_array = self.public_get_symbols()
+        data_array = yield self.public_get_symbols()
 
         return [Symbol(**item) for item in data_array]
 
+    @api_method
     def check_symbol(self, symbol: str):
         if symbol is None:
             raise ArgumentsRequired("[Input] symbol should not be null")
 
-        self.load_markets()
+        yield self.load_markets()
         symbol = symbol.upper()
         if symbol not in self.markets_by_name:
             raise NotSupported("'" + symbol + "' is not yet supported by the zb.")
 
         return self.markets_by_name[symbol]
 
+    @api_method
     def safe_get_symbol(self, symbol_id):
         if symbol_id is None:
             return None
 
-        self.load_markets()
+        yield self.load_markets()
         if symbol_id not in self.markets_by_id:
             return None
         return self.markets_by_id[symbol_id]['marketName']
@@ -252,15 +423,14 @@ class ApiClient(object):
                     underscore = api_type + '_' + lowercase_method + '_' + alias
 
                     def partialer():
-                        outer_kwargs = {'path': url, 'api': api_type, 'method': uppercase_method}
+                        template = RequestTemplate.of(url, api_type, uppercase_method)
 
                         @functools.wraps(entry)
                         def inner(_self, params=None):
-                            inner_kwargs = dict(outer_kwargs)  # avoid mutation
-                            if params is not None:
-                                inner_kwargs['params'] = params
-                            return entry(_self, **inner_kwargs)
+                            return entry(_self, template.path, template.api, template.method,
+                                         {} if params is None else params, template=template)
 
+                        inner.template = template
                         return inner
 
                     to_bind = partialer()
@@ -0,0 +1,144 @@
+"""
+Estimation of the offset between the local clock and the exchange clock
+"""
+import threading
+from collections import deque
+from email.utils import parsedate_tz, mktime_tz
+
+from zb.utils import Utils
+
+
+class ClockSync(object):
+    """
+    Tracks offset = exchange clock - local clock in milliseconds, so the signed requests are stamped in exchange time
+    and the latency of the market data can be measured against the exchange timestamps. Share one instance between
+    the rest and websocket clients:
+
+        clock = ClockSync()
+        api = TradeApi(api_key, secret_key, clock_sync=clock)
+        client = MarketClient(clock_sync=clock)
+        clock.offset_ms, clock.latency_ms(event_time_ms)
+
+    Every sample bounds the offset in the manner of NTP: a rest response stamped ``Date`` (second resolution) was
+    stamped between sending and receiving, so the offset lies in [Date - received, Date + 1s - sent]. A market event
+    cannot arrive before the exchange stamped it, so the offset is at least its timestamp - received. The estimate is
+    the middle of the intersection of the bounds of the recent samples, which narrows as the second boundaries of
+    the Date headers fall at different points of the round trips. Bounds that contradict each other, after a clock
+    step, are resolved by the rest sample with the shortest round trip alone.
+
+    Without rest samples only the lower bound is known and the fastest event is taken as instantaneous, the latencies
+    are then relative to it.
+
+    :member
+        window_ms:      Samples older than this are dropped, so the estimate follows the drift of the clocks.
+        max_samples:    The number of rest samples kept.
+        offset_ms:      The current estimate, 0 until the first sample.
+        uncertainty_ms: Half the width of the interval the offset lies in, None without rest samples.
+    """
+
+    def __init__(self, window_ms=600000, max_samples=64):
+        self.window_ms = window_ms
+        self.offset_ms = 0
+        self.uncertainty_ms = None
+        # (received, low, high, round trip) of the rest samples
+        self._samples = deque(maxlen=max_samples)
+        # (received, low) of the events, the lows decreasing so the first is the highest of the window
+        self._event_lows = deque()
+        self._date = (None, None)
+        self._lock = threading.Lock()
+
+    def now_ms(self):
+        """
+        The exchange time now in epoch milliseconds.
+        """
+        return Utils.milliseconds() + self.offset_ms
+
+    def latency_ms(self, server_ms, received_ms=None):
+        """
+        The one way latency of a message stamped ``server_ms`` by the exchange and received at ``received_ms``, now
+        by default, in local time.
+        """
+        if received_ms is None:
+            received_ms = Utils.milliseconds()
+        return received_ms + self.offset_ms - server_ms
+
+    def rtt_ms(self):
+        """
+        The shortest recent rest round trip, None without rest samples.
+        """
+        with self._lock:
+            return min(sample[3] for sample in self._samples) if self._samples else None
+
+    def add_sample(self, sent_ms, server_ms, received_ms, resolution_ms=1):
+        """
+        A request sent at ``sent_ms`` answered with the exchange time ``server_ms``, truncated to ``resolution_ms``,
+        and received at ``received_ms``, in local time.
+        """
+        with self._lock:
+            self._samples.append((received_ms, server_ms - received_ms, server_ms + resolution_ms - sent_ms,
+                                  received_ms - sent_ms))
+            self._update(received_ms)
+
+    def observe_response(self, sent_ms, received_ms, date):
+        """
+        Add the ``Date`` header of a rest response, ignored if missing or malformed.
+        """
+        if not date:
+            return
+        cached, server_ms = self._date
+        if cached != date:
+            parsed = parsedate_tz(date)
+            if parsed is None:
+                return
+            server_ms = mktime_tz(parsed) * 1000
+            self._date = (date, server_ms)
+        self.add_sample(sent_ms, server_ms, received_ms, 1000)
+
+    def observe_event(self, server_ms, received_ms=None):
+        """
+        Add an event stamped ``server_ms`` by the exchange received at ``received_ms``, now by default.
+        """
+        if received_ms is None:
+            received_ms = Utils.milliseconds()
+        low = server_ms - received_ms
+        with self._lock:
+            lows = self._event_lows
+            while lows and lows[-1][1] <= low:
+                lows.pop()
+            lows.append((received_ms, low))
+            # the estimate only moves with the highest low of the window, or when samples expire
+            expired = received_ms - self.window_ms
+            if low == lows[0][1] or lows[0][0] < expired or self._samples and self._samples[0][0] < expired:
+                self._update(received_ms)
+
+    def _update(self, now):
+        expired = now - self.window_ms
+        samples = self._samples
+        while samples and samples[0][0] < expired:
+            samples.popleft()
+        lows = self._event_lows
+        while lows and lows[0][0] < expired:
+            lows.popleft()
+
+        low = lows[0][1] if lows else None
+        if not samples:
+            if low is not None:
+                self.offset_ms = low
+            self.uncertainty_ms = None
+            return
+
+        high = min(sample[2] for sample in samples)
+        rest_low = max(sample[1] for sample in samples)
+        low = rest_low if low is None else max(low, rest_low)
+        if low > high:
+            received, low, high, rtt = min(samples, key=lambda sample: sample[3])
+        self.offset_ms = (low + high) // 2
+        self.uncertainty_ms = (high - low) / 2.0
+
+    def stats(self):
+        return {
+            'offset_ms': self.offset_ms,
+            'uncertainty_ms': self.uncertainty_ms,
+            'rtt_ms': self.rtt_ms(),
+            'samples': len(self._samples),
+        }
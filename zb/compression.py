@@ -0,0 +1,69 @@
+"""
+Decompression of binary websocket frames
+"""
+import zlib
+
+GZIP_MAGIC = b'\x1f\x8b'
+JSON_WHITESPACE = b' \t\r\n'
+
+
+class FrameDecoder(object):
+    """
+    Inflates gzip, zlib and raw deflate frames, binary frames holding plain json are passed through.
+
+    Every frame is a complete stream, inflated in one zlib.decompress call with the window bits of its format, which
+    sets up and frees the stream inside zlib without a decompressor object per frame.
+
+    :member
+        frames:             The number of compressed frames inflated.
+        compressed_bytes:   The compressed size of those frames.
+        decompressed_bytes: Their size after inflating.
+    """
+    GZIP = 16 + zlib.MAX_WBITS
+    ZLIB = zlib.MAX_WBITS
+    DEFLATE = -zlib.MAX_WBITS
+
+    def __init__(self):
+        self.frames = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+
+    @classmethod
+    def wbits(cls, data):
+        """
+        :return: The window bits of the format of the frame, None for plain json.
+        """
+        first = data[:1]
+        if first in JSON_WHITESPACE:
+            first = data.lstrip(JSON_WHITESPACE)[:1]
+        if first in (b'{', b'[', b''):
+            return None
+        if data[:2] == GZIP_MAGIC:
+            return cls.GZIP
+        if len(data) > 1 and data[0] & 0x0f == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+            return cls.ZLIB
+        return cls.DEFLATE
+
+    def decode(self, data):
+        """
+        :param data: The payload of a binary frame.
+        :return: The inflated payload.
+        :raise zlib.error: The frame is corrupt or truncated.
+        """
+        wbits = self.wbits(data)
+        if wbits is None:
+            return data
+
+        result = zlib.decompress(data, wbits)
+        self.frames += 1
+        self.compressed_bytes += len(data)
+        self.decompressed_bytes += len(result)
+        return result
+
+    def ratio(self):
+        """
+        :return: decompressed / compressed bytes, None before the first compressed frame.
+        """
+        if not self.compressed_bytes:
+            return None
+        return self.decompressed_bytes / self.compressed_bytes
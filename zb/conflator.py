@@ -0,0 +1,86 @@
+"""
+Latest value per symbol of the conflated subscriptions
+"""
+import threading
+
+
+class _Entry(object):
+    __slots__ = ('raw', 'parser', 'value', 'fresh')
+
+    def __init__(self):
+        self.raw = None
+        self.parser = None
+        self.value = None
+        self.fresh = False
+
+
+class Conflator(object):
+    """
+    Keeps only the newest raw frame of every symbol and parses it when it is pulled, frames replaced before being
+    pulled are never parsed.
+
+    :member
+        updates:    The number of frames received.
+        coalesced:  The number of frames replaced by a newer one before being pulled.
+    """
+
+    def __init__(self):
+        self._entries = dict()
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.coalesced = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        return list(self._entries)
+
+    def update(self, key, raw, parser):
+        """
+        Replace the frame of the key, ``parser(raw)`` builds the value when it is pulled.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            elif entry.fresh:
+                self.coalesced += 1
+            entry.raw = raw
+            entry.parser = parser
+            entry.value = None
+            entry.fresh = True
+            self.updates += 1
+
+    def get(self, key):
+        """
+        :return: The value of the newest frame of the key, None if none was received.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.fresh = False
+            if entry.value is not None:
+                return entry.value
+            raw, parser = entry.raw, entry.parser
+
+        value = parser(raw)
+        with self._lock:
+            if entry.raw is raw:
+                entry.value = value
+        return value
+
+    def pop_updated(self) -> dict:
+        """
+        :return: {key: value} of the keys updated since they were last pulled.
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.fresh]
+        return {key: self.get(key) for key in keys}
+
+    def stats(self) -> dict:
+        return {'keys': len(self._entries), 'updates': self.updates, 'coalesced': self.coalesced}
@@ -0,0 +1,123 @@
+"""
+Keep-alive HTTP session pool shared by the REST clients
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from zb.utils import Utils
+
+
+class SessionPool(object):
+    """
+    A persistent ``requests.Session`` whose connections are reused across calls, so REST requests
+    skip the TCP/TLS handshake once a connection to the host is established.
+
+    :member
+        pool_connections:   The number of hosts whose connection pools are cached.
+        pool_maxsize:       The maximum number of idle connections kept per host.
+        pool_block:         If True, never open more than ``pool_maxsize`` connections per host and wait for a free one.
+        max_idle_ms:        Drop all pooled connections if the pool was not used within this time, in milliseconds.
+                            0 disables the idle check.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, max_idle_ms=60000):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_idle_ms = max_idle_ms
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._last_used = 0
+        self._retired_requests = 0
+        self._retired_connections = 0
+        self.recycled = 0
+
+    @classmethod
+    def default(cls):
+        """
+        The process wide pool used by every client that was not given one explicitly.
+        """
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = SessionPool()
+        return cls._default
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session(self) -> requests.Session:
+        now = Utils.milliseconds()
+        with self._lock:
+            if self._session is not None and self.max_idle_ms and now - self._last_used > self.max_idle_ms:
+                self._retire()
+                self.recycled += 1
+            if self._session is None:
+                self._session = self._new_session()
+            self._last_used = now
+            return self._session
+
+    def request(self, method, url, **kwargs):
+        return self.session().request(method, url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._retire()
+
+    def _retire(self):
+        requests_count, connections_count = self._count(self._session)
+        self._retired_requests += requests_count
+        self._retired_connections += connections_count
+        self._session.close()
+        self._session = None
+
+    @staticmethod
+    def _count(session):
+        requests_count = 0
+        connections_count = 0
+        if session is None:
+            return requests_count, connections_count
+
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+        return requests_count, connections_count
+
+    def stats(self) -> dict:
+        """
+        Pool usage counters.
+
+        :return: dict
+            requests:   The number of requests sent through the pool.
+            hits:       Requests served on an already open connection.
+            misses:     Requests that had to open a new connection.
+            recycled:   How many times the pool was dropped after being idle longer than max_idle_ms.
+        """
+        with self._lock:
+            requests_count, connections_count = self._count(self._session)
+            requests_count += self._retired_requests
+            connections_count += self._retired_connections
+            return {
+                'requests': requests_count,
+                'hits': requests_count - connections_count,
+                'misses': connections_count,
+                'recycled': self.recycled,
+            }
@@ -0,0 +1,126 @@
+"""
+Dispatch of websocket messages to a worker pool through bounded per-channel queues
+"""
+import threading
+from collections import deque
+
+from zb import log
+from zb.model.constant import OverflowPolicy
+
+
+class ChannelQueue(object):
+    """
+    The messages of one channel waiting for a worker.
+
+    :member
+        depth:      The number of queued messages.
+        max_depth:  The highest depth seen.
+        dropped:    The number of messages dropped or replaced by the overflow policy.
+        dispatched: The number of messages handed to the callback.
+    """
+    __slots__ = ('items', 'scheduled', 'max_depth', 'dropped', 'dispatched')
+
+    def __init__(self):
+        self.items = deque()
+        self.scheduled = False
+        self.max_depth = 0
+        self.dropped = 0
+        self.dispatched = 0
+
+    @property
+    def depth(self):
+        return len(self.items)
+
+
+class Dispatcher(object):
+    """
+    Moves the parsing and the callbacks of the websocket messages off the socket reader thread.
+
+    Every channel has a queue of at most ``maxsize`` messages, drained in order by one worker at a time, so the
+    callbacks of a channel never run concurrently while different channels run in parallel on ``workers``
+    threads. When a queue is full the overflow policy applies:
+        BLOCK:          The reader waits for room, slowing down the socket.
+        DROP_OLDEST:    The oldest queued message is dropped.
+        CONFLATE:       Only the latest message is kept, the queued one is replaced.
+    """
+
+    def __init__(self, workers=4, maxsize=1000, policy=OverflowPolicy.BLOCK):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.policy = policy
+        self.logger = log.get_logger(log.DISPATCH)
+        # Key: channel, Value: ChannelQueue
+        self.queues = dict()
+        self._ready = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name='zb-dispatch-' + str(i), daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, channel, handler, message):
+        """
+        Queue ``handler(message)`` on the channel.
+        """
+        with self._condition:
+            queue = self.queues.get(channel)
+            if queue is None:
+                queue = self.queues[channel] = ChannelQueue()
+
+            limit = 1 if self.policy == OverflowPolicy.CONFLATE else self.maxsize
+            if len(queue.items) >= limit:
+                if self.policy == OverflowPolicy.BLOCK:
+                    while len(queue.items) >= limit and not self._closed:
+                        self._condition.wait()
+                else:
+                    queue.items.popleft()
+                    queue.dropped += 1
+
+            queue.items.append((handler, message))
+            queue.max_depth = max(queue.max_depth, len(queue.items))
+            if not queue.scheduled:
+                queue.scheduled = True
+                self._ready.append(channel)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._ready and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                channel = self._ready.popleft()
+                queue = self.queues[channel]
+                handler, message = queue.items.popleft()
+                # wake a reader blocked on this queue
+                self._condition.notify_all()
+
+            try:
+                handler(message)
+            except Exception:
+                self.logger.exception("[Dispatch] Handler of %s failed", channel)
+
+            with self._condition:
+                queue.dispatched += 1
+                if queue.items:
+                    self._ready.append(channel)
+                    self._condition.notify_all()
+                else:
+                    queue.scheduled = False
+
+    def stats(self) -> dict:
+        """
+        :return: {channel: {'depth', 'max_depth', 'dropped', 'dispatched'}}
+        """
+        with self._condition:
+            return {channel: {'depth': queue.depth,
+                              'max_depth': queue.max_depth,
+                              'dropped': queue.dropped,
+                              'dispatched': queue.dispatched} for channel, queue in self.queues.items()}
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,113 @@
+"""
+JSON codec of the rest and websocket clients, backed by the fastest installed library
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+from zb.errors import NotSupported
+
+
+class JsonCodec(object):
+    """
+    The standard library codec, the others only change how loads and dumps are done.
+    ``loads`` accepts str or bytes, ``dumps`` returns a compact str.
+    """
+    name = 'json'
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+
+class SimdjsonCodec(JsonCodec):
+    name = 'simdjson'
+
+    @staticmethod
+    def loads(data):
+        return simdjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    name = 'ujson'
+
+    @staticmethod
+    def loads(data):
+        return ujson.loads(data)
+
+    @staticmethod
+    def dumps(obj) -> str:
+        return ujson.dumps(obj, escape_forward_slashes=False)
+
+
+# in order of preference
+CODECS = {
+    'orjson': (OrjsonCodec, orjson),
+    'simdjson': (SimdjsonCodec, simdjson),
+    'ujson': (UjsonCodec, ujson),
+    'json': (JsonCodec, json),
+}
+
+
+def available_codecs():
+    return [name for name, (_, module) in CODECS.items() if module is not None]
+
+
+def get_codec(name=None):
+    """
+    :param name: 'orjson', 'simdjson', 'ujson' or 'json', None for the fastest installed one.
+    """
+    if name is None:
+        name = available_codecs()[0]
+    if name not in CODECS:
+        raise NotSupported("Unknown json codec '" + name + "', use one of " + ', '.join(CODECS))
+    codec_class, module = CODECS[name]
+    if module is None:
+        raise NotSupported("The json codec '" + name + "' is not installed, run `pip install " + name + "`.")
+    return codec_class
+
+
+def set_codec(name=None):
+    """
+    Select the codec used by every client of the process.
+    """
+    global codec, loads, dumps
+    codec = get_codec(name)
+    loads = codec.loads
+    dumps = codec.dumps
+    return codec
+
+
+codec = None
+loads = None
+dumps = None
+set_codec()
@@ -0,0 +1,188 @@
+"""
+Kline history kept in local append-only binary files and topped up from the rest api
+"""
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from zb.model.constant import Interval
+from zb.model.market import Kline
+from zb.utils import Utils
+
+INTERVAL_SECONDS = {
+    Interval.MIN_1: 60,
+    Interval.MIN_5: 300,
+    Interval.MIN_15: 900,
+    Interval.MIN_30: 1800,
+    Interval.HOUR_1: 3600,
+    Interval.HOUR_6: 21600,
+    Interval.DAY_1: 86400,
+    Interval.DAY_5: 432000,
+}
+
+# alias used in the file names and the rest method, e.g. public_get_mark_kline
+KLINE_KINDS = ('kline', 'mark_kline', 'index_kline')
+
+
+class KlineStore(object):
+    """
+    The closed klines of one symbol and interval in a file of fixed size records
+    (timestamp, open, high, low, close, volume), ordered by timestamp. Records are only appended, a kline not newer
+    than the last stored one is skipped, so the same bars can be written any number of times.
+    """
+    RECORD = struct.Struct('<q5d')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_timestamp = None
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // self.RECORD.size
+
+    def last_timestamp(self):
+        """
+        :return: The timestamp of the newest stored kline, None if the store is empty.
+        """
+        if self._last_timestamp is None and len(self):
+            with open(self.path, 'rb') as f:
+                f.seek((len(self) - 1) * self.RECORD.size)
+                self._last_timestamp = self.RECORD.unpack(f.read(self.RECORD.size))[0]
+        return self._last_timestamp
+
+    def append(self, json_arrays) -> int:
+        """
+        Append the klines newer than the last stored one.
+
+        :param json_arrays: [[open, high, low, close, volume, timestamp], ...] or without volume for mark and index klines.
+        :return: The number of klines written.
+        """
+        with self._lock:
+            last = self.last_timestamp()
+            rows = {}
+            for item in json_arrays:
+                timestamp = int(item[-1])
+                if last is None or timestamp > last:
+                    volume = float(item[4]) if len(item) == 6 else float('nan')
+                    rows[timestamp] = (timestamp, float(item[0]), float(item[1]), float(item[2]), float(item[3]), volume)
+            if not rows:
+                return 0
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            pack = self.RECORD.pack
+            with open(self.path, 'ab') as f:
+                f.write(b''.join(pack(*rows[timestamp]) for timestamp in sorted(rows)))
+            self._last_timestamp = max(rows)
+            return len(rows)
+
+    def read(self, since=None):
+        """
+        :param since: Only return the klines at or after this timestamp.
+        :return: List[Kline], oldest first.
+        """
+        if not len(self):
+            return []
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        klines = []
+        for timestamp, open_, high, low, close, volume in self.RECORD.iter_unpack(data[:len(data) - len(data) % self.RECORD.size]):
+            if since is None or timestamp >= since:
+                klines.append(Kline(open=open_, high=high, low=low, close=close, volume=volume, timestamp=timestamp))
+        return klines
+
+
+class KlineBackfill(object):
+    """
+    Keeps a KlineStore per (kind, symbol, interval) under ``root`` up to date.
+
+    The kline endpoints only return the latest ``size`` (max 1440) bars, there is no paging by time. A run fetches
+    just the bars missing since the newest stored one, so history builds up across runs as long as they are less
+    than 1440 bars apart. The newest bar of a response is still forming and is never stored.
+    Several stores are fetched concurrently, the requests always go through the token buckets of the market api,
+    whether or not rate limiting is enabled on it, its settings are left as they are.
+
+    :member
+        market_api:     MarketApi used for the requests.
+        root:           The directory of the store files.
+        max_workers:    The number of stores fetched concurrently.
+    """
+    max_size = 1440
+
+    def __init__(self, market_api, root, max_workers=4):
+        self.market_api = market_api
+        self.root = root
+        self.max_workers = max_workers
+        self._stores = dict()
+        self._lock = threading.Lock()
+
+    def store(self, symbol, interval: Interval, kind='kline') -> KlineStore:
+        key = (kind, symbol.upper(), interval)
+        with self._lock:
+            if key not in self._stores:
+                path = os.path.join(self.root, kind, symbol.upper() + '_' + interval.value + '.bin')
+                self._stores[key] = KlineStore(path)
+            return self._stores[key]
+
+    def missing_size(self, store: KlineStore, interval: Interval):
+        """
+        The number of bars to request so the response reaches back to the newest stored bar.
+        """
+        last = store.last_timestamp()
+        if last is None:
+            return self.max_size
+        now = Utils.milliseconds()
+        if last < 10 ** 11:
+            now //= 1000
+            period = INTERVAL_SECONDS[interval]
+        else:
+            period = INTERVAL_SECONDS[interval] * 1000
+        # the bar at last, the bars after it and the forming one
+        return max(2, min(self.max_size, (now - last) // period + 2))
+
+    def backfill(self, symbol, interval: Interval, kind='kline') -> int:
+        """
+        Fetch the bars missing from a store.
+
+        :param symbol:      交易对，如：BTC_USDT
+        :param interval:    The kline interval.
+        :param kind:        'kline', 'mark_kline' or 'index_kline'.
+        :return: The number of klines added.
+        """
+        if kind not in KLINE_KINDS:
+            raise ValueError("kind must be one of " + ', '.join(KLINE_KINDS))
+
+        store = self.store(symbol, interval, kind)
+        params = {
+            'symbol': symbol.upper(),
+            'period': interval.value,
+            'size': self.missing_size(store, interval),
+        }
+        request = getattr(self.market_api, 'public_get_' + kind)
+        if not self.market_api.enable_rate_limit:
+            # otherwise the request throttles itself
+            self.market_api.throttle(request.template.path, request.template.api)
+        data_array = request(params)
+        if not data_array:
+            return 0
+        closed = sorted(data_array, key=lambda item: int(item[-1]))[:-1]
+        return store.append(closed)
+
+    def run(self, jobs) -> dict:
+        """
+        Backfill several stores concurrently.
+
+        :param jobs: [(symbol, interval), ...] or [(symbol, interval, kind), ...]
+        :return: {(kind, symbol, interval): number of klines added}
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for job in jobs:
+                symbol, interval = job[0], job[1]
+                kind = job[2] if len(job) > 2 else 'kline'
+                futures[(kind, symbol.upper(), interval)] = executor.submit(self.backfill, symbol, interval, kind)
+            return {key: future.result() for key, future in futures.items()}
@@ -0,0 +1,98 @@
+"""
+Logging of the client subsystems
+
+Every subsystem logs to a child of the ``zb`` logger. The library installs no handler and sets no level, so until
+the application configures logging or calls enable() only warnings and errors reach stderr, through the last resort
+handler of the logging module. The messages are formatted lazily with %-style arguments and the per message ones
+are logged at DEBUG behind an isEnabledFor check, so production runs do no formatting work on the request and
+frame paths.
+
+    from zb import log
+    log.enable(logging.INFO)                # lifecycle messages of every subsystem to stderr
+    log.set_level(logging.DEBUG, 'ws')      # and every websocket message
+    log.sample(100, 'ws')                   # but only 1 of 100 of the DEBUG and INFO ones
+"""
+import logging
+import threading
+
+ROOT = 'zb'
+
+# The subsystems, each logs to zb.<subsystem>
+REST = 'rest'  # rest requests and responses
+SIGN = 'sign'  # the signed strings
+WS = 'ws'  # websocket connections and messages
+ACCOUNT = 'ws.account'  # the private websocket channels
+WATCH_DOG = 'watchdog'
+DISPATCH = 'dispatch'
+TIMER = 'timer'
+SUBSYSTEMS = (REST, SIGN, WS, ACCOUNT, WATCH_DOG, DISPATCH, TIMER)
+
+FORMAT = '%(asctime)s - %(name)s - %(funcName)s - %(levelname)s - %(message)s'
+
+
+def get_logger(subsystem=None) -> logging.Logger:
+    return logging.getLogger(ROOT + '.' + subsystem if subsystem else ROOT)
+
+
+def set_level(level, subsystem=None):
+    """
+    Set the level of a subsystem, of all of them if ``subsystem`` is None.
+    """
+    get_logger(subsystem).setLevel(level)
+
+
+def enable(level=logging.INFO, subsystem=None, fmt=FORMAT):
+    """
+    Write the messages of a subsystem, of all of them by default, to stderr.
+
+    :return: The handler added.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt))
+    logger = get_logger(subsystem)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets 1 of every ``every`` records up to ``max_level`` through, the records above it are never dropped.
+    """
+
+    def __init__(self, every, max_level=logging.INFO):
+        super().__init__()
+        self.every = every
+        self.max_level = max_level
+        self.seen = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        with self._lock:
+            self.seen += 1
+            if (self.seen - 1) % self.every == 0:
+                return True
+            self.dropped += 1
+            return False
+
+
+def sample(every, subsystem=None, max_level=logging.INFO):
+    """
+    Sample the DEBUG and INFO records logged by a subsystem, by every subsystem if None, replacing the sampling set
+    before. A logger filter does not see the records of its children, so zb.ws and zb.ws.account are sampled
+    separately.
+
+    :return: The SamplingFilter, None if ``every`` is 1 or less and sampling was only removed.
+    """
+    sampling = SamplingFilter(every, max_level) if every > 1 else None
+    for name in ([subsystem] if subsystem else SUBSYSTEMS):
+        logger = get_logger(name)
+        for f in list(logger.filters):
+            if isinstance(f, SamplingFilter):
+                logger.removeFilter(f)
+        if sampling is not None:
+            logger.addFilter(sampling)
+    return sampling
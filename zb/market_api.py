@@ -4,33 +4,52 @@ Market Data Api
 from typing import List
 
 from zb import ApiClient
+from zb.client import api_method
 from zb.model.market import *
 from zb.model.constant import *
+from zb.model.columnar import parse_klines
 
 
 class MarketApi(ApiClient):
-    def __init__(self, api_host=None):
-        describe = {
-            'apis': {
-                'public': {
-                    'get': {
-                        'market_list': ' /Server/api/v2/config/marketList',
-                        'kline': '/api/public/v1/kline',
-                        'ticker': '/api/public/v1/ticker',
-                        'depth': '/api/public/v1/depth',
-                        'trade': '/api/public/v1/trade',
-                        'mark_price': '/api/public/v1/markPrice',
-                        'index_price': '/api/public/v1/indexPrice',
-                        'spot_price': '/api/public/v1/spotPrice',
-                        'mark_kline': '/api/public/v1/markKline',
-                        'index_kline': '/api/public/v1/indexKline',
-                    },
+    fast_models = False  # parse depth entries, klines, trades and tickers into the immutable FastModels
+
+    describe = {
+        'apis': {
+            'public': {
+                'get': {
+                    'market_list': ' /Server/api/v2/config/marketList',
+                    'kline': '/api/public/v1/kline',
+                    'ticker': '/api/public/v1/ticker',
+                    'depth': '/api/public/v1/depth',
+                    'trade': '/api/public/v1/trade',
+                    'mark_price': '/api/public/v1/markPrice',
+                    'index_price': '/api/public/v1/indexPrice',
+                    'spot_price': '/api/public/v1/spotPrice',
+                    'mark_kline': '/api/public/v1/markKline',
+                    'index_kline': '/api/public/v1/indexKline',
                 },
-            }
+            },
         }
-
-        super().__init__(api_host=api_host, config=describe)
-
+    }
+
+    def __init__(self, api_host=None, session_pool=None, rate_limiter=None, fast_models=None, instrumentation=None,
+                 clock_sync=None):
+        config = dict(self.describe)
+        if session_pool is not None:
+            config['session_pool'] = session_pool
+        if rate_limiter is not None:
+            config['rate_limiter'] = rate_limiter
+        if instrumentation is not None:
+            config['instrumentation'] = instrumentation
+        if clock_sync is not None:
+            config['clock_sync'] = clock_sync
+        if fast_models is not None:
+            config['fast_models'] = fast_models
+
+        super().__init__(api_host=api_host, config=config)
+        self.models = market_models(self.fast_models)
+
+    @api_method
     def get_market_list(self, futures_account_type=FuturesAccountType.BASE_USDT) -> List[Market]:
         """
         6.1 交易对
@@ -41,10 +60,11 @@ class MarketApi(ApiClient):
         params = {
             'futuresAccountType': futures_account_type.value,
         }
-        data_array = self.public_get_market_list(params)
+        data_array = yield self.public_get_market_list(params)
 
         return [Market(**item) for item in data_array]
 
+    @api_method
     def get_depth(self, symbol: str, scale=None, size=5) -> Depth:
         """
         6.2 全量深度
@@ -61,17 +81,19 @@ class MarketApi(ApiClient):
         if scale:
             params["scale"] = scale
 
-        result = self.public_get_depth(params)
+        result = yield self.public_get_depth(params)
 
-        return Depth(**result)
+        return Depth(entry_class=self.models.DepthEntry, **result)
 
-    def get_kline(self, symbol: str, interval=Interval.MIN_15, size=10) -> List[Kline]:
+    @api_method
+    def get_kline(self, symbol: str, interval=Interval.MIN_15, size=10, columnar=False) -> List[Kline]:
         """
         6.3  k 线
 
         :param symbol:      交易对，如：BTC_USDT
         :param interval:    不种时间的kline。可选范围:1M,5M,15M, 30M, 1H, 6H, 1D, 5D。M代表分钟，H代表小时，D代表天。
         :param size:        最大值为1440
+        :param columnar:    返回 NumPy 结构化数组，按列读取 open, high, low, close, volume, timestamp，需要安装 numpy
         :return:
         """
         params = {
@@ -80,10 +102,14 @@ class MarketApi(ApiClient):
             'size': size,
 
         }
-        data_array = self.public_get_kline(params)
+        data_array = yield self.public_get_kline(params)
+
+        if columnar:
+            return parse_klines(data_array)
 
-        return [Kline.json_parse(e) for e in data_array]
+        return [self.models.Kline.json_parse(e) for e in data_array]
 
+    @api_method
     def get_trade(self, symbol: str, size=50) -> List[Trade]:
         """
         6.4 成交记录
@@ -97,10 +123,11 @@ class MarketApi(ApiClient):
             'size': size
         }
 
-        data_array = self.public_get_trade(params)
+        data_array = yield self.public_get_trade(params)
 
-        return [Trade.json_parse(data_object) for data_object in data_array]
+        return [self.models.Trade.json_parse(data_object) for data_object in data_array]
 
+    @api_method
     def get_ticker(self, symbol=None):
         params = {
         }
@@ -108,14 +135,15 @@ class MarketApi(ApiClient):
         if symbol:
             params['symbol'] = symbol.upper()
 
-        result = self.public_get_ticker(params)
+        result = yield self.public_get_ticker(params)
 
         ticker = {}
         for k, v in result.items():
-            ticker[k] = Ticker.json_parse(v)
+            ticker[k] = self.models.Ticker.json_parse(v)
 
         return ticker
 
+    @api_method
     def get_mark_price(self, symbol=None):
         """
         6.6  最新标记价格
@@ -128,8 +156,9 @@ class MarketApi(ApiClient):
         if symbol:
             params['symbol'] = symbol.upper()
 
-        return self.public_get_mark_price(params)
+        return (yield self.public_get_mark_price(params))
 
+    @api_method
     def get_index_price(self, symbol=None):
         """
         6.7  最新指数价格
@@ -142,8 +171,9 @@ class MarketApi(ApiClient):
         if symbol:
             params['symbol'] = symbol.upper()
 
-        return self.public_get_index_price(params)
+        return (yield self.public_get_index_price(params))
 
+    @api_method
     def get_spot_price(self, symbol=None, is_buy=True):
         """
         6.10 zb现货兑换价格
@@ -158,14 +188,16 @@ class MarketApi(ApiClient):
         if symbol:
             params['symbol'] = symbol.upper()
 
-        return self.public_get_spot_price(params)
+        return (yield self.public_get_spot_price(params))
 
-    def get_mark_kline(self, symbol: str, interval=Interval.MIN_15, size=10) -> List[Kline]:
+    @api_method
+    def get_mark_kline(self, symbol: str, interval=Interval.MIN_15, size=10, columnar=False) -> List[Kline]:
         """
         6.8  标记价格k 线
         :param symbol:      交易对，如：BTC_USDT
         :param interval:    不种时间的kline。可选范围:1M,5M,15M, 30M, 1H, 6H, 1D, 5D。M代表分钟，H代表小时，D代表天。
         :param size:        最大值为1440
+        :param columnar:    返回 NumPy 结构化数组，按列读取 open, high, low, close, volume, timestamp，需要安装 numpy
         :return:
         """
         params = {
@@ -174,16 +206,21 @@ class MarketApi(ApiClient):
             'size': size,
 
         }
-        data_array = self.public_get_mark_kline(params)
+        data_array = yield self.public_get_mark_kline(params)
 
-        return [Kline.json_parse(e) for e in data_array]
+        if columnar:
+            return parse_klines(data_array)
 
-    def get_index_kline(self, symbol: str, interval=Interval.MIN_15, size=10) -> List[Kline]:
+        return [self.models.Kline.json_parse(e) for e in data_array]
+
+    @api_method
+    def get_index_kline(self, symbol: str, interval=Interval.MIN_15, size=10, columnar=False) -> List[Kline]:
         """
         6.9  指数价格k 线
         :param symbol:      交易对，如：BTC_USDT
         :param interval:    不种时间的kline。可选范围:1M,5M,15M, 30M, 1H, 6H, 1D, 5D。M代表分钟，H代表小时，D代表天。
         :param size:        最大值为1440
+        :param columnar:    返回 NumPy 结构化数组，按列读取 open, high, low, close, volume, timestamp，需要安装 numpy
         :return: dict
         """
         params = {
@@ -192,6 +229,9 @@ class MarketApi(ApiClient):
             'size': size,
 
         }
-        data_array = self.public_get_index_kline(params)
+        data_array = yield self.public_get_index_kline(params)
+
+        if columnar:
+            return parse_klines(data_array)
 
-        return [Kline.json_parse(e) for e in data_array]
+        return [self.models.Kline.json_parse(e) for e in data_array]
@@ -0,0 +1,247 @@
+"""
+Latency instrumentation of the rest and websocket paths
+"""
+import threading
+import time
+from collections import defaultdict
+
+# The phases of a rest request reported to Instrumentation.on_rest
+REST_PHASES = ('sign', 'serialize', 'network', 'parse')
+
+
+class Instrumentation(object):
+    """
+    The hooks the clients call when instrumented, every duration is in nanoseconds. Subclass it and override the
+    hooks of interest, or use MetricsCollector. Clients without instrumentation skip the timing entirely.
+
+        collector = MetricsCollector()
+        api = MarketApi(instrumentation=collector)
+        client = MarketClient(instrumentation=collector)
+
+    The hooks are called on the thread doing the work, the socket reader or dispatch worker for the websocket hooks.
+    """
+
+    def on_rest(self, api, method, path, timings, status=None, error=None):
+        """
+        :param timings: Dict of the phases measured, see REST_PHASES. A failed request lacks the later phases.
+        :param status:  The http status, None if no response was received.
+        :param error:   The exception raised to the caller, None on success.
+        """
+
+    def on_frame(self, channel, parse_ns, callback_ns):
+        """
+        A message of the channel was parsed and handed to its callback.
+        """
+
+    def on_lag(self, channel, lag_ms):
+        """
+        The time from the exchange timestamp of a Trade, Ticker or Depth message to its receipt. The exchange
+        stamps trades and tickers in seconds, so their lag is accurate to a second. With a ClockSync on the client
+        the lag is corrected by the estimated clock offset, otherwise it includes the offset.
+        """
+
+    def on_reconnect(self, url):
+        """
+        A connection is reconnecting after it was lost or went silent.
+        """
+
+
+def exchange_time_ms(json_wrapper):
+    """
+    The exchange timestamp of a market message in milliseconds, None for channels without one.
+    """
+    channel = json_wrapper.get('channel') or ''
+    data = json_wrapper.get('data')
+    try:
+        if channel.endswith('.Trade'):
+            return int(data[-1][3]) * 1000
+        if channel.endswith('.Ticker') and isinstance(data, list):
+            return int(data[6]) * 1000
+        if '.Depth' in channel:
+            return int(data['time'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+class Histogram(object):
+    """
+    A log-linear histogram in the manner of HdrHistogram: values below 128 are counted exactly, larger ones in
+    buckets of 64 per power of two, so a recorded value is off by less than 1.6% and recording is a dict update.
+    """
+    SUB_BUCKETS = 64
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def _index(cls, value):
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 7
+        return (shift + 1) * cls.SUB_BUCKETS + (value >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def _value(cls, index):
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return (index % cls.SUB_BUCKETS + cls.SUB_BUCKETS) << shift
+
+    def record(self, value):
+        value = max(int(value), 0)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        :return: The highest value of the bucket holding ``percent`` of the recorded values, None if empty.
+        """
+        if not self.count:
+            return None
+        rank = max(percent / 100.0 * self.count, 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(self._value(index + 1) - 1, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'min': self.min,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'max': self.max,
+        }
+
+
+class MetricsCollector(Instrumentation):
+    """
+    Aggregates the hooks into histograms and counters, read them with summary() or as Prometheus text with
+    prometheus().
+    """
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        # Key: (endpoint, phase)
+        self.rest = defaultdict(Histogram)
+        # Key: endpoint
+        self.rest_errors = defaultdict(int)
+        # Key: channel
+        self.frames = defaultdict(int)
+        self.parse = defaultdict(Histogram)
+        self.callback = defaultdict(Histogram)
+        self.lag = defaultdict(Histogram)
+        # Key: url
+        self.reconnects = defaultdict(int)
+
+    def on_rest(self, api, method, path, timings, status=None, error=None):
+        endpoint = method + ' ' + path
+        with self._lock:
+            total = 0
+            for phase, value in timings.items():
+                self.rest[(endpoint, phase)].record(value)
+                total += value
+            self.rest[(endpoint, 'total')].record(total)
+            if error is not None:
+                self.rest_errors[endpoint] += 1
+
+    def on_frame(self, channel, parse_ns, callback_ns):
+        with self._lock:
+            self.frames[channel] += 1
+            self.parse[channel].record(parse_ns)
+            self.callback[channel].record(callback_ns)
+
+    def on_lag(self, channel, lag_ms):
+        with self._lock:
+            self.lag[channel].record(lag_ms)
+
+    def on_reconnect(self, url):
+        with self._lock:
+            self.reconnects[url] += 1
+
+    def frame_rates(self):
+        """
+        :return: Dict of channel: messages per second since the collector was created.
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        with self._lock:
+            return {channel: count / elapsed for channel, count in self.frames.items()}
+
+    def summary(self):
+        """
+        :return: Dict of the histogram summaries (nanoseconds, lag in milliseconds) and the counters.
+        """
+        rates = self.frame_rates()
+        with self._lock:
+            return {
+                'rest': {endpoint + ' ' + phase: h.summary() for (endpoint, phase), h in self.rest.items()},
+                'rest_errors': dict(self.rest_errors),
+                'frames': {channel: {'count': count, 'rate': rates.get(channel, 0),
+                                     'parse': self.parse[channel].summary(),
+                                     'callback': self.callback[channel].summary()}
+                           for channel, count in self.frames.items()},
+                'lag': {channel: h.summary() for channel, h in self.lag.items()},
+                'reconnects': dict(self.reconnects),
+            }
+
+    def prometheus(self, prefix='zb'):
+        """
+        The metrics in the Prometheus text exposition format, durations in seconds.
+        """
+        lines = []
+
+        def summary(name, help_text, histograms, scale):
+            if not histograms:
+                return
+            lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s summary' % (prefix, name))
+            for labels, histogram in histograms:
+                for quantile in self.QUANTILES:
+                    lines.append('%s_%s{%s,quantile="%s"} %.9g' % (prefix, name, labels, quantile,
+                                                                   histogram.percentile(quantile * 100) * scale))
+                lines.append('%s_%s_sum{%s} %.9g' % (prefix, name, labels, histogram.total * scale))
+                lines.append('%s_%s_count{%s} %d' % (prefix, name, labels, histogram.count))
+
+        def counter(name, help_text, label, values):
+            if not values:
+                return
+            lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s counter' % (prefix, name))
+            for key, value in values.items():
+                lines.append('%s_%s{%s="%s"} %d' % (prefix, name, label, _escape(key), value))
+
+        with self._lock:
+            summary('rest_seconds', 'Rest request time per endpoint and phase.',
+                    [('endpoint="%s",phase="%s"' % (_escape(endpoint), phase), h)
+                     for (endpoint, phase), h in sorted(self.rest.items())], 1e-9)
+            counter('rest_errors_total', 'Failed rest requests.', 'endpoint', self.rest_errors)
+            counter('ws_frames_total', 'Websocket messages handled per channel.', 'channel', self.frames)
+            summary('ws_parse_seconds', 'Websocket message parse time.',
+                    [('channel="%s"' % _escape(c), h) for c, h in sorted(self.parse.items())], 1e-9)
+            summary('ws_callback_seconds', 'Websocket callback time.',
+                    [('channel="%s"' % _escape(c), h) for c, h in sorted(self.callback.items())], 1e-9)
+            summary('ws_lag_seconds', 'Exchange timestamp to receive lag.',
+                    [('channel="%s"' % _escape(c), h) for c, h in sorted(self.lag.items())], 1e-3)
+            counter('ws_reconnects_total', 'Websocket reconnects.', 'url', self.reconnects)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
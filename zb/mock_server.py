@@ -0,0 +1,480 @@
+"""
+In-process stand-in of the exchange serving the rest endpoints and the websocket channels, for offline benchmarks and
+regression tests
+"""
+import asyncio
+import hashlib
+import itertools
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import formatdate
+
+try:
+    from aiohttp import web, WSMsgType
+except ImportError:
+    web = None
+
+from zb import json_codec
+from zb.account_api import AccountApi
+from zb.client import ApiClient
+from zb.errors import NotSupported
+from zb.market_api import MarketApi
+from zb.trade_api import TradeApi
+from zb.utils import Utils
+
+SUCCESS = 10000
+INVALID_SIGN = 10014
+INJECTED_ERROR = 9999
+
+
+class MockExchange(object):
+    """
+    Serves the endpoints declared by MarketApi, TradeApi and AccountApi and the /ws/public/v1 and
+    /ws/private/api/v2 channels (also under the /qc prefix) on 127.0.0.1, from an event loop on a daemon thread.
+
+    The private rest requests and the websocket login are checked with ApiClient.generate_sign against the
+    configured keys. The market data is a seeded random walk, orders are kept in memory.
+
+        with MockExchange(latency_ms=2, jitter_ms=1) as exchange:
+            api = MarketApi(api_host=exchange.url)
+            client = MarketClient(url=exchange.ws_url())
+
+    :member
+        latency_ms:         Delay added to every rest response and websocket answer.
+        jitter_ms:          The delay varies uniformly by up to this much.
+        error_rate:         Fraction of the rest and private websocket requests answered with an error.
+        push_interval_ms:   The period of the market data pushed to every public subscription.
+        clock_offset_ms:    How far the clock of the exchange is ahead of the local clock, applied to the Date header
+                            and the timestamps of the data.
+        timestamp_window_ms: Reject the private requests and logins stamped further than this from the exchange
+                            clock as an invalid sign, None to accept any timestamp.
+        requests:           Counter of the requests per path and channel.
+        errors:             The number of injected errors.
+    """
+
+    def __init__(self, api_key='mock-api-key', secret_key='mock-secret-key', latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, push_interval_ms=100, symbols=('BTC_USDT', 'ETH_USDT'), seed=None, clock_offset_ms=0,
+                 timestamp_window_ms=None):
+        if web is None:
+            raise NotSupported("The mock exchange requires aiohttp, run `pip install aiohttp`.")
+
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.push_interval_ms = push_interval_ms
+        self.clock_offset_ms = clock_offset_ms
+        self.timestamp_window_ms = timestamp_window_ms
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.requests = Counter()
+        self.errors = 0
+        self.orders = dict()
+        self.port = None
+
+        self._random = random.Random(seed)
+        self._prices = {symbol: 100.0 * (i + 1) for i, symbol in enumerate(self.symbols)}
+        self._order_ids = itertools.count(1)
+        self._sockets = set()
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.port
+
+    def ws_url(self, private=False):
+        return 'ws://127.0.0.1:%d%s' % (self.port, '/ws/private/api/v2' if private else '/ws/public/v1')
+
+    def start(self):
+        """
+        Bind a free port and serve until stop(), the port is set when this returns.
+        """
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start_site())
+            started.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='zb-mock-exchange', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    async def _start_site(self):
+        app = web.Application()
+        for api_class in (MarketApi, TradeApi, AccountApi):
+            for api_type, methods in api_class.describe['apis'].items():
+                for http_method, urls in methods.items():
+                    for alias, path in urls.items():
+                        handler = self._rest_handler(api_type, alias, path.strip())
+                        for prefix in ('', '/qc'):
+                            app.router.add_route(http_method.upper(), prefix + path.strip(), handler)
+        for prefix in ('', '/qc'):
+            app.router.add_get(prefix + '/ws/public/v1', self._public_socket)
+            app.router.add_get(prefix + '/ws/private/api/v2', self._private_socket)
+        app.on_shutdown.append(self._close_sockets)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def _close_sockets(self, app):
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _delay(self):
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            await asyncio.sleep(max(delay, 0) / 1000.0)
+
+    def _inject_error(self):
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+    def _now_ms(self):
+        """
+        The time of the exchange clock.
+        """
+        return Utils.milliseconds() + self.clock_offset_ms
+
+    def _in_window(self, timestamp):
+        if self.timestamp_window_ms is None:
+            return True
+        try:
+            stamped = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return False
+        return abs(stamped.timestamp() * 1000 - self._now_ms()) <= self.timestamp_window_ms
+
+    def _check_sign(self, timestamp, method, path, params, api_key, sign):
+        secret_key = hashlib.sha1(self.secret_key.encode('utf-8')).hexdigest()
+        return api_key == self.api_key and timestamp is not None and self._in_window(timestamp) and \
+            sign == ApiClient.generate_sign(timestamp, method, path, params, secret_key)
+
+    # ---------------------------------------------------------------- rest
+
+    def _rest_handler(self, api_type, alias, path):
+        build = getattr(self, '_rest_' + alias, None)
+
+        async def handler(request):
+            self.requests[path] += 1
+            await self._delay()
+            if request.method == 'GET':
+                params = dict(request.query)
+            else:
+                params = json_codec.loads(await request.read() or b'{}')
+
+            if api_type == 'private':
+                headers = request.headers
+                if not self._check_sign(headers.get('ZB-TIMESTAMP'), request.method, request.path, params,
+                                        headers.get('ZB-APIKEY'), headers.get('ZB-SIGN')):
+                    return self._response(None, INVALID_SIGN, 'Invalid sign')
+            if self._inject_error():
+                return self._response(None, INJECTED_ERROR, 'Injected error')
+
+            return self._response(build(params) if build is not None else {})
+
+        return handler
+
+    def _response(self, data, code=SUCCESS, desc='Success'):
+        return web.Response(body=json_codec.dumps({'code': code, 'desc': desc, 'data': data}),
+                            content_type='application/json',
+                            headers={'Date': formatdate(self._now_ms() / 1000.0, usegmt=True)})
+
+    def _price(self, symbol):
+        """
+        Step the random walk of the symbol.
+        """
+        symbol = symbol.upper() if symbol else self.symbols[0]
+        price = self._prices.get(symbol, 100.0) * (1 + self._random.gauss(0, 0.0005))
+        self._prices[symbol] = price
+        return round(price, 2)
+
+    def _depth_data(self, symbol, size=5):
+        price = self._price(symbol)
+        size = int(size)
+        return {
+            'asks': [[str(round(price + 0.01 * (i + 1), 2)), str(round(self._random.uniform(0.1, 5), 3))] for i in range(size)],
+            'bids': [[str(round(price - 0.01 * i, 2)), str(round(self._random.uniform(0.1, 5), 3))] for i in range(size)],
+            'time': str(self._now_ms()),
+        }
+
+    def _klines(self, symbol, size=10, volume=True):
+        now = self._now_ms() // 1000
+        klines = []
+        for i in range(int(size)):
+            close = self._price(symbol)
+            kline = [round(close * 0.999, 2), round(close * 1.002, 2), round(close * 0.998, 2), close]
+            if volume:
+                kline.append(round(self._random.uniform(1, 100), 3))
+            klines.append(kline + [now - (int(size) - 1 - i) * 60])
+        return klines
+
+    def _ticker_data(self, symbol):
+        close = self._price(symbol)
+        return [round(close * 0.99, 2), round(close * 1.01, 2), round(close * 0.98, 2), close, 1234.5, 0.01,
+                self._now_ms() // 1000]
+
+    def _trades(self, symbol, size=1):
+        return [[self._price(symbol), round(self._random.uniform(0.001, 1), 3), self._random.choice((1, -1)),
+                 self._now_ms() // 1000] for _ in range(int(size))]
+
+    def _prices_of(self, params):
+        symbol = params.get('symbol')
+        symbols = [symbol.upper()] if symbol else self.symbols
+        return {s: str(self._price(s)) for s in symbols}
+
+    def _rest_market_list(self, params):
+        return [{'id': 100 + i, 'symbol': symbol, 'marketName': symbol, 'buyerCurrencyName': symbol.split('_')[1],
+                 'sellerCurrencyName': symbol.split('_')[0], 'amountDecimal': 3, 'priceDecimal': 2, 'status': 1}
+                for i, symbol in enumerate(self.symbols)]
+
+    def _rest_depth(self, params):
+        return self._depth_data(params.get('symbol'), params.get('size', 5))
+
+    def _rest_kline(self, params):
+        return self._klines(params.get('symbol'), params.get('size', 10))
+
+    def _rest_mark_kline(self, params):
+        return self._klines(params.get('symbol'), params.get('size', 10), volume=False)
+
+    _rest_index_kline = _rest_mark_kline
+
+    def _rest_trade(self, params):
+        return self._trades(params.get('symbol'), params.get('size', 50))
+
+    def _rest_ticker(self, params):
+        symbol = params.get('symbol')
+        return {s: self._ticker_data(s) for s in ([symbol.upper()] if symbol else self.symbols)}
+
+    def _rest_mark_price(self, params):
+        return self._prices_of(params)
+
+    _rest_index_price = _rest_mark_price
+    _rest_spot_price = _rest_mark_price
+
+    def _rest_create_order(self, params):
+        order_id = str(next(self._order_ids))
+        self.orders[order_id] = {
+            'id': order_id,
+            'orderCode': params.get('clientOrderId'),
+            'symbol': params.get('symbol'),
+            'price': params.get('price'),
+            'amount': params.get('amount'),
+            'side': params.get('side'),
+            'action': params.get('action'),
+            'type': 1,
+            'status': 1,
+            'createTime': self._now_ms(),
+        }
+        return order_id
+
+    def _find_order(self, params):
+        order_id = params.get('orderId')
+        if order_id is not None:
+            return self.orders.get(str(order_id))
+        for order in self.orders.values():
+            if order['orderCode'] == params.get('clientOrderId'):
+                return order
+        return None
+
+    def _rest_cancel_order(self, params):
+        order = self._find_order(params)
+        if order is not None:
+            order['status'] = 4
+            return order['id']
+        return None
+
+    def _rest_order(self, params):
+        return self._find_order(params) or {}
+
+    def _rest_undone_orders(self, params):
+        return {'list': [order for order in self.orders.values() if order['status'] == 1]}
+
+    def _rest_all_orders(self, params):
+        return {'list': list(self.orders.values())}
+
+    def _rest_cancel_all_orders(self, params):
+        cancelled = []
+        for order in self.orders.values():
+            if order['status'] == 1:
+                order['status'] = 4
+                cancelled.append({'orderId': order['id'], 'code': SUCCESS})
+        return cancelled
+
+    def _rest_trade_list(self, params):
+        return {'list': []}
+
+    def _rest_account(self, params):
+        return {
+            'account': {'accountBalance': '10000', 'allMargin': '0', 'available': '10000', 'freeze': '0',
+                        'allUnrealizedPnl': '0'},
+            'assets': [{'currencyName': 'usdt', 'amount': '10000', 'freezeAmount': '0'}],
+        }
+
+    def _rest_positions(self, params):
+        return []
+
+    def _rest_bill(self, params):
+        return {'list': []}
+
+    def _rest_balance(self, params):
+        return [{'currencyName': 'usdt', 'amount': '10000', 'freezeAmount': '0'}]
+
+    # ----------------------------------------------------------- websocket
+
+    def _market_data(self, channel, size=5):
+        """
+        The data of one push of a public channel.
+        """
+        name, _, kind = channel.split('@')[0].partition('.')
+        if kind == 'DepthWhole':
+            return self._depth_data(name, size)
+        if kind == 'Depth':
+            return self._depth_data(name, 1)
+        if kind.startswith('KLine_'):
+            return self._klines(name, 1)
+        if kind.startswith('mark_') or kind.startswith('index_'):
+            return self._klines(name, 1, volume=False)
+        if kind == 'Trade':
+            return self._trades(name)
+        if kind == 'Ticker':
+            return {s: self._ticker_data(s) for s in self.symbols} if name == 'All' else self._ticker_data(name)
+        if kind in ('mark', 'index'):
+            prices = self._prices_of({})
+            return prices if name == 'All' else prices.get(name, str(self._price(name)))
+        if kind == 'FundingRate':
+            return {'fundingRate': '0.0001', 'nextCalculateTime': self._now_ms() + 3600000}
+        if kind.endswith('SpotPrice'):
+            return str(self._price(name))
+        return {}
+
+    async def _serve_socket(self, request, on_message, background=None):
+        """
+        Answer pings and hand every other text message to ``on_message(ws, data)``, ``background(ws)`` runs while
+        the socket is open.
+        """
+        ws = web.WebSocketResponse(compress=True)
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        task = asyncio.ensure_future(background(ws)) if background is not None else None
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                data = json_codec.loads(message.data)
+                if data.get('action') == 'ping':
+                    await ws.send_str('{"action":"pong"}')
+                    continue
+                await on_message(ws, data)
+        finally:
+            self._sockets.discard(ws)
+            if task is not None:
+                task.cancel()
+        return ws
+
+    async def _public_socket(self, request):
+        # Key: channel, Value: size
+        subscriptions = dict()
+
+        async def push(ws):
+            while True:
+                await asyncio.sleep(self.push_interval_ms / 1000.0)
+                for channel, size in list(subscriptions.items()):
+                    await ws.send_str(json_codec.dumps({'channel': channel, 'data': self._market_data(channel, size)}))
+
+        async def on_message(ws, data):
+            channel = data.get('channel')
+            self.requests[channel] += 1
+            if data.get('action') == 'unsubscribe':
+                subscriptions.pop(channel, None)
+                return
+            if data.get('action') != 'subscribe':
+                return
+            size = data.get('size') or 5
+            subscriptions[channel] = size
+            await self._delay()
+            message = {'channel': channel, 'data': self._market_data(channel, size)}
+            if '.DepthWhole' in channel or '.KLine_' in channel:
+                message['type'] = 'Whole'
+            await ws.send_str(json_codec.dumps(message))
+
+        return await self._serve_socket(request, on_message, push)
+
+    async def _private_socket(self, request):
+        logged_in = False
+        # WsAccountClient channel: rest handler building the same data
+        builders = {
+            'Fund.getAccount': self._rest_account,
+            'Fund.balance': self._rest_balance,
+            'Fund.getBill': self._rest_bill,
+            'Positions.getPositions': self._rest_positions,
+            'Trade.getOrder': self._rest_order,
+            'trade.getUndoneOrders': self._rest_undone_orders,
+            'trade.getAllOrders': self._rest_all_orders,
+            'trade.getTradeList': self._rest_trade_list,
+            'Trade.order': self._rest_create_order,
+            'Trade.cancelOrder': self._rest_cancel_order,
+            'trade.cancelAllOrders': self._rest_cancel_all_orders,
+        }
+
+        async def on_message(ws, data):
+            nonlocal logged_in
+            channel = data.get('channel')
+            self.requests[channel] += 1
+            await self._delay()
+
+            if data.get('action') == 'login':
+                logged_in = self._check_sign(data.get('ZB-TIMESTAMP'), 'GET', 'login', None, data.get('ZB-APIKEY'),
+                                             data.get('ZB-SIGN'))
+                if logged_in:
+                    await ws.send_str(json_codec.dumps({'channel': 'login', 'data': 'success'}))
+                else:
+                    await ws.send_str(json_codec.dumps({'channel': 'login', 'errorCode': INVALID_SIGN,
+                                                        'errorMsg': 'Invalid sign'}))
+                return
+            if data.get('action') != 'subscribe':
+                return
+
+            response = {'channel': channel}
+            if 'id' in data:
+                response['id'] = data['id']
+            if not logged_in:
+                response.update(errorCode=INVALID_SIGN, errorMsg='Not logged in')
+            elif self._inject_error():
+                response.update(errorCode=INJECTED_ERROR, errorMsg='Injected error')
+            elif 'id' not in data:
+                # a push channel, the updates are pushed once there are any
+                return
+            else:
+                builder = builders.get(channel)
+                response['data'] = builder(data) if builder is not None else {}
+            await ws.send_str(json_codec.dumps(response))
+
+        return await self._serve_socket(request, on_message)
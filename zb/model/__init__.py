@@ -9,6 +9,11 @@ from zb.model.market import Depth
 from zb.model.market import DepthEntry
 from zb.model.market import Trade
 from zb.model.market import HistoricalTrade
+from zb.model.market import FastDepthEntry
+from zb.model.market import FastKline
+from zb.model.market import FastTrade
+from zb.model.market import FastTicker
+from zb.model.market import FastModels
 from zb.model.market import Trade
 
 __all__ = [
@@ -22,5 +27,10 @@ __all__ = [
     'DepthEntry',
     'Trade',
     'HistoricalTrade',
+    'FastDepthEntry',
+    'FastKline',
+    'FastTrade',
+    'FastTicker',
+    'FastModels',
     'Account'
 ]
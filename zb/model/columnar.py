@@ -0,0 +1,41 @@
+"""
+Columnar kline results backed by NumPy
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from zb.errors import NotSupported
+
+KLINE_DTYPE = numpy.dtype([('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+                           ('volume', 'f8'), ('timestamp', 'i8')]) if numpy is not None else None
+
+
+def parse_klines(json_arrays):
+    """
+    Parse the kline arrays of a response or an event in one vectorized pass.
+
+    :param json_arrays: [[open, high, low, close, volume, timestamp], ...], the mark and index klines carry no volume.
+    :return: A NumPy structured array with the fields open, high, low, close, volume and timestamp, a column is read
+             with e.g. ``klines['close']``. The volume is NaN for the mark and index klines.
+    """
+    if numpy is None:
+        raise NotSupported("Columnar klines require numpy, run `pip install numpy`.")
+
+    klines = numpy.empty(len(json_arrays), dtype=KLINE_DTYPE)
+    if not len(json_arrays):
+        return klines
+
+    values = numpy.array(json_arrays, dtype=numpy.float64)
+    klines['open'] = values[:, 0]
+    klines['high'] = values[:, 1]
+    klines['low'] = values[:, 2]
+    klines['close'] = values[:, 3]
+    if values.shape[1] == 6:
+        klines['volume'] = values[:, 4]
+        klines['timestamp'] = values[:, 5]
+    else:
+        klines['volume'] = numpy.nan
+        klines['timestamp'] = values[:, 4]
+    return klines
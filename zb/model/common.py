@@ -23,6 +23,9 @@ class ResultModel(dict):
         except KeyError:
             raise AttributeError(r"'%s' object has no attribute '%s'" % (self.__class__.__name__, key))
 
+    def to_dict(self) -> dict:
+        return dict(self)
+
 
 class Symbol(ResultModel):
     """
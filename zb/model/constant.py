@@ -134,6 +134,15 @@ class ConnectionState(Enum):
     CLOSED_ON_ERROR = 2
 
 
+class OverflowPolicy(Enum):
+    """
+    What a full dispatch queue does with a new message, see Dispatcher
+    """
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    CONFLATE = 'conflate'
+
+
 class Channel(Enum):
     WHOLE_DEPTH = "DepthWhole"
     DEPTH = "Depth"
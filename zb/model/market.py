@@ -1,6 +1,7 @@
 """
 Market Data
 """
+from collections import namedtuple
 from datetime import datetime
 
 from zb.model.common import ResultModel
@@ -58,11 +59,12 @@ class Depth(ResultModel):
         asks: The list of the ask depth. The content is DepthEntry class.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, entry_class=None, **kwargs):
         super().__init__(**kwargs)
 
-        self.asks = [DepthEntry(item[0], item[1]) for item in kwargs['asks']]
-        self.bids = [DepthEntry(item[0], item[1]) for item in kwargs['bids']]
+        json_parse = (entry_class or DepthEntry).json_parse
+        self.asks = [json_parse(item) for item in kwargs['asks']]
+        self.bids = [json_parse(item) for item in kwargs['bids']]
 
 
 class DepthEntry(ResultModel):
@@ -79,6 +81,10 @@ class DepthEntry(ResultModel):
         self.price = float(price)
         self.amount = float(amount)
 
+    @staticmethod
+    def json_parse(json_array):
+        return DepthEntry(json_array[0], json_array[1])
+
 
 class Kline(ResultModel):
     """
@@ -235,3 +241,108 @@ class HistoricalTrade(ResultModel):
         self.date = ''
 
         super().__init__(**kwargs)
+
+
+class _FastModel(tuple):
+    """
+    The base of the immutable tuple backed models, fields are read by attribute or index and no per instance dict
+    is allocated.
+    """
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return dict(zip(self._fields, self))
+
+
+class _Timestamped(object):
+    """
+    trade_time of the fast models with a timestamp field.
+    """
+    __slots__ = ()
+
+    def trade_time(self):
+        """
+        Format the trade timestamp as 'yyyy-MM-dd HH:mm:ss'
+        :return: time string
+        """
+        if self.timestamp:
+            return datetime.fromtimestamp(self.timestamp)
+
+
+class FastDepthEntry(_FastModel, namedtuple('FastDepthEntry', 'price amount')):
+    """
+    Immutable DepthEntry.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def json_parse(cls, json_array):
+        return tuple.__new__(cls, (float(json_array[0]), float(json_array[1])))
+
+
+class FastKline(_Timestamped, _FastModel, namedtuple('FastKline', 'open high low close volume timestamp')):
+    """
+    Immutable Kline, volume is None for the mark and index klines.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def json_parse(cls, json_array):
+        if len(json_array) == 6:
+            volume = float(json_array[4])
+            timestamp = int(json_array[5])
+        else:
+            volume = None
+            timestamp = int(json_array[4])
+        return tuple.__new__(cls, (float(json_array[0]), float(json_array[1]), float(json_array[2]),
+                                   float(json_array[3]), volume, timestamp))
+
+
+class FastTrade(_Timestamped, _FastModel, namedtuple('FastTrade', 'price amount side timestamp')):
+    """
+    Immutable Trade.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def json_parse(cls, json_array):
+        return tuple.__new__(cls, (float(json_array[0]), float(json_array[1]),
+                                   'buy' if int(json_array[2]) == 1 else 'sell', int(json_array[3])))
+
+
+class FastTicker(_Timestamped, _FastModel, namedtuple('FastTicker', 'open high low close volume rate timestamp closeCny')):
+    """
+    Immutable Ticker, closeCny is None when the server does not send it.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def json_parse(cls, json_array):
+        return tuple.__new__(cls, (float(json_array[0]), float(json_array[1]), float(json_array[2]),
+                                   float(json_array[3]), float(json_array[4]), float(json_array[5]),
+                                   int(json_array[6]), float(json_array[7]) if len(json_array) == 8 else None))
+
+
+class Models(object):
+    """
+    The classes the hot market data is parsed into.
+    """
+    DepthEntry = DepthEntry
+    Kline = Kline
+    Trade = Trade
+    Ticker = Ticker
+
+
+class FastModels(object):
+    """
+    The immutable tuple backed models, several times cheaper to build than the ResultModel ones. Use
+    ``to_dict()`` where a dict is expected.
+    """
+    DepthEntry = FastDepthEntry
+    Kline = FastKline
+    Trade = FastTrade
+    Ticker = FastTicker
+
+
+def market_models(fast=False):
+    return FastModels if fast else Models
@@ -1,4 +1,8 @@
+from collections.abc import Mapping, Sequence
+from functools import cached_property
+
 from zb.model import *
+from zb.model.columnar import parse_klines
 from zb.model.common import ResultModel
 from zb.utils import Utils
 
@@ -9,39 +13,218 @@ class Event(ResultModel):
         self.data = kwargs['data']
 
 class DepthEvent(Event):
-    def __init__(self, **kwargs):
+    def __init__(self, model_class=None, **kwargs):
         super().__init__(**kwargs)
 
         data = kwargs['data']
-        self.asks = [DepthEntry(item[0], item[1]) for item in data['asks']] if 'asks' in data else None
-        self.bids = [DepthEntry(item[0], item[1]) for item in data['bids']] if 'bids' in data else None
+        json_parse = (model_class or DepthEntry).json_parse
+        self.asks = [json_parse(item) for item in data['asks']] if 'asks' in data else None
+        self.bids = [json_parse(item) for item in data['bids']] if 'bids' in data else None
 
 
 class KlineEvent(Event):
-    def __init__(self, **kwargs):
+    def __init__(self, model_class=None, columnar=False, **kwargs):
         super().__init__(**kwargs)
         self.isWhole = 'type' in kwargs and kwargs['type'] == 'Whole'
-        self.data = [Kline.json_parse(item) for item in kwargs['data']]
+        if columnar:
+            self.data = parse_klines(kwargs['data'])
+        else:
+            json_parse = (model_class or Kline).json_parse
+            self.data = [json_parse(item) for item in kwargs['data']]
 
 class TradeEvent(Event):
-    def __init__(self, **kwargs):
+    def __init__(self, model_class=None, **kwargs):
         super().__init__(**kwargs)
         self.channel = kwargs['channel']
-        self.data = [Trade.json_parse(item) for item in kwargs['data']]
+        json_parse = (model_class or Trade).json_parse
+        self.data = [json_parse(item) for item in kwargs['data']]
 
 
 class TickerEvent(Event):
-    def __init__(self, **kwargs):
+    def __init__(self, model_class=None, **kwargs):
         super().__init__(**kwargs)
 
         self.channel = kwargs['channel']
-        self.data = Ticker.json_parse(kwargs['data'])
+        self.data = (model_class or Ticker).json_parse(kwargs['data'])
 
 class AllTickerEvent(Event):
-    def __init__(self, **kwargs):
+    def __init__(self, model_class=None, **kwargs):
         super().__init__(**kwargs)
 
         self.channel = kwargs['channel']
         self.data = {}
+        json_parse = (model_class or Ticker).json_parse
         for k, v in kwargs['data'].items():
-            self.data[k] = Ticker.json_parse(v)
+            self.data[k] = json_parse(v)
+
+
+class LazyList(Sequence):
+    """
+    A list of raw json arrays parsing each item on first access.
+    """
+    __slots__ = ('_items', '_json_parse', '_cache')
+
+    def __init__(self, items, json_parse):
+        self._items = items
+        self._json_parse = json_parse
+        self._cache = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        if self._cache is None:
+            self._cache = [None] * len(self._items)
+        item = self._cache[index]
+        if item is None:
+            item = self._cache[index] = self._json_parse(self._items[index])
+        return item
+
+    def __eq__(self, other):
+        return isinstance(other, (list, LazyList)) and list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class LazyMapping(Mapping):
+    """
+    A dict of raw json values parsing each value on first access.
+    """
+    __slots__ = ('_items', '_json_parse', '_cache')
+
+    def __init__(self, items, json_parse):
+        self._items = items
+        self._json_parse = json_parse
+        self._cache = dict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = self._json_parse(self._items[key])
+            return value
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LazyEvent(object):
+    """
+    The event of a market channel wrapping the decoded message, the models are only built for the attributes read
+    by the callback and at most once. The attributes are the same as the ones of the eager event.
+
+    :member
+        raw: The decoded message.
+    """
+
+    def __init__(self, model_class=None, **kwargs):
+        self.raw = kwargs
+        self.model_class = model_class
+
+    @cached_property
+    def channel(self):
+        return Utils.safe_string(self.raw, 'channel')
+
+    @cached_property
+    def data(self):
+        return self.raw['data']
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict:
+        return dict(self.raw)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.raw)
+
+
+class LazyDepthEvent(LazyEvent):
+    @cached_property
+    def asks(self):
+        data = self.raw['data']
+        return LazyList(data['asks'], (self.model_class or DepthEntry).json_parse) if 'asks' in data else None
+
+    @cached_property
+    def bids(self):
+        data = self.raw['data']
+        return LazyList(data['bids'], (self.model_class or DepthEntry).json_parse) if 'bids' in data else None
+
+
+class LazyKlineEvent(LazyEvent):
+    def __init__(self, model_class=None, columnar=False, **kwargs):
+        super().__init__(model_class, **kwargs)
+        self.columnar = columnar
+
+    @cached_property
+    def isWhole(self):
+        return self.raw.get('type') == 'Whole'
+
+    @cached_property
+    def data(self):
+        if self.columnar:
+            return parse_klines(self.raw['data'])
+        return LazyList(self.raw['data'], (self.model_class or Kline).json_parse)
+
+
+class LazyTradeEvent(LazyEvent):
+    @cached_property
+    def data(self):
+        return LazyList(self.raw['data'], (self.model_class or Trade).json_parse)
+
+
+class LazyTickerEvent(LazyEvent):
+    @cached_property
+    def data(self):
+        return (self.model_class or Ticker).json_parse(self.raw['data'])
+
+
+class LazyAllTickerEvent(LazyEvent):
+    @cached_property
+    def data(self):
+        return LazyMapping(self.raw['data'], (self.model_class or Ticker).json_parse)
+
+
+class Events(object):
+    """
+    The events the market channels are parsed into.
+    """
+    DepthEvent = DepthEvent
+    KlineEvent = KlineEvent
+    TradeEvent = TradeEvent
+    TickerEvent = TickerEvent
+    AllTickerEvent = AllTickerEvent
+
+
+class LazyEvents(object):
+    """
+    The events parsing the message on access, cheaper when the callback reads a few fields of large messages.
+    The lists and dicts of models are read-only sequences and mappings.
+    """
+    DepthEvent = LazyDepthEvent
+    KlineEvent = LazyKlineEvent
+    TradeEvent = LazyTradeEvent
+    TickerEvent = LazyTickerEvent
+    AllTickerEvent = LazyAllTickerEvent
+
+
+def market_events(lazy=False):
+    return LazyEvents if lazy else Events
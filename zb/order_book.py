@@ -0,0 +1,285 @@
+"""
+Local order book maintained from the depth channels
+"""
+import threading
+from bisect import bisect_left, insort
+
+from zb import log
+from zb.utils import Utils
+
+
+class BookSide(object):
+    """
+    The price levels of one side of the book, kept sorted from the best price.
+
+    Prices are stored as sort keys in a list searched by bisection and the amounts in a dict. Changing the amount of
+    an existing level, the common update, is a dict assignment. Adding or removing a level is a O(log n) search plus
+    a O(n) shift of the list, a memmove of pointers which outruns a Python tree for books of thousands of levels.
+    No object is allocated per level.
+    """
+
+    def __init__(self, descending=False):
+        self._sign = -1.0 if descending else 1.0
+        self._keys = []
+        self.levels = dict()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        del self._keys[:]
+        self.levels.clear()
+
+    def update(self, price, amount):
+        """
+        Set the amount of a price level, an amount of 0 removes the level.
+        """
+        if amount > 0:
+            if price not in self.levels:
+                insort(self._keys, price * self._sign)
+            self.levels[price] = amount
+        elif price in self.levels:
+            del self.levels[price]
+            del self._keys[bisect_left(self._keys, price * self._sign)]
+
+    def truncate(self, depth):
+        while len(self._keys) > depth:
+            del self.levels[self._keys.pop() * self._sign]
+
+    def best(self):
+        """
+        :return: (price, amount) of the best level, None if the side is empty
+        """
+        if not self._keys:
+            return None
+        price = self._keys[0] * self._sign
+        return price, self.levels[price]
+
+    def best_price(self):
+        return self._keys[0] * self._sign if self._keys else None
+
+    def top(self, n):
+        """
+        :return: list of (price, amount) of the n best levels
+        """
+        sign = self._sign
+        levels = self.levels
+        return [(key * sign, levels[key * sign]) for key in self._keys[:n]]
+
+    def vwap(self, size):
+        """
+        The average price of filling ``size`` against this side.
+
+        :return: The volume weighted price, None if the side holds less than ``size``.
+        """
+        remaining = size
+        notional = 0.0
+        sign = self._sign
+        levels = self.levels
+        for key in self._keys:
+            price = key * sign
+            amount = levels[price]
+            if amount >= remaining:
+                notional += price * remaining
+                return notional / size
+            notional += price * amount
+            remaining -= amount
+        return None
+
+
+class OrderBook(object):
+    """
+    The order book of one symbol, seeded from a depth snapshot and updated in place by incremental depth messages.
+
+    :member
+        symbol:             The symbol, like "BTC_USDT".
+        asks:               BookSide, ascending by price.
+        bids:               BookSide, descending by price.
+        timestamp:          The server time of the last applied message.
+        last_update_time:   The local time in millisecond of the last applied message.
+        max_depth:          Keep at most this many levels per side, None to keep all.
+        stale_ms:           The book is stale if no message was applied within this time, 0 disables the check.
+        is_synced:          False until a snapshot is applied, and again once a gap is detected.
+    """
+
+    def __init__(self, symbol, max_depth=None, stale_ms=60000):
+        self.symbol = symbol.upper()
+        self.asks = BookSide()
+        self.bids = BookSide(descending=True)
+        self.timestamp = None
+        self.last_update_time = 0
+        self.max_depth = max_depth
+        self.stale_ms = stale_ms
+        self.is_synced = False
+        self.update_count = 0
+        self.resync_count = 0
+        self.dropped_count = 0
+        self.lock = threading.RLock()
+        # The incremental updates received while a snapshot is loading, None if none is
+        self._buffer = None
+
+    def apply_snapshot(self, asks, bids, timestamp=None):
+        """
+        Replace the whole book.
+
+        :param asks:        [[price, amount], ...]
+        :param bids:        [[price, amount], ...]
+        :param timestamp:   The server time of the snapshot.
+        """
+        with self.lock:
+            self.asks.clear()
+            self.bids.clear()
+            self._apply_levels(asks, bids)
+            self.timestamp = timestamp
+            self.last_update_time = Utils.milliseconds()
+            self.is_synced = True
+
+    def apply_update(self, asks, bids, timestamp=None):
+        """
+        Apply incremental level changes, a level with amount 0 is removed.
+
+        An update older than the last applied message, e.g. one already contained in a rest snapshot, is dropped.
+        An update leaving the book crossed marks it out of sync.
+        """
+        with self.lock:
+            if timestamp is not None and self.timestamp is not None and timestamp < self.timestamp:
+                self.dropped_count += 1
+                return
+            self._apply_levels(asks, bids)
+            if timestamp is not None:
+                self.timestamp = timestamp
+            self.last_update_time = Utils.milliseconds()
+            self.update_count += 1
+            if self.is_crossed():
+                self.is_synced = False
+
+    def _apply_levels(self, asks, bids):
+        if asks:
+            update = self.asks.update
+            for item in asks:
+                update(float(item[0]), float(item[1]))
+        if bids:
+            update = self.bids.update
+            for item in bids:
+                update(float(item[0]), float(item[1]))
+        if self.max_depth:
+            self.asks.truncate(self.max_depth)
+            self.bids.truncate(self.max_depth)
+
+    def apply(self, json_wrapper):
+        """
+        Apply a message of the Depth or DepthWhole channel.
+        """
+        channel = Utils.safe_string(json_wrapper, 'channel', '')
+        data = json_wrapper['data']
+        timestamp = Utils.safe_integer(data, 'time')
+        if json_wrapper.get('type') == 'Whole' or '.DepthWhole' in channel:
+            self.apply_snapshot(data.get('asks'), data.get('bids'), timestamp)
+            return
+        with self.lock:
+            if self._buffer is not None:
+                self._buffer.append((data.get('asks'), data.get('bids'), timestamp))
+            else:
+                self.apply_update(data.get('asks'), data.get('bids'), timestamp)
+
+    def seed(self, market_api, size=200):
+        """
+        Load the book from the rest api, used for the first snapshot and to resync after a gap. The incremental
+        updates applied meanwhile are buffered and replayed on top of the snapshot.
+
+        :param market_api: MarketApi
+        :param size:       The number of levels to load, max 200.
+        """
+        with self.lock:
+            if self._buffer is None:
+                self._buffer = []
+        try:
+            depth = market_api.get_depth(self.symbol, size=size)
+        except Exception:
+            with self.lock:
+                self._buffer = None
+            raise
+        with self.lock:
+            if self.timestamp is not None:
+                self.resync_count += 1
+            self.apply_snapshot([(e.price, e.amount) for e in depth.asks],
+                                [(e.price, e.amount) for e in depth.bids],
+                                Utils.safe_integer(depth, 'time'))
+            buffer, self._buffer = self._buffer, None
+            for asks, bids, timestamp in buffer:
+                self.apply_update(asks, bids, timestamp)
+
+    def seed_in_background(self, market_api, size=200, error_handler=None):
+        """
+        seed on a worker thread, so the websocket thread applying the messages is not blocked by the rest request.
+
+        :param error_handler: Called with the exception if the snapshot cannot be loaded, it is logged without.
+        :return: False if a snapshot is already loading.
+        """
+        with self.lock:
+            if self._buffer is not None:
+                return False
+            self._buffer = []
+        threading.Thread(target=self._seed, args=(market_api, size, error_handler),
+                         name='zb-book-' + self.symbol, daemon=True).start()
+        return True
+
+    def _seed(self, market_api, size, error_handler):
+        try:
+            self.seed(market_api, size)
+        except Exception as e:
+            if error_handler is not None:
+                error_handler(e)
+            else:
+                log.get_logger(log.REST).exception("[Book][%s] Seeding failed", self.symbol)
+
+    def is_crossed(self):
+        bid = self.bids.best_price()
+        ask = self.asks.best_price()
+        return bid is not None and ask is not None and bid >= ask
+
+    def is_stale(self):
+        return bool(self.stale_ms) and Utils.milliseconds() - self.last_update_time > self.stale_ms
+
+    def needs_resync(self):
+        return not self.is_synced or self.is_stale()
+
+    def best_bid(self):
+        """
+        :return: (price, amount), None if there is no bid
+        """
+        return self.bids.best()
+
+    def best_ask(self):
+        """
+        :return: (price, amount), None if there is no ask
+        """
+        return self.asks.best()
+
+    def spread(self):
+        bid = self.bids.best_price()
+        ask = self.asks.best_price()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def mid_price(self):
+        bid = self.bids.best_price()
+        ask = self.asks.best_price()
+        if bid is None or ask is None:
+            return None
+        return (ask + bid) / 2
+
+    def top(self, n=5):
+        """
+        :return: (asks, bids), the n best levels of each side as lists of (price, amount)
+        """
+        with self.lock:
+            return self.asks.top(n), self.bids.top(n)
+
+    def vwap(self, size, is_buy=True):
+        """
+        The average price of a market order of ``size``, buying against the asks or selling against the bids.
+        """
+        with self.lock:
+            return self.asks.vwap(size) if is_buy else self.bids.vwap(size)
@@ -0,0 +1,138 @@
+"""
+Websocket requests waiting for their response
+"""
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from zb.errors import RequestTimeout, SubscribeException
+from zb.timer import TimerScheduler
+from zb.utils import Utils
+
+
+class PendingRequest(Future):
+    """
+    The future of a websocket request, resolved with the response event or failed with SubscribeException or
+    RequestTimeout.
+
+    :member
+        request_id:     The correlation id sent with the request.
+        channel:        The channel of the request.
+        sent_time:      The local time in millisecond the request was sent.
+        latency_ms:     The round trip time in millisecond, None until the response arrives.
+    """
+
+    def __init__(self, request_id, channel, callback=None, error_handler=None):
+        super().__init__()
+        self.request_id = request_id
+        self.channel = channel
+        self.callback = callback
+        self.error_handler = error_handler
+        self.sent_time = Utils.milliseconds()
+        self.latency_ms = None
+        # the Timer failing the request with RequestTimeout
+        self.timer = None
+
+    def resolve(self, event):
+        self.latency_ms = Utils.milliseconds() - self.sent_time
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.callback is not None:
+            self.callback(event)
+        if not self.done():
+            self.set_result(event)
+
+    def fail(self, message):
+        """
+        Fail the request with the error message of the server, or with ``message`` itself if it is an exception.
+        """
+        self.latency_ms = Utils.milliseconds() - self.sent_time
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.error_handler is not None:
+            self.error_handler(message)
+        if not self.done():
+            self.set_exception(message if isinstance(message, Exception) else SubscribeException(str(message)))
+
+
+class PendingRequests(object):
+    """
+    The requests sent on the private connections, matched to their responses by the echoed request id. A response
+    without id resolves the oldest request of its channel, so requests of one channel must be answered in order.
+    Requests without a response within ``timeout_ms`` are failed with RequestTimeout by a timer of the scheduler,
+    their error handler receives the RequestTimeout. With ``on_loop`` the requests are made from coroutines and their
+    timeouts run on the event loop of the coroutine instead.
+    """
+
+    def __init__(self, timeout_ms=10000, scheduler=None, on_loop=False):
+        self.timeout_ms = timeout_ms
+        self.scheduler = scheduler if scheduler is not None else TimerScheduler.default()
+        self.on_loop = on_loop
+        self._ids = itertools.count(1)
+        self._requests = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._requests)
+
+    def add(self, channel, callback=None, error_handler=None) -> PendingRequest:
+        request = PendingRequest(str(next(self._ids)), channel, callback, error_handler)
+        with self._lock:
+            self._requests[request.request_id] = request
+        if self.timeout_ms:
+            request.timer = self.call_later(self.timeout_ms / 1000.0, lambda: self._timeout(request.request_id))
+        return request
+
+    def call_later(self, delay, callback):
+        """
+        Run the callback in delay seconds on the timer thread, or on the running event loop with ``on_loop`` so the
+        error handlers of an asyncio client run beside its other callbacks.
+
+        :return: The timer, its cancel() stops the callback.
+        """
+        if self.on_loop:
+            return asyncio.get_running_loop().call_later(delay, callback)
+        return self.scheduler.call_later(delay, callback)
+
+    def pop(self, message):
+        """
+        Remove and return the request answered by the message, None if no request is waiting for it.
+        """
+        with self._lock:
+            request = None
+            request_id = Utils.safe_string(message, 'id')
+            if request_id is not None and request_id in self._requests:
+                request = self._requests.pop(request_id)
+            else:
+                channel = Utils.safe_string(message, 'channel')
+                for request_id, waiting in self._requests.items():
+                    if waiting.channel == channel:
+                        request = self._requests.pop(request_id)
+                        break
+        if request is not None and request.timer is not None:
+            request.timer.cancel()
+        return request
+
+    def expire(self):
+        """
+        Fail the requests older than timeout_ms now, without waiting for their timers.
+        """
+        if not self.timeout_ms:
+            return
+        deadline = Utils.milliseconds() - self.timeout_ms
+        expired = []
+        with self._lock:
+            for request_id, request in self._requests.items():
+                if request.sent_time > deadline:
+                    break
+                expired.append(request_id)
+        for request_id in expired:
+            self._timeout(request_id)
+
+    def _timeout(self, request_id):
+        with self._lock:
+            request = self._requests.pop(request_id, None)
+        if request is not None:
+            request.fail(RequestTimeout("No response to " + request.channel + " within " + str(self.timeout_ms) + "ms"))
@@ -0,0 +1,97 @@
+"""
+Token bucket rate limiter shared by the REST clients
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    A bucket refilled with ``rate`` tokens per second up to ``capacity``, every request takes ``cost`` tokens.
+
+    A request that finds the bucket empty reserves its tokens anyway and is told how long to wait, so concurrent
+    callers are served in arrival order and no lock is held while sleeping. Safe to share between threads and
+    coroutines.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity else rate)
+        self.tokens = self.capacity
+        self.timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost=1):
+        """
+        Take ``cost`` tokens from the bucket.
+
+        :return: The seconds to wait before the request may be sent, 0 if it may be sent now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+            self.timestamp = now
+            self.tokens -= cost
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, cost=1):
+        delay = self.reserve(cost)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, cost=1):
+        delay = self.reserve(cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter(object):
+    """
+    The token buckets of every (api key, endpoint group) pair. Clients using the same limiter and api key share
+    their budgets, e.g. a TradeApi and an AccountApi created with the same key.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self._buckets = dict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """
+        The process wide limiter used by every client that was not given one explicitly.
+        """
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = RateLimiter()
+        return cls._default
+
+    def bucket(self, api_key, group, rate, capacity=None) -> TokenBucket:
+        """
+        The bucket of the group, created with ``rate`` and ``capacity`` on first use.
+        """
+        key = (api_key, group)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(rate, capacity)
+                    self._buckets[key] = bucket
+        return bucket
+
+    @staticmethod
+    def endpoint_group(api, path):
+        """
+        The budget group of an endpoint: 'public' for public endpoints, otherwise the module of the private path,
+        e.g. 'trade' for /Server/api/v2/trade/order and 'fund' for /Server/api/v2/Fund/getAccount.
+        """
+        if api != 'private':
+            return 'public'
+        parts = path.strip().strip('/').split('/')
+        return parts[-2].lower() if len(parts) >= 2 else 'default'
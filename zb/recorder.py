@@ -0,0 +1,206 @@
+"""
+Recording of the raw websocket frames and their replay through the subscription callbacks
+"""
+import gzip
+import struct
+import threading
+import time
+import zlib
+
+from zb import json_codec
+
+# The payload of a frame is a text message or a binary frame
+TEXT = 0
+BINARY = 1
+
+# The start of a gzip member: magic number and deflate method
+MEMBER_HEADER = b'\x1f\x8b\x08'
+
+
+class FrameRecorder(object):
+    """
+    Appends the raw frames received by the connections to a gzip file of records
+    (receive time in nanoseconds, kind, length, payload). Every recorder opening the file adds a gzip member, so a
+    session can be appended to an existing recording. A session that crashed before closing its recorder is readable
+    up to its last flushed frame, and so are the sessions appended after it.
+
+    Pass it to a client with ``MarketClient(recorder=FrameRecorder(path))``.
+    """
+    HEADER = struct.Struct('<qBI')
+
+    def __init__(self, path, compresslevel=6):
+        self.path = path
+        self.count = 0
+        self._file = gzip.open(path, 'ab', compresslevel=compresslevel)
+        self._lock = threading.Lock()
+
+    def record(self, message, timestamp=None):
+        """
+        :param message:   The frame as received, str or bytes.
+        :param timestamp: The receive time in nanoseconds, now by default.
+        """
+        if isinstance(message, str):
+            kind, payload = TEXT, message.encode('utf-8')
+        else:
+            kind, payload = BINARY, message
+        header = self.HEADER.pack(timestamp if timestamp is not None else time.time_ns(), kind, len(payload))
+        with self._lock:
+            self._file.write(header)
+            self._file.write(payload)
+            self.count += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_frames(path):
+    """
+    Iterate the frames of a recording. A session that crashed before closing its recorder ends at its last complete
+    frame, the sessions appended after it are read on.
+
+    :return: generator of (timestamp in nanoseconds, message), the message is of the type it was received as.
+    """
+    header = FrameRecorder.HEADER
+    buffer = bytearray()
+    for chunk in _inflate(path):
+        if chunk is None:
+            # a record never continues in the next member, what is left is the cut record of a crashed session
+            del buffer[:]
+            continue
+
+        buffer += chunk
+        offset = 0
+        while len(buffer) - offset >= header.size:
+            timestamp, kind, length = header.unpack_from(buffer, offset)
+            end = offset + header.size + length
+            if end > len(buffer):
+                break
+            payload = bytes(buffer[offset + header.size:end])
+            offset = end
+            yield timestamp, payload.decode('utf-8') if kind == TEXT else payload
+        del buffer[:offset]
+
+
+def _inflate(path, chunk_size=1 << 16):
+    """
+    The inflated data of the gzip members of a recording, None after each member. A member cut short ends at the end
+    of the file or, as the start of the next member can not be inflated as its continuation, where inflating fails.
+    Reading then resumes at the next member header.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(chunk_size)
+        while data:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            # where the next member may start in data, past the header of this one while data begins with it
+            start = 1
+            try:
+                while True:
+                    saved = decompressor.copy()
+                    yield decompressor.decompress(data)
+                    if decompressor.eof:
+                        data = decompressor.unused_data or f.read(chunk_size)
+                        break
+                    data = f.read(chunk_size)
+                    start = 0
+                    if not data:
+                        break
+            except zlib.error:
+                # the data inflated by the failed call is lost with it, inflate it again up to the failing byte
+                yield _inflate_until_error(saved, data)
+                data = _next_member(f, data, start, chunk_size)
+            yield None
+
+
+def _inflate_until_error(decompressor, data):
+    inflated = []
+    try:
+        for i in range(len(data)):
+            inflated.append(decompressor.decompress(data[i:i + 1]))
+    except zlib.error:
+        pass
+    return b''.join(inflated)
+
+
+def _next_member(f, data, start, chunk_size):
+    """
+    :return: The data from the next member header on, read further from f if needed, empty at the end of the file.
+    """
+    while True:
+        index = data.find(MEMBER_HEADER, start)
+        if index >= 0:
+            return data[index:]
+        more = f.read(chunk_size)
+        if not more:
+            return b''
+        # a header split between the reads
+        data = data[-(len(MEMBER_HEADER) - 1):] + more
+        start = 0
+
+
+class FrameReplay(object):
+    """
+    Feeds a recording to the connections of a client, each frame takes the same path as a received one: decoding,
+    routing by channel, json_parser and update_callback (or the dispatcher).
+
+    :member
+        speed: 1 replays at the recorded pace, 10 ten times faster, None or 0 as fast as possible.
+    """
+
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+
+    def replay(self, target):
+        """
+        :param target: A WebsocketConnection, or a client whose connections receive the frames of their channels.
+                       The connections need not be open.
+        :return: The number of frames replayed.
+        """
+        on_message = target.on_message if hasattr(target, 'on_message') else self._router(target)
+        count = 0
+        first = None
+        start = time.perf_counter()
+        for timestamp, message in read_frames(self.path):
+            if self.speed:
+                if first is None:
+                    first = timestamp
+                delay = (timestamp - first) / 1e9 / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            on_message(message)
+            count += 1
+        return count
+
+    @staticmethod
+    def _router(client):
+        connections = list(client.connections)
+        if len(connections) == 1:
+            return connections[0].on_message
+
+        def on_message(message):
+            if isinstance(message, bytes):
+                message = connections[0].decoder.decode(message)
+            channel = json_codec.loads(message).get('channel')
+            for connection in connections:
+                if channel in connection.requests:
+                    connection.on_message(message)
+                    return
+            # a channel answered without its scale suffix, see WebsocketConnection.route
+            for connection in connections:
+                if any(key.split('@')[0] == channel for key in connection.requests):
+                    connection.on_message(message)
+                    return
+
+        return on_message
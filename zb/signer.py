@@ -0,0 +1,77 @@
+"""
+Signing of the private rest requests and of the websocket login
+"""
+import binascii
+import hashlib
+import hmac
+import time
+
+from zb import log
+
+sign_logger = log.get_logger(log.SIGN)
+
+
+class TimestampFormatter(object):
+    """
+    Formats epoch milliseconds as the ISO 8601 UTC timestamp the exchange expects, 2022-01-01T00:00:00.000Z. The
+    date and time up to the second are formatted once per second and reused, so a timestamp is a concatenation.
+    """
+
+    def __init__(self):
+        # (second, the timestamp up to the second), replaced as a whole so the readers need no lock
+        self._cached = (None, None)
+
+    def format(self, ms=None):
+        if ms is None:
+            ms = time.time_ns() // 1000000
+        second, millis = divmod(int(ms), 1000)
+        cached_second, prefix = self._cached
+        if cached_second != second:
+            prefix = time.strftime('%Y-%m-%dT%H:%M:%S.', time.gmtime(second))
+            self._cached = (second, prefix)
+        return '%s%03dZ' % (prefix, millis)
+
+
+utc_timestamp = TimestampFormatter().format
+
+
+def canonical_params(params):
+    """
+    The params as signed: key=value pairs sorted by key joined by &, without the None and empty values.
+    """
+    if not params:
+        return ''
+    return '&'.join([key + '=' + (value if value.__class__ is str else str(value))
+                     for key, value in sorted(params.items()) if value is not None and value != ''])
+
+
+class HmacSigner(object):
+    """
+    The HMAC-SHA256 signer of one secret key. The key is prepared once, every message is signed on a copy of the
+    prepared HMAC state, which skips hashing the key pads per request.
+
+    :param secret_key: The secret key of the api key.
+    :param hashed:     Whether secret_key is already the hex SHA1 of the secret key, the key the exchange signs with.
+    """
+
+    def __init__(self, secret_key, hashed=False):
+        if not hashed:
+            secret_key = hashlib.sha1(secret_key.encode('utf-8')).hexdigest()
+        # never updated, only copied, which hashlib does under the lock of the object
+        self._hmac = hmac.new(secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def sign(self, timestamp, method, path, params=None):
+        """
+        :return: The base64 HMAC-SHA256 of timestamp + method + path + canonical_params(params).
+        """
+        content = timestamp + method + path + canonical_params(params)
+        sign_logger.debug('sign string: %s', content)
+        mac = self._hmac.copy()
+        mac.update(content.encode('utf-8'))
+        return binascii.b2a_base64(mac.digest(), newline=False).decode('ascii')
+
+    def timestamp(self, ms=None):
+        """
+        The timestamp of a request signed now, or at epoch milliseconds ``ms``.
+        """
+        return utc_timestamp(ms)
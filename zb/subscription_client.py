@@ -1,18 +1,32 @@
 import hashlib
-import json
-import time
-from datetime import datetime
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import List
 
-from zb.model.constant import Channel, FuturesAccountType, Action, OrderSide
+from zb import json_codec, log
+from zb.dispatcher import Dispatcher
+from zb.errors import NotSupported, RequestTimeout
+from zb.model.constant import Channel, FuturesAccountType, Action, OrderSide, OverflowPolicy
 from zb.model.subscribe_envet import *
 from zb.model.trade import OrderRequest
+from zb.model.market import market_models
+from zb.order_book import OrderBook
+from zb.pending_requests import PendingRequest, PendingRequests
+from zb.signer import HmacSigner
+from zb import websocket_connection
 from zb.websocket_connection import WebsocketConnection, ArgumentsRequired
 from zb.websocket_watch_dog import WebSocketWatchDog
 
+logger = log.get_logger(log.WS)
+account_logger = log.get_logger(log.ACCOUNT)
+
 
 class WebsocketRequest(object):
     def __init__(self):
+        # The id of the subscription, returned by the subscribe_* methods of MarketClient
+        self.id = next(websocket_connection.ids)
+        self.channel = None
         self.subscription_handler = None
         self.unsubscription_handler = None
         self.auto_close = False
@@ -22,6 +36,9 @@ class WebsocketRequest(object):
 
 
 class SubscriptionClient(object):
+    # Whether the engine can negotiate permessage-deflate
+    supports_compress = False
+
     def __init__(self, **kwargs):
         """
         Create the subscription client to subscribe the update from server.
@@ -36,14 +53,27 @@ class SubscriptionClient(object):
             receive_limit_ms: Set the receive limit in millisecond. If no message is received within this limit time,
                             the connection will be disconnected.
             connection_delay_failure: If auto reconnect is enabled, specify the delay time before reconnect.
+            dispatch_workers: Parse messages and call the callbacks on this many worker threads instead of the
+                            socket reader thread, 0 (default) runs them inline.
+            dispatch_queue_size: The number of messages queued per channel for the workers.
+            overflow_policy: OverflowPolicy of a full channel queue, BLOCK (default), DROP_OLDEST or CONFLATE.
+            compress: Negotiate the permessage-deflate extension, only the asyncio engine supports it. Gzip and
+                            deflate compressed binary frames are inflated by every engine.
+            recorder: FrameRecorder saving the frames received by every connection, see FrameReplay.
+            instrumentation: Instrumentation receiving the parse and callback time, the lag and the reconnects of
+                            every connection, see zb.metrics.
+            clock_sync: ClockSync fed the timestamps of the market events, correcting the lag reported to the
+                            instrumentation and stamping the login, see zb.clock_sync.
         """
         self._api_key = None
         self._secret_key = None
+        self._signer = None
         if "api_key" in kwargs:
             self._api_key = kwargs["api_key"]
         if "secret_key" in kwargs:
             secret_key = kwargs["secret_key"]
             self._secret_key = hashlib.sha1(secret_key.encode('utf-8')).hexdigest()
+            self._signer = HmacSigner(self._secret_key, hashed=True)
 
         self.connections = list()
 
@@ -60,9 +90,32 @@ class SubscriptionClient(object):
             self.receive_limit_ms = kwargs["receive_limit_ms"]
         if "connection_delay_failure" in kwargs:
             self.connection_delay_failure = kwargs["connection_delay_failure"]
-        self._watch_dog = WebSocketWatchDog(self.is_auto_connect, self.receive_limit_ms, self.connection_delay_failure)
+        self.compress = kwargs.get('compress', False)
+        if self.compress and not self.supports_compress:
+            raise NotSupported("permessage-deflate is not implemented by websocket-client, use the asyncio engine.")
+        self._watch_dog = self._create_watch_dog()
 
-    def _create_connection(self, channel, callback, json_parser, error_handler=None, **kwargs):
+        self.recorder = kwargs.get('recorder')
+        self.instrumentation = kwargs.get('instrumentation')
+        self.clock_sync = kwargs.get('clock_sync')
+
+        self.dispatcher = None
+        if kwargs.get('dispatch_workers'):
+            self.dispatcher = Dispatcher(kwargs['dispatch_workers'],
+                                         kwargs.get('dispatch_queue_size', 1000),
+                                         kwargs.get('overflow_policy', OverflowPolicy.BLOCK))
+
+    def _create_watch_dog(self):
+        return WebSocketWatchDog(self.is_auto_connect, self.receive_limit_ms, self.connection_delay_failure)
+
+    def dispatch_stats(self) -> dict:
+        """
+        The queue depth and drop counters of every channel, see Dispatcher.stats. Empty if messages are dispatched
+        inline.
+        """
+        return self.dispatcher.stats() if self.dispatcher is not None else {}
+
+    def _build_request(self, channel, callback, json_parser, error_handler=None, **kwargs) -> WebsocketRequest:
         def subscription_handler(conn):
             param = {
                 'action': 'subscribe',
@@ -73,42 +126,53 @@ class SubscriptionClient(object):
                 if "login" == channel:
                     del param["futuresAccountType"]
 
-            message = json.dumps(param)
-            print('subscribe message:', message)
+            message = json_codec.dumps(param)
+            logger.debug('subscribe message: %s', message)
             conn.send(message)
 
+        def unsubscription_handler(conn):
+            if "login" == channel:
+                return
+            param = {
+                'action': 'unsubscribe',
+                'channel': channel,
+            }
+            conn.send(json_codec.dumps(param))
+
         request = WebsocketRequest()
         request.channel = channel
         request.subscription_handler = subscription_handler
+        request.unsubscription_handler = unsubscription_handler
         request.json_parser = json_parser
         request.update_callback = callback
         request.error_handler = error_handler
+        return request
 
-        futures_account_type = Utils.safe_integer(kwargs, "futuresAccountType")
+    def _connection_url(self, futures_account_type):
         url = self.url
         if futures_account_type == 2 and "/qc" not in url:
             i = self.url.find('/ws')
             url = self.url[0:i] + "/qc" + self.url[i:]
         elif (futures_account_type == 1 or futures_account_type is None) and "/qc" in url:
             url = self.url.replace("/qc", "")
+        return url
+
+    def _create_connection(self, channel, callback, json_parser, error_handler=None, **kwargs):
+        request = self._build_request(channel, callback, json_parser, error_handler, **kwargs)
+        url = self._connection_url(Utils.safe_integer(kwargs, "futuresAccountType"))
 
-        print("url >>> " + url)
-        connection = WebsocketConnection(self._api_key, self._secret_key, url, self._watch_dog, request)
+        logger.debug('url: %s', url)
+        connection = WebsocketConnection(self._api_key, self._secret_key, url, self._watch_dog, request, self.dispatcher, self.recorder,
+                                         self.instrumentation, self.clock_sync)
         self.connections.append(connection)
         connection.connect()
 
         return connection
 
     def _disconnection(self, connection: WebsocketConnection):
-        channel = connection.request.channel
-        if channel == 'login':
+        if connection.request is not None and connection.request.channel == 'login':
             return
-        param = {
-            'action': 'unsubscribe',
-            'channel': channel,
-        }
-        connection.send(param)
-        connection.on_close()
+        connection.close_on_hand()
         self.connections.remove(connection)
 
 
@@ -127,20 +191,75 @@ class MarketClient(SubscriptionClient):
             receive_limit_ms: Set the receive limit in millisecond. If no message is received within this limit time,
                             the connection will be disconnected.
             connection_delay_failure: If auto reconnect is enabled, specify the delay time before reconnect.
+            max_channels_per_connection: The number of channels multiplexed on one connection, a new connection is
+                            opened once all connections to the url carry this many channels. 1 gives every
+                            subscription a connection of its own.
+            fast_models: Parse depth entries, klines, trades and tickers into the immutable FastModels.
+            lazy_events: Hand the depth, kline, trade and ticker callbacks LazyEvents, which build the models
+                            of a message only for the attributes read.
         """
         if 'url' not in kwargs:
             kwargs['url'] = 'wss://fapi.zb.com/ws/public/v1'
         super().__init__(**kwargs)
 
+        self.max_channels_per_connection = kwargs.get('max_channels_per_connection', 50)
+        self._lock = threading.Lock()
+        self.models = market_models(kwargs.get('fast_models', False))
+        self.events = market_events(kwargs.get('lazy_events', False))
+        # Key: symbol, Value: OrderBook maintained by subscribe_order_book
+        self.order_books = dict()
+
     def _subscribe_event(self, channel, callback, json_parser, size, error_handler):
-        futures_account_type = FuturesAccountType.BASE_QC if channel.find("_QC") > 0 else None
-        conn = self._create_connection(channel=channel,
-                                       callback=callback,
-                                       json_parser=json_parser,
-                                       error_handler=error_handler,
-                                       size=size,
-                                       futuresAccountType=futures_account_type)
-        return conn.id
+        futures_account_type = FuturesAccountType.BASE_QC.value if channel.find("_QC") > 0 else None
+        request = self._build_request(channel=channel,
+                                      callback=callback,
+                                      json_parser=json_parser,
+                                      error_handler=error_handler,
+                                      size=size,
+                                      futuresAccountType=futures_account_type)
+        url = self._connection_url(futures_account_type)
+
+        with self._lock:
+            conn = None
+            for connection in self.connections:
+                if connection.url == url and connection.channel_count() < self.max_channels_per_connection:
+                    conn = connection
+                    break
+
+            if conn is None:
+                conn = WebsocketConnection(self._api_key, self._secret_key, url, self._watch_dog, dispatcher=self.dispatcher,
+                                           recorder=self.recorder, instrumentation=self.instrumentation,
+                                           clock_sync=self.clock_sync)
+                self.connections.append(conn)
+                conn.add_request(request)
+                conn.connect()
+            else:
+                conn.add_request(request)
+
+        return request.id
+
+    @staticmethod
+    def _conflating_parser(conflator, json_parse):
+        """
+        A parser handing the frames to the conflator, keyed by symbol, instead of parsing them. The frames of the All
+        channels are split into one frame per symbol, parsed by ``json_parse`` like the frames of the symbol channel.
+
+        :return: parser returning the list of updated symbols
+        """
+        def parser(json_wrapper):
+            channel = Utils.safe_string(json_wrapper, 'channel', '')
+            data = json_wrapper.get('data')
+            if channel.startswith('All.') and isinstance(data, dict):
+                suffix = channel[len('All'):]
+                for symbol, value in data.items():
+                    conflator.update(symbol, {'channel': symbol + suffix, 'data': value}, json_parse)
+                return list(data)
+
+            symbol = channel.split('.')[0]
+            conflator.update(symbol, json_wrapper, json_parse)
+            return [symbol]
+
+        return parser
 
     def subscribe_whole_depth_event(self, symbol: str, callback, scale=None, size=5, error_handler=None):
         """
@@ -162,7 +281,7 @@ class MarketClient(SubscriptionClient):
             channel = channel + '@' + str(scale)
 
         def json_parse(json_wrapper):
-            return DepthEvent(**json_wrapper)
+            return self.events.DepthEvent(model_class=self.models.DepthEntry, **json_wrapper)
 
         return self._subscribe_event(channel, callback, json_parse, size, error_handler)
 
@@ -186,11 +305,48 @@ class MarketClient(SubscriptionClient):
             channel = channel + '@' + str(scale)
 
         def json_parse(json_wrapper):
-            return DepthEvent(**json_wrapper)
+            return self.events.DepthEvent(model_class=self.models.DepthEntry, **json_wrapper)
 
         return self._subscribe_event(channel, callback, json_parse, size, error_handler)
 
-    def subscribe_kline_event(self, symbol: 'str', callback, interval: Interval, size=100, error_handler=None):
+    def subscribe_order_book(self, symbol: str, callback, market_api=None, scale=None, size=5, whole=False, max_depth=None, error_handler=None):
+        """
+        Maintain a local order book of the symbol from the depth channel, the depth levels are applied in place to
+        the same OrderBook object and no DepthEvent is built.
+
+        :param symbol:      The symbols, like "btc_usdt".
+        :param callback:    Called with the OrderBook after every applied message.
+            example: def callback(book: OrderBook):
+                        pass
+        :param market_api:  MarketApi used to seed the book from a snapshot and to resync it once it is out of sync,
+                            without it the book is only synced by whole depth messages. The snapshot is loaded on a
+                            worker thread and the messages received meanwhile are applied on top of it.
+        :param scale:       盘口精度
+        :param size:        记录条数
+        :param whole:       Subscribe the DepthWhole channel instead of the incremental Depth channel.
+        :param max_depth:   Keep at most this many levels per side.
+        :param error_handler: The error handler will be called if subscription failed or error happen between client and server
+        :return: id
+        """
+        symbol = symbol.upper()
+        book = self.order_books.get(symbol)
+        if book is None:
+            book = OrderBook(symbol, max_depth=max_depth)
+            self.order_books[symbol] = book
+
+        channel = symbol + '.' + (Channel.WHOLE_DEPTH.value if whole else Channel.DEPTH.value)
+        if scale:
+            channel = channel + '@' + str(scale)
+
+        def json_parse(json_wrapper):
+            if market_api is not None and not whole and json_wrapper.get('type') != 'Whole' and book.needs_resync():
+                book.seed_in_background(market_api, error_handler=error_handler)
+            book.apply(json_wrapper)
+            return book
+
+        return self._subscribe_event(channel, callback, json_parse, size, error_handler)
+
+    def subscribe_kline_event(self, symbol: 'str', callback, interval: Interval, size=100, error_handler=None, columnar=False):
         """
         Subscribe candlestick/kline event. If the candlestick/kline is updated, server will send the data to client and onReceive in callback will
         be called.
@@ -204,12 +360,13 @@ class MarketClient(SubscriptionClient):
             example: def error_handler(exception: ZbgApiException)
                         pass
         :param size: The number of data returned the first time.max : 1440
+        :param columnar: Parse the klines of each event into a NumPy structured array, requires numpy.
         :return: id
         """
         channel = symbol.upper() + '.' + Channel.KLINE.value + '_' + interval.value
 
         def json_parse(json_wrapper):
-            return KlineEvent(**json_wrapper)
+            return self.events.KlineEvent(model_class=self.models.Kline, columnar=columnar, **json_wrapper)
 
         return self._subscribe_event(channel, callback, json_parse, size, error_handler)
 
@@ -230,11 +387,11 @@ class MarketClient(SubscriptionClient):
         channel = symbol.upper() + '.' + Channel.TRADE.value
 
         def json_parse(json_wrapper):
-            return TradeEvent(**json_wrapper)
+            return self.events.TradeEvent(model_class=self.models.Trade, **json_wrapper)
 
         return self._subscribe_event(channel, callback, json_parse, size, error_handler)
 
-    def subscribe_ticker_event(self, symbol: 'str', callback, error_handler=None):
+    def subscribe_ticker_event(self, symbol: 'str', callback, error_handler=None, conflator=None):
         """
         Subscribe 24 hours trade statistics event. If the statistics is generated, server will send the data to client and onReceive in callback will be called.
 
@@ -245,17 +402,22 @@ class MarketClient(SubscriptionClient):
         :param error_handler: The error handler will be called if subscription failed or error happen between client and Huobi server
             example: def error_handler(exception: ZbgApiException)
                         pass
+        :param conflator: Conflator keeping the newest frame per symbol instead of parsing every frame, the
+                          callback, which may be None, then receives the list of updated symbols and the events are
+                          pulled with conflator.get(symbol).
         :return: id
         """
 
         channel = symbol.upper() + '.' + Channel.TICKER.value
 
         def json_parse(json_wrapper):
-            return TickerEvent(**json_wrapper)
+            return self.events.TickerEvent(model_class=self.models.Ticker, **json_wrapper)
 
+        if conflator is not None:
+            json_parse = self._conflating_parser(conflator, json_parse)
         return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
 
-    def subscribe_all_ticker_event(self, callback, error_handler=None):
+    def subscribe_all_ticker_event(self, callback, error_handler=None, conflator=None):
         """
         Subscribe 24 hours trade statistics event. If the statistics is generated, server will send the data to client and onReceive in callback will be called.
 
@@ -265,67 +427,83 @@ class MarketClient(SubscriptionClient):
         :param error_handler: The error handler will be called if subscription failed or error happen between client and Huobi server
             example: def error_handler(exception: ZbgApiException)
                         pass
+        :param conflator: Conflator keeping the newest frame per symbol instead of parsing every frame, the
+                          callback, which may be None, then receives the list of updated symbols and the events are
+                          pulled with conflator.get(symbol).
         :return: id
         """
 
         channel = 'All.' + Channel.TICKER.value
 
         def json_parse(json_wrapper):
-            return AllTickerEvent(**json_wrapper)
+            return self.events.AllTickerEvent(model_class=self.models.Ticker, **json_wrapper)
 
-        return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
+        # the conflator splits the frames per symbol, each parsed like a frame of the symbol channel
+        def ticker_parse(json_wrapper):
+            return self.events.TickerEvent(model_class=self.models.Ticker, **json_wrapper)
+
+        parser = json_parse if conflator is None else self._conflating_parser(conflator, ticker_parse)
+        return self._subscribe_event(channel, callback, parser, 1, error_handler)
 
-    def subscribe_mark_price_event(self, symbol: 'str', callback, error_handler=None):
+    def subscribe_mark_price_event(self, symbol: 'str', callback, error_handler=None, conflator=None):
 
         channel = symbol.upper() + '.mark'
 
         def json_parse(json_wrapper):
             return Event(**json_wrapper)
 
+        if conflator is not None:
+            json_parse = self._conflating_parser(conflator, json_parse)
         return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
 
-    def subscribe_all_mark_price_event(self, callback, error_handler=None):
+    def subscribe_all_mark_price_event(self, callback, error_handler=None, conflator=None):
 
         channel = 'All.mark'
 
         def json_parse(json_wrapper):
             return Event(**json_wrapper)
 
+        if conflator is not None:
+            json_parse = self._conflating_parser(conflator, json_parse)
         return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
 
-    def subscribe_index_price_event(self, symbol: 'str', callback, error_handler=None):
+    def subscribe_index_price_event(self, symbol: 'str', callback, error_handler=None, conflator=None):
 
         channel = symbol.upper() + '.index'
 
         def json_parse(json_wrapper):
             return Event(**json_wrapper)
 
+        if conflator is not None:
+            json_parse = self._conflating_parser(conflator, json_parse)
         return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
 
-    def subscribe_all_index_price_event(self, callback, error_handler=None):
+    def subscribe_all_index_price_event(self, callback, error_handler=None, conflator=None):
 
         channel = 'All.index'
 
         def json_parse(json_wrapper):
             return Event(**json_wrapper)
 
+        if conflator is not None:
+            json_parse = self._conflating_parser(conflator, json_parse)
         return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
 
-    def subscribe_mark_kline_event(self, symbol: 'str', callback, interval=Interval.MIN_15, size=10, error_handler=None):
+    def subscribe_mark_kline_event(self, symbol: 'str', callback, interval=Interval.MIN_15, size=10, error_handler=None, columnar=False):
 
         channel = symbol.upper() + '.mark_' + interval.value
 
         def json_parse(json_wrapper):
-            return KlineEvent(**json_wrapper)
+            return self.events.KlineEvent(model_class=self.models.Kline, columnar=columnar, **json_wrapper)
 
         return self._subscribe_event(channel, callback, json_parse, size, error_handler)
 
-    def subscribe_index_kline_event(self, symbol: 'str', callback, interval=Interval.MIN_15, size=10, error_handler=None):
+    def subscribe_index_kline_event(self, symbol: 'str', callback, interval=Interval.MIN_15, size=10, error_handler=None, columnar=False):
 
         channel = symbol.upper() + '.index_' + interval.value
 
         def json_parse(json_wrapper):
-            return KlineEvent(**json_wrapper)
+            return self.events.KlineEvent(model_class=self.models.Kline, columnar=columnar, **json_wrapper)
 
         return self._subscribe_event(channel, callback, json_parse, size, error_handler)
 
@@ -348,15 +526,28 @@ class MarketClient(SubscriptionClient):
         return self._subscribe_event(channel, callback, json_parse, 1, error_handler)
 
     def unsubscribe_event(self, conn_id=None, channel=None):
-        if conn_id:
-            for conn in self.connections[:]:
-                if conn.id == conn_id:
-                    self._disconnection(conn)
-
-        if channel:
-            for conn in self.connections[:]:
-                if conn.request.channel == channel:
-                    self._disconnection(conn)
+        """
+        Drop the subscription ``conn_id``, the id returned by a subscribe_* method, or close the connection of that
+        id with all its channels, and/or drop every subscription of the ``channel``. A channel is unsubscribed with
+        its last subscription and a connection is closed with its last channel.
+        """
+        with self._lock:
+            if conn_id:
+                for conn in self.connections[:]:
+                    request = conn.find_request(conn_id)
+                    if request is not None:
+                        conn.remove_request(request.channel, request)
+                        if conn.channel_count() == 0:
+                            self._disconnection(conn)
+                    elif conn.id == conn_id:
+                        self._disconnection(conn)
+
+            if channel:
+                for conn in self.connections[:]:
+                    if channel in conn.requests:
+                        conn.remove_request(channel)
+                        if conn.channel_count() == 0:
+                            self._disconnection(conn)
 
 
 class WsAccountClient(SubscriptionClient):
@@ -396,58 +587,211 @@ class WsAccountClient(SubscriptionClient):
     CH_batchCancelOrder = "Trade.batchCancelOrder"
     CH_cancelAllOrders = "trade.cancelAllOrders"
 
+    # channels pushing updates after the subscription, every other channel answers each request once
+    PUSH_CHANNELS = (CH_FundChange, CH_FundAssetChange, CH_PositionsChange, CH_orderChange)
+
     def __init__(self, api_key, secret_key, url="wss://fapi.zb.com/ws/private/api/v2", **kwargs):
+        """
+        :param kwargs: The option of subscription connection, see MarketClient, and
+            request_timeout_ms: Fail a request with RequestTimeout if no response is received within this time.
+        """
         self.callback_map = dict()
         self.json_parser_map = dict()
         self.error_handler_map = dict()
         self.connection_map = dict()
+        self.pending = self._create_pending_requests(kwargs.get('request_timeout_ms', 10000))
+        # Key: FuturesAccountType, Value: PendingRequest of the login
+        self.login_map = dict()
+        # Key: FuturesAccountType, Value: [(message, PendingRequest)] sent before the login was acknowledged
+        self._outbox = dict()
+        self._lock = threading.Lock()
 
         super().__init__(api_key=api_key, secret_key=secret_key, url=url, **kwargs)
 
-    def login(self, futures_account_type=FuturesAccountType.BASE_USDT):
+    def _create_pending_requests(self, timeout_ms):
+        return PendingRequests(timeout_ms)
+
+    def login(self, futures_account_type=FuturesAccountType.BASE_USDT, wait=True):
+        """
+        Open the private connection of the account type and log in. Messages sent before the server acknowledges the
+        login are queued and flushed in order once it does.
+
+        :param futures_account_type: 合约类型
+        :param wait: Block until the login is acknowledged, raise SubscribeException if it is rejected and
+                     RequestTimeout if there is no answer within request_timeout_ms.
+        :return: PendingRequest of the login, its latency_ms is the login round trip. A login unanswered within
+                 request_timeout_ms is failed with RequestTimeout, whether waited for or not.
+        """
+        request = self._start_login(futures_account_type)
+        if wait:
+            timeout = self.pending.timeout_ms / 1000.0 if self.pending.timeout_ms else None
+            try:
+                request.result(timeout)
+            except FutureTimeoutError:
+                self._login_timeout(futures_account_type, request)
+                request.result(0)
+        return request
+
+    def _start_login(self, futures_account_type):
+        json_parser, callback, error_handler = self._login_handlers(futures_account_type)
+        param = self._login_param(futures_account_type)
+        with self._lock:
+            request = PendingRequest(None, self.LOGIN)
+            self.login_map[futures_account_type] = request
+            self._outbox[futures_account_type] = []
+        self.connection_map[futures_account_type] = self._create_connection(channel='login',
+                                                                            callback=callback,
+                                                                            json_parser=json_parser,
+                                                                            error_handler=error_handler,
+                                                                            **param)
+        if self.pending.timeout_ms:
+            request.timer = self.pending.call_later(self.pending.timeout_ms / 1000.0,
+                                                    lambda: self._login_timeout(futures_account_type, request))
+        return request
+
+    def _login_timeout(self, futures_account_type, request):
+        """
+        Fail the login unanswered within request_timeout_ms and the requests queued behind it, and drop its connection
+        so the next request of the account type logs in again.
+        """
+        error = RequestTimeout("No login acknowledgement within " + str(self.pending.timeout_ms) + "ms")
+        if not self._login_done(futures_account_type, error, True, request):
+            return
+        with self._lock:
+            connection = self.connection_map.pop(futures_account_type, None)
+        if connection is not None:
+            self._close_connection(connection)
+
+    def _close_connection(self, connection):
+        if connection in self.connections:
+            self.connections.remove(connection)
+        connection.on_close()
+
+    def _login_done(self, futures_account_type, message, failed=False, login=None):
+        """
+        Complete the pending login, flush the queued messages if it succeeded and fail their requests otherwise.
+
+        :param login: Only complete this login request.
+        :return: False if no login was pending.
+        """
+        with self._lock:
+            request = self.login_map.get(futures_account_type)
+            if request is None or request.done() or login is not None and request is not login:
+                return False
+            outbox = self._outbox.pop(futures_account_type, [])
+            if failed:
+                request.fail(message)
+            else:
+                request.resolve(message)
+                connection = self.connection_map[futures_account_type]
+                for queued, _ in outbox:
+                    connection.send(queued)
+
+        if failed:
+            for _, queued_request in outbox:
+                if queued_request is not None:
+                    queued_request.fail(message)
+        return True
+
+    def _send(self, futures_account_type, message, request=None):
+        """
+        Send the message on the connection of the account type, queue it while the login is pending.
+        """
+        with self._lock:
+            login = self.login_map.get(futures_account_type)
+            if login is not None and not login.done():
+                self._outbox[futures_account_type].append((message, request))
+                return
+        self.connection_map[futures_account_type].send(message)
+
+    def login_latency_ms(self, futures_account_type=FuturesAccountType.BASE_USDT):
+        """
+        :return: The round trip of the login in millisecond, None until it is acknowledged.
+        """
+        request = self.login_map.get(futures_account_type)
+        return request.latency_ms if request is not None else None
+
+    def _login_handlers(self, futures_account_type=FuturesAccountType.BASE_USDT):
+        """
+        The parser, callback and error handler of the login connection, they complete the login handshake and
+        dispatch every other private message to the handlers registered for its channel.
+        """
         def json_parser(json_wrapper):
-            print('data message: >>>>>> ', json_wrapper)
+            if account_logger.isEnabledFor(logging.DEBUG):
+                account_logger.debug('data message: %s', json_wrapper)
             channel = Utils.safe_string(json_wrapper, 'channel')
             if channel in self.json_parser_map:
                 return self.json_parser_map[channel](json_wrapper)
             else:
-                print('no error handler for :', str(json_wrapper))
+                account_logger.warning('no json parser for: %s', json_wrapper)
 
             return json_wrapper
 
         def callback(event):
+            if Utils.safe_string(event, 'channel') == self.LOGIN:
+                self._login_done(futures_account_type, event)
+                return
+
+            request = self.pending.pop(event)
+            if request is not None:
+                return request.resolve(event)
+
             channel = Utils.safe_string(event, 'channel')
-            if channel in self.callback_map:
+            if self.callback_map.get(channel) is not None:
                 return self.callback_map[channel](event)
             else:
-                print('no callback for :', str(event))
+                account_logger.warning('no callback for: %s', event)
 
         def error_handler(message):
             if isinstance(message, dict):
+                channel = Utils.safe_string(message, 'channel')
+                if channel in (None, self.LOGIN) and self._login_done(futures_account_type, message, True):
+                    return
+
+                request = self.pending.pop(message)
+                if request is not None:
+                    return request.fail(message)
+
                 channel = Utils.safe_string(message, 'channel')
                 if channel in self.error_handler_map:
                     return self.error_handler_map[channel](message)
             else:
-                print('ws error message >>>>>', message)
+                account_logger.warning('ws error message: %s', message)
 
-        timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
-        from zb import ApiClient
-        sign = ApiClient.generate_sign(timestamp, "GET", self.LOGIN, None, self._secret_key)
-        param = {
+        return json_parser, callback, error_handler
+
+    def _login_param(self, futures_account_type):
+        timestamp = self._signer.timestamp(self.clock_sync.now_ms() if self.clock_sync is not None else None)
+        sign = self._signer.sign(timestamp, "GET", self.LOGIN)
+        return {
             'futuresAccountType': futures_account_type.value,
             'action': 'login',
             'ZB-APIKEY': self._api_key,
             'ZB-TIMESTAMP': timestamp,
             'ZB-SIGN': sign
         }
-        self.connection_map[futures_account_type] = self._create_connection(channel='login',
-                                                                            callback=callback,
-                                                                            json_parser=json_parser,
-                                                                            error_handler=error_handler,
-                                                                            **param)
-        time.sleep(2)
 
     def subscribe(self, channel, data, callback, json_parser, error_handler, futures_account_type=FuturesAccountType.BASE_USDT):
+        """
+        Send a request on the connection of the account type, logging in first if needed.
+
+        :return: PendingRequest, a future resolved with the response event, None for the push channels.
+        """
+        if futures_account_type not in self.connection_map:
+            self._start_login(futures_account_type)
+
+        message, request = self._register(channel, data, callback, json_parser, error_handler)
+        self._send(futures_account_type, message, request)
+        return request
+
+    def _register(self, channel, data, callback, json_parser, error_handler):
+        """
+        Register the handlers of the channel and build its subscribe message. A request of a channel answering once
+        carries a correlation id and gets its own PendingRequest, so concurrent requests of one channel each
+        receive their own response.
+
+        :return: (message, PendingRequest or None)
+        """
         param = {
             'action': self.Subscribe,
             'channel': channel,
@@ -456,17 +800,20 @@ class WsAccountClient(SubscriptionClient):
         if data:
             param.update(data)
 
-        if futures_account_type not in self.connection_map:
-            self.login(futures_account_type)
-
-        print("send subscribe message >>>>", json.dumps(param))
-        self.callback_map[channel] = callback
+        request = None
+        if channel in self.PUSH_CHANNELS:
+            self.callback_map[channel] = callback
+            if error_handler:
+                self.error_handler_map[channel] = error_handler
+        else:
+            request = self.pending.add(channel, callback, error_handler)
+            param['id'] = request.request_id
         if json_parser:
             self.json_parser_map[channel] = json_parser
-        if error_handler:
-            self.error_handler_map[channel] = error_handler
 
-        self.connection_map[futures_account_type].send(json.dumps(param))
+        message = json_codec.dumps(param)
+        account_logger.debug('send subscribe message: %s', message)
+        return message, request
 
     def unsubscribe(self, channel, futures_account_type=FuturesAccountType.BASE_USDT,):
         if futures_account_type in self.connection_map:
@@ -475,9 +822,9 @@ class WsAccountClient(SubscriptionClient):
                 'channel': channel,
                 'futuresAccountType': futures_account_type.value
             }
-            message = json.dumps(param)
-            print("send unsubscribe message >>>>", message)
-            self.connection_map[futures_account_type].send(message)
+            message = json_codec.dumps(param)
+            account_logger.debug('send unsubscribe message: %s', message)
+            self._send(futures_account_type, message)
 
     def subscribe_fund_change(self, callback, currency=None, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -490,7 +837,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_FundChange, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_FundChange, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_balance(self, callback, currency=None, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -501,7 +848,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_FundBalance, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_FundBalance, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_account(self, callback, convert_unit='cny', futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -512,7 +859,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_FundGetAccount, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_FundGetAccount, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_bill(self, callback, currency=None, bill_type=None, start_time=None, end_time=None, page=1, size=10, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -532,7 +879,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_FundGetBill, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_FundGetBill, param, callback, json_parser, error_handler, futures_account_type)
 
     def subscribe_asset_change(self, callback, convert_unit='cny', futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -543,7 +890,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_FundAssetChange, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_FundAssetChange, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_asset_info(self, callback, convert_unit='cny', futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -555,7 +902,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_FundAssetInfo, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_FundAssetInfo, param, callback, json_parser, error_handler, futures_account_type)
 
     def subscribe_positions_change(self, callback, symbol=None, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -567,7 +914,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_PositionsChange, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_PositionsChange, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_positions(self, callback, symbol=None, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -579,7 +926,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_getPositions, param, callback, json_parser, error_handler)
+        return self.subscribe(self.CH_getPositions, param, callback, json_parser, error_handler)
 
     def get_margin(self, callback, positions_id: int, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         param = {
@@ -590,7 +937,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_marginInfo, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_marginInfo, param, callback, json_parser, error_handler, futures_account_type)
 
     def update_margin(self, callback, positions_id: int, amount: float, type: int, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         """
@@ -613,7 +960,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_updateMargin, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_updateMargin, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_setting(self, callback, symbol: str, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         """
@@ -632,7 +979,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_getSetting, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_getSetting, param, callback, json_parser, error_handler, futures_account_type)
 
     def set_leverage(self, callback, symbol: str, leverage: int, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         """
@@ -653,7 +1000,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_setLeverage, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_setLeverage, param, callback, json_parser, error_handler, futures_account_type)
 
     def set_positions_mode(self, callback, symbol: str, positions_mode: int, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         """
@@ -674,7 +1021,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_setPositionsMode, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_setPositionsMode, param, callback, json_parser, error_handler, futures_account_type)
 
     def set_margin_mode(self, callback, symbol: str, margin_mode: int, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         """
@@ -695,7 +1042,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_setMarginMode, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_setMarginMode, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_nominal_value(self, callback, symbol: str, side: int, futures_account_type=FuturesAccountType.BASE_USDT, error_handler=None):
         """
@@ -716,7 +1063,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_getNominalValue, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_getNominalValue, param, callback, json_parser, error_handler, futures_account_type)
 
     ## 订单和交易相关
 
@@ -738,7 +1085,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_orderChange, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_orderChange, param, callback, json_parser, error_handler, futures_account_type)
 
     def order(self, callback, symbol: str, side: OrderSide, amount: float, price: float, action=Action.LIMIT, entrust_type=1, error_handler=None):
         """
@@ -766,7 +1113,7 @@ class WsAccountClient(SubscriptionClient):
             return Event(**json_wrapper)
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
-        self.subscribe(self.CH_order, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_order, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_order(self, callback, symbol: str, order_id=None, client_order_id=None, error_handler=None):
         """
@@ -794,7 +1141,7 @@ class WsAccountClient(SubscriptionClient):
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_getOrder, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_getOrder, param, callback, json_parser, error_handler, futures_account_type)
 
     def cancel_order(self, callback, symbol: str, order_id=None, client_order_id=None, error_handler=None):
         """
@@ -823,7 +1170,7 @@ class WsAccountClient(SubscriptionClient):
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_cancelOrder, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_cancelOrder, param, callback, json_parser, error_handler, futures_account_type)
 
     def batch_cancel_order(self, callback, symbol: str, order_ids=None, client_order_ids=None, error_handler=None):
         """
@@ -852,7 +1199,7 @@ class WsAccountClient(SubscriptionClient):
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_batchCancelOrder, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_batchCancelOrder, param, callback, json_parser, error_handler, futures_account_type)
 
     def cancel_all_orders(self, callback, symbol: str, error_handler=None):
         """
@@ -869,7 +1216,7 @@ class WsAccountClient(SubscriptionClient):
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
 
-        self.subscribe(self.CH_cancelAllOrders, param, callback, json_parser, error_handler)
+        return self.subscribe(self.CH_cancelAllOrders, param, callback, json_parser, error_handler)
 
     def get_undone_orders(self, callback, symbol: str, page=1, size=10, error_handler=None):
         """
@@ -892,7 +1239,7 @@ class WsAccountClient(SubscriptionClient):
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_getUndoneOrders, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_getUndoneOrders, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_all_orders(self, callback, symbol: str, start_time=None, end_time=None, page=1, size=10, error_handler=None):
         """
@@ -922,7 +1269,7 @@ class WsAccountClient(SubscriptionClient):
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_getAllOrders, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_getAllOrders, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_trade_list(self, callback, symbol: str, order_id: int, error_handler=None):
         """
@@ -942,7 +1289,7 @@ class WsAccountClient(SubscriptionClient):
             return Event(**json_wrapper)
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_getTradeList, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_getTradeList, param, callback, json_parser, error_handler, futures_account_type)
 
     def get_trade_history(self, callback, symbol: str, start_time=None, end_time=None, page=1, size=10, error_handler=None):
         """
@@ -972,7 +1319,7 @@ class WsAccountClient(SubscriptionClient):
 
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_tradeHistory, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_tradeHistory, param, callback, json_parser, error_handler, futures_account_type)
 
     def batch_order(self, callback, orders: List[OrderRequest], error_handler=None):
         """
@@ -982,7 +1329,7 @@ class WsAccountClient(SubscriptionClient):
         :param error_handler:       错误处理函数
         :return:
         """
-        param = {'orderDatas': json.dumps([item.__dict__ for item in orders])}
+        param = {'orderDatas': json_codec.dumps([item.__dict__ for item in orders])}
 
         def json_parser(json_wrapper):
             return Event(**json_wrapper)
@@ -990,5 +1337,5 @@ class WsAccountClient(SubscriptionClient):
         symbol = orders[0].symbol
         futures_account_type = FuturesAccountType.BASE_QC if symbol.upper().find("_QC") > 0 else FuturesAccountType.BASE_USDT
 
-        self.subscribe(self.CH_batchOrder, param, callback, json_parser, error_handler, futures_account_type)
+        return self.subscribe(self.CH_batchOrder, param, callback, json_parser, error_handler, futures_account_type)
 
@@ -0,0 +1,117 @@
+"""
+A single timer thread shared by every client of the process
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from zb import log
+
+
+class Timer(object):
+    """
+    A callback scheduled on the TimerScheduler, cancel() prevents it from running.
+    """
+    __slots__ = ('deadline', 'callback', 'cancelled', 'scheduler')
+
+    def __init__(self, deadline, callback, scheduler=None):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+        # The scheduler while the timer is in its heap
+        self.scheduler = scheduler
+
+    def cancel(self):
+        scheduler = self.scheduler
+        if scheduler is None:
+            self.cancelled = True
+        else:
+            scheduler._cancel(self)
+
+
+class TimerScheduler(object):
+    """
+    Runs callbacks at their deadline on one daemon thread. Timers are kept in a heap, so the thread only wakes for
+    the earliest deadline and the cost of a tick is the number of expired timers, not the number scheduled.
+    Cancelled timers are dropped from the heap once they are more than half of it.
+    Callbacks run on the timer thread and must not block.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self._heap = []
+        # The cancelled timers still in the heap
+        self._cancelled = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self.logger = log.get_logger(log.TIMER)
+
+    @classmethod
+    def default(cls):
+        """
+        The process wide scheduler.
+        """
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = TimerScheduler()
+        return cls._default
+
+    def __len__(self):
+        return len(self._heap)
+
+    def call_later(self, delay, callback) -> Timer:
+        """
+        Run ``callback()`` in ``delay`` seconds.
+        """
+        timer = Timer(time.monotonic() + delay, callback, self)
+        with self._condition:
+            heapq.heappush(self._heap, (timer.deadline, next(self._sequence), timer))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='zb-timer', daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is timer:
+                self._condition.notify()
+        return timer
+
+    def _cancel(self, timer):
+        with self._condition:
+            if timer.cancelled:
+                return
+            timer.cancelled = True
+            if timer.scheduler is not self:
+                return
+            self._cancelled += 1
+            if self._cancelled * 2 > len(self._heap):
+                live = []
+                for entry in self._heap:
+                    if entry[2].cancelled:
+                        entry[2].scheduler = None
+                    else:
+                        live.append(entry)
+                heapq.heapify(live)
+                self._heap = live
+                self._cancelled = 0
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                timer = heapq.heappop(self._heap)[2]
+                timer.scheduler = None
+                if timer.cancelled:
+                    self._cancelled -= 1
+                    continue
+
+            try:
+                timer.callback()
+            except Exception:
+                self.logger.exception("[Timer] Callback failed")
@@ -1,44 +1,56 @@
-import json
 from typing import List
 
-from zb.client import ApiClient, ArgumentsRequired, OrderNotCached
+from zb import json_codec
+from zb.client import ApiClient, ArgumentsRequired, OrderNotCached, api_method
 from zb.model.constant import *
 from zb.model.trade import *
 
 
 class TradeApi(ApiClient):
-    def __init__(self, api_key, secret_key, api_host=None):
-        describe = {
-            'apis': {
-                'private': {
-                    'get': {
-                        'undone_orders': '/Server/api/v2/trade/getUndoneOrders',
-                        'all_orders': '/Server/api/v2/trade/getAllOrders',
-                        'order': '/Server/api/v2/trade/getOrder',
-                        'trade_list': '/Server/api/v2/trade/getTradeList',
-                        'trade_history': '/Server/api/v2/trade/tradeHistory',
-                        'order_algos': '/Server/api/v2/trade/getOrderAlgos',
-                    },
-                    'post': {
-                        'create_order': '/Server/api/v2/trade/order',
-                        'batch_order': '/Server/api/v2/trade/batchOrder',
-                        'cancel_order': '/Server/api/v2/trade/cancelOrder',
-                        'batch_cancel_order': '/Server/api/v2/trade/batchCancelOrder',
-                        'cancel_all_orders': '/Server/api/v2/trade/cancelAllOrders',
-                        'order_algo': '/Server/api/v2/trade/orderAlgo',
-                        'cancel_algo': '/Server/api/v2/trade/cancelAlgo',
-
-                    },
+    describe = {
+        'apis': {
+            'private': {
+                'get': {
+                    'undone_orders': '/Server/api/v2/trade/getUndoneOrders',
+                    'all_orders': '/Server/api/v2/trade/getAllOrders',
+                    'order': '/Server/api/v2/trade/getOrder',
+                    'trade_list': '/Server/api/v2/trade/getTradeList',
+                    'trade_history': '/Server/api/v2/trade/tradeHistory',
+                    'order_algos': '/Server/api/v2/trade/getOrderAlgos',
+                },
+                'post': {
+                    'create_order': '/Server/api/v2/trade/order',
+                    'batch_order': '/Server/api/v2/trade/batchOrder',
+                    'cancel_order': '/Server/api/v2/trade/cancelOrder',
+                    'batch_cancel_order': '/Server/api/v2/trade/batchCancelOrder',
+                    'cancel_all_orders': '/Server/api/v2/trade/cancelAllOrders',
+                    'order_algo': '/Server/api/v2/trade/orderAlgo',
+                    'cancel_algo': '/Server/api/v2/trade/cancelAlgo',
+
                 },
             },
-            'exceptions': {
-                '2012': OrderNotCached,
+        },
+        'exceptions': {
+            '2012': OrderNotCached,
 
-            }
         }
-
-        super().__init__(api_key, secret_key, api_host, describe)
-
+    }
+
+    def __init__(self, api_key, secret_key, api_host=None, session_pool=None, rate_limiter=None, instrumentation=None,
+                 clock_sync=None):
+        config = dict(self.describe)
+        if session_pool is not None:
+            config['session_pool'] = session_pool
+        if rate_limiter is not None:
+            config['rate_limiter'] = rate_limiter
+        if instrumentation is not None:
+            config['instrumentation'] = instrumentation
+        if clock_sync is not None:
+            config['clock_sync'] = clock_sync
+
+        super().__init__(api_key, secret_key, api_host, config)
+
+    @api_method
     def order(self, symbol: str, side: OrderSide, amount: float, price: float, action=Action.LIMIT, entrust_type=1, client_order_id=None) -> str:
         """
         下单
@@ -69,8 +81,9 @@ class TradeApi(ApiClient):
         if client_order_id:
             params['clientOrderId'] = client_order_id
 
-        return self.private_post_create_order(params)
+        return (yield self.private_post_create_order(params))
 
+    @api_method
     def batch_order(self, orders: List[OrderRequest]) -> List[BatchOrderResult]:
         """
         Send a new sell order to ZBG for matching
@@ -79,12 +92,13 @@ class TradeApi(ApiClient):
         :return: order id
         """
 
-        params = json.dumps([item.__dict__ for item in orders])
+        params = json_codec.dumps([item.__dict__ for item in orders])
 
-        result = self.private_post_batch_order(params)
+        result = yield self.private_post_batch_order(params)
 
         return [BatchOrderResult(**item) for item in result]
 
+    @api_method
     def cancel_order(self, symbol: str, order_id=None, client_order_id=None) -> str:
         """
         5.3 撤单， order_id和client_order_id二选一
@@ -105,8 +119,9 @@ class TradeApi(ApiClient):
         if client_order_id:
             params['clientOrderId'] = client_order_id
 
-        return self.private_post_cancel_order(params)
+        return (yield self.private_post_cancel_order(params))
 
+    @api_method
     def batch_cancel_orders(self, symbol: str, order_ids=None, client_order_ids=None) -> List[BatchCancelOrderResult]:
         """
         5.4 批量撤单, order_ids和client_order_ids二选一
@@ -128,10 +143,11 @@ class TradeApi(ApiClient):
         if client_order_ids:
             params['clientOrderIds'] = client_order_ids
 
-        result = self.private_post_batch_cancel_order(params)
+        result = yield self.private_post_batch_cancel_order(params)
 
         return [BatchCancelOrderResult(**item) for item in result]
 
+    @api_method
     def cancel_all_orders(self, symbol: str) -> List[BatchCancelOrderResult]:
         """
         5.3 撤单， order_id和client_order_id二选一
@@ -144,10 +160,11 @@ class TradeApi(ApiClient):
             'symbol': symbol,
         }
 
-        result = self.private_post_cancel_all_orders(params)
+        result = yield self.private_post_cancel_all_orders(params)
 
         return [BatchCancelOrderResult(**item) for item in result]
 
+    @api_method
     def get_undone_orders(self, symbol: str, page=1, size=30) -> List[Order]:
         """
         5.6 查询当前全部挂单，没有撮合或未完全撮合挂单
@@ -164,10 +181,11 @@ class TradeApi(ApiClient):
             'size': size,
         }
 
-        datas = self.private_get_undone_orders(params)
+        datas = yield self.private_get_undone_orders(params)
 
         return [Order(**order) for order in datas['list']]
 
+    @api_method
     def get_all_orders(self, symbol: str, start_time=None, end_time=None, page=1, size=30) -> List[Order]:
         """
         5.7 查询所有订单(包括历史订单)
@@ -197,10 +215,11 @@ class TradeApi(ApiClient):
         if end_time:
             params['endTime'] = end_time
 
-        data = self.private_get_all_orders(params)
+        data = yield self.private_get_all_orders(params)
 
         return [Order(**order) for order in data['list']]
 
+    @api_method
     def get_order(self, symbol: str, order_id=None, client_order_id=None) -> Order:
         """
         5.8 订单信息, order_ids和client_order_ids二选一
@@ -222,10 +241,11 @@ class TradeApi(ApiClient):
         if client_order_id:
             params['clientOrderId'] = client_order_id
 
-        order = self.private_get_order(params)
+        order = yield self.private_get_order(params)
 
         return Order(**order)
 
+    @api_method
     def get_trade_list(self, symbol: str, order_id: int, page=1, size=30) -> List[Trade]:
         """
         5.9 订单成交明细
@@ -244,10 +264,11 @@ class TradeApi(ApiClient):
             'pageSize': size,
         }
 
-        data = self.private_get_trade_list(params)
+        data = yield self.private_get_trade_list(params)
 
         return [Trade(**trade) for trade in data['list']]
 
+    @api_method
     def order_algo(self, symbol: str, side: int, order_type: int, amount: float,
                    trigger_price=None, algo_price=None, price_type=None, biz_type=None) -> str:
         """
@@ -279,8 +300,9 @@ class TradeApi(ApiClient):
         if biz_type:
             params['bizType'] = biz_type
 
-        return self.private_post_order_algo(params)
+        return (yield self.private_post_order_algo(params))
 
+    @api_method
     def cancel_algos(self, symbol: str, ids: list) -> List[BatchCancelOrderResult]:
         """
         5.12 委托策略撤单
@@ -295,10 +317,11 @@ class TradeApi(ApiClient):
             'ids': ids,
         }
 
-        result = self.private_post_cancel_algos(params)
+        result = yield self.private_post_cancel_algo(params)
 
         return [BatchCancelOrderResult(**item) for item in result]
 
+    @api_method
     def get_order_algos(self, symbol: str, side=None, order_type=None, biz_type=None,
                         status=None, start_time=None, end_time=None, page=1, size=30) -> List[Trade]:
         """
@@ -318,7 +341,7 @@ class TradeApi(ApiClient):
         :return:
         """
 
-        self.check_symbol(symbol)
+        yield self.check_symbol(symbol)
         params = {
             'symbol': symbol,
             'pageNum': page,
@@ -336,6 +359,6 @@ class TradeApi(ApiClient):
             params['startTime'] = start_time
         if end_time:
             params['endTime'] = end_time
-        data = self.private_get_order_algos(params)
+        data = yield self.private_get_order_algos(params)
 
         return [Trade(**trade) for trade in data]
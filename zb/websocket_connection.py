@@ -1,35 +1,41 @@
-import gzip
-import json
+import itertools
 import logging
 import ssl
 import threading
+import time
+import zlib
 
 import websocket
 
 # Key: ws, Value: connection
+from zb import json_codec, log
+from zb.compression import FrameDecoder
 from zb.errors import *
+from zb.metrics import exchange_time_ms
 from zb.model.constant import ConnectionState
 from zb.utils import Utils
 
 websocket_connection_handler = dict()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(funcName)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+logger = log.get_logger(log.WS)
 
 
 def on_message(ws, message):
-    websocket_connection = websocket_connection_handler[ws]
-    websocket_connection.on_message(message)
-    return
+    websocket_connection = websocket_connection_handler.get(ws)
+    if websocket_connection is not None:
+        websocket_connection.on_message(message)
 
 
 def on_error(ws, error):
-    websocket_connection = websocket_connection_handler[ws]
-    websocket_connection.on_failure(error)
+    websocket_connection = websocket_connection_handler.get(ws)
+    if websocket_connection is not None:
+        websocket_connection.on_failure(error)
 
 
-def on_close(ws):
-    websocket_connection = websocket_connection_handler[ws]
-    websocket_connection.on_close()
+def on_close(ws, *args):
+    # a connection closed by hand is already unregistered
+    websocket_connection = websocket_connection_handler.get(ws)
+    if websocket_connection is not None:
+        websocket_connection.on_close()
 
 
 def on_open(ws):
@@ -37,7 +43,8 @@ def on_open(ws):
     websocket_connection.on_open(ws)
 
 
-connection_id = 0
+# The ids of the connections and of the subscriptions, drawn from one sequence so they never collide
+ids = itertools.count(1)
 
 
 def websocket_func(*args):
@@ -49,47 +56,130 @@ def websocket_func(*args):
                                                     on_close=on_close)
     global websocket_connection_handler
     websocket_connection_handler[connection_instance.ws] = connection_instance
-    connection_instance.logger.info("[Sub][" + str(connection_instance.id) + "] Connecting...")
+    connection_instance.logger.info("[Sub][%s] Connecting...", connection_instance.id)
     connection_instance.delay_in_second = -1
     connection_instance.ws.on_open = on_open
     connection_instance.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
-    connection_instance.logger.info("[Sub][" + str(connection_instance.id) + "] Connection event loop down")
+    connection_instance.logger.info("[Sub][%s] Connection event loop down", connection_instance.id)
     if connection_instance.state == ConnectionState.CONNECTED:
         connection_instance.state = ConnectionState.IDLE
 
 
 class WebsocketConnection:
 
-    def __init__(self, api_key, secret_key, url, watch_dog, request):
+    def __init__(self, api_key, secret_key, url, watch_dog, request=None, dispatcher=None, recorder=None,
+                 instrumentation=None, clock_sync=None):
         self.__thread = None
         self.__api_key = api_key
         self.__secret_key = secret_key
         self.__watch_dog = watch_dog
+        # The request receiving every message whose channel has no request of its own
         self.request = request
+        # Key: channel, Value: list of the requests subscribed to it, the channels multiplexed on this connection
+        self.requests = dict()
+        self.__lock = threading.Lock()
+        # Dispatcher running the parsers and callbacks off the reader thread, None to run them inline
+        self.dispatcher = dispatcher
+        # Inflates the binary frames
+        self.decoder = FrameDecoder()
+        # FrameRecorder saving every received frame, None to record nothing
+        self.recorder = recorder
+        # Instrumentation receiving the frame timings, see zb.metrics
+        self.instrumentation = instrumentation
+        # ClockSync fed the exchange timestamps of the market messages
+        self.clock_sync = clock_sync
+        if request is not None:
+            self.requests[request.channel] = [request]
 
         self.delay_in_second = -1
         self.ws = None
         self.last_receive_time = 0
 
-        self.logger = logging.getLogger('zb-client')
-        global connection_id
-        connection_id += 1
-        self.id = connection_id
+        self.logger = logger
+        self.id = next(ids)
         self.state = ConnectionState.IDLE
         self.url = url
 
+    def add_request(self, request):
+        """
+        Multiplex one more subscription on this connection. The subscribe message of a new channel is sent right away
+        if the connection is open, otherwise when it opens, a channel already subscribed only gets one more receiver.
+        """
+        with self.__lock:
+            subscribers = self.requests.setdefault(request.channel, [])
+            subscribers.append(request)
+            subscribe = len(subscribers) == 1 and self.state == ConnectionState.CONNECTED
+        if subscribe and request.subscription_handler is not None:
+            request.subscription_handler(self)
+
+    def remove_request(self, channel, request=None):
+        """
+        Drop the subscription ``request`` of the channel, every subscription of it if None. The channel is
+        unsubscribed with its last subscription.
+
+        :return: The requests removed.
+        """
+        with self.__lock:
+            subscribers = self.requests.get(channel)
+            if not subscribers:
+                return []
+            if request is None:
+                removed = subscribers[:]
+                del subscribers[:]
+            elif request in subscribers:
+                removed = [request]
+                subscribers.remove(request)
+            else:
+                return []
+            if not subscribers:
+                del self.requests[channel]
+            unsubscribe = not subscribers and self.state == ConnectionState.CONNECTED
+        if unsubscribe and removed[0].unsubscription_handler is not None:
+            removed[0].unsubscription_handler(self)
+        return removed
+
+    def find_request(self, request_id):
+        """
+        The subscription of this connection with the id, None if it has none.
+        """
+        for subscribers in list(self.requests.values()):
+            for request in subscribers:
+                if request.id == request_id:
+                    return request
+        return None
+
+    def channel_count(self):
+        return len(self.requests)
+
+    def route(self, channel):
+        """
+        Find the requests a message of the channel is handed to, an empty list if none.
+        """
+        requests = self.requests.get(channel)
+        if requests is None and channel is not None:
+            # scaled depth channels, e.g. BTC_USDT.DepthWhole@0.01, may be answered without the scale suffix
+            for key, value in list(self.requests.items()):
+                if key.split('@')[0] == channel:
+                    return value
+        if requests is None:
+            requests = [self.request] if self.request is not None else []
+        return requests
+
     def in_delay_connection(self):
         return self.delay_in_second != -1
 
     def re_connect_in_delay(self, delay_in_second):
+        self.delay_in_second = delay_in_second
+        if self.instrumentation is not None:
+            self.instrumentation.on_reconnect(self.url)
         if self.ws is not None:
-            self.ws.close()
+            ws = self.ws
             self.ws = None
-        self.delay_in_second = delay_in_second
+            ws.close()
 
     def connect(self):
         if self.state == ConnectionState.CONNECTED:
-            self.logger.info("[Sub][" + str(self.id) + "] Already connected")
+            self.logger.info("[Sub][%s] Already connected", self.id)
         else:
             self.__thread = threading.Thread(target=websocket_func, args=[self])
             self.__thread.start()
@@ -97,35 +187,52 @@ class WebsocketConnection:
     def re_connect(self):
         if self.delay_in_second != 0:
             self.delay_in_second -= 1
-            self.logger.warning("[Sub][" + str(self.id) + "] In delay connection: " + str(self.delay_in_second))
+            self.logger.warning("[Sub][%s] In delay connection: %s", self.id, self.delay_in_second)
         else:
             self.connect()
 
     def send(self, data):
-        self.logger.info("[Sub][" + str(self.id) + "] Send data to server: " + data)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("[Sub][%s] Send data to server: %s", self.id, data)
         self.ws.send(data)
 
     def on_close(self):
-        self.__watch_dog.on_connection_closed(self)
-        del websocket_connection_handler[self.ws]
-        self.ws.close()
-        self.logger.error("[Sub][" + str(self.id) + "] Closing normally")
+        if self.__watch_dog is not None:
+            self.__watch_dog.on_connection_closed(self)
+        if self.ws is not None:
+            websocket_connection_handler.pop(self.ws, None)
+            self.ws.close()
+        self.logger.info("[Sub][%s] Closing normally", self.id)
 
     def on_open(self, ws):
-        self.logger.info("[Sub][" + str(self.id) + "] Connected to server")
+        self.logger.info("[Sub][%s] Connected to server", self.id)
         self.ws = ws
         self.last_receive_time = Utils.milliseconds()
-        self.state = ConnectionState.CONNECTED
-        if self.request.subscription_handler is not None:
-            self.request.subscription_handler(self)
+        self._subscribe_all()
 
-        self.__watch_dog.on_connection_created(self)
+        if self.__watch_dog is not None:
+            self.__watch_dog.on_connection_created(self)
         return
 
-    def on_error(self, error_message):
-        if self.request.error_handler is not None:
-            self.request.error_handler(error_message)
-        self.logger.info("[Sub][" + str(self.id) + "] " + str(error_message))
+    def _subscribe_all(self):
+        with self.__lock:
+            self.state = ConnectionState.CONNECTED
+            requests = [subscribers[0] for subscribers in self.requests.values() if subscribers]
+
+        # (re)subscribe every channel multiplexed on this connection, once per channel
+        for request in requests:
+            if request.subscription_handler is not None:
+                request.subscription_handler(self)
+
+    def on_error(self, error_message, request=None):
+        if request is not None:
+            handlers = [request.error_handler]
+        else:
+            handlers = [r.error_handler for r in self._all_requests()]
+        for error_handler in handlers:
+            if error_handler is not None:
+                error_handler(error_message)
+        self.logger.info("[Sub][%s] %s", self.id, error_message)
 
     def on_failure(self, error):
         self.on_error("Unexpected error: " + str(error))
@@ -135,47 +242,121 @@ class WebsocketConnection:
         if self.ws is not None:
             # self.ws.close()
             self.state = ConnectionState.CLOSED_ON_ERROR
-            self.logger.error("[Sub][" + str(self.id) + "] Connection is closing due to error")
+            self.logger.error("[Sub][%s] Connection is closing due to error", self.id)
+            if self.__watch_dog is not None:
+                self.__watch_dog.on_connection_failed(self)
 
     def close_on_hand(self):
         if self.ws is not None:
-            if self.request.unsubscription_handler is not None:
-                self.request.unsubscription_handler(self)
+            for request in self._channel_requests():
+                if request.unsubscription_handler is not None:
+                    request.unsubscription_handler(self)
 
             self.on_close()
 
+    def _channel_requests(self):
+        """
+        One request per channel, the one (un)subscribing it.
+        """
+        requests = [subscribers[0] for subscribers in list(self.requests.values()) if subscribers]
+        if self.request is not None and self.request not in requests:
+            requests.append(self.request)
+        return requests
+
+    def _all_requests(self):
+        requests = [request for subscribers in list(self.requests.values()) for request in subscribers]
+        if self.request is not None and self.request not in requests:
+            requests.append(self.request)
+        return requests
+
     def on_message(self, message):
         self.last_receive_time = Utils.milliseconds()
+        if self.recorder is not None:
+            self.recorder.record(message)
 
         if isinstance(message, str):
-            # print("RX string : ", message)
-            json_wrapper = json.loads(message)
+            json_wrapper = json_codec.loads(message)
         elif isinstance(message, bytes):
-            # print("RX bytes: " + gzip.decompress(message).decode("utf-8"))
-            json_wrapper = json.load(gzip.decompress(message).decode("utf-8"))
+            try:
+                json_wrapper = json_codec.loads(self.decoder.decode(message))
+            except zlib.error as e:
+                self.on_error("Failed to decompress frame: " + str(e))
+                return
         else:
-            self.logger.error("[Sub][" + str(self.id) + "] RX unknown type : ", type(message))
+            self.logger.error("[Sub][%s] RX unknown type: %s", self.id, type(message))
             return
 
         if 'action' in json_wrapper and 'pong' == json_wrapper['action']:
             return
 
+        if self.instrumentation is not None or self.clock_sync is not None:
+            self._observe_time(json_wrapper)
+
+        requests = self.route(json_wrapper.get('channel'))
+
         if 'errorCode' in json_wrapper:
-            print(json_wrapper)
-            self.on_error(json_wrapper)
+            if not requests:
+                self.on_error(json_wrapper)
+            for request in requests:
+                self.on_error(json_wrapper, request)
             return
 
+        if not requests:
+            self.logger.warning("[Sub][%s] No subscription for channel: %s", self.id, json_wrapper.get('channel'))
+            return
+
+        if len(requests) == 1:
+            request = requests[0]
+            if self.dispatcher is not None:
+                self.dispatcher.submit(json_wrapper.get('channel') or request.channel,
+                                       lambda message: self._dispatch(request, message), json_wrapper)
+            else:
+                self._dispatch(request, json_wrapper)
+            return
+
+        # every subscription of the channel receives the message, in the order they subscribed
+        requests = list(requests)
+        if self.dispatcher is not None:
+            self.dispatcher.submit(json_wrapper.get('channel') or requests[0].channel,
+                                   lambda message: self._dispatch_all(requests, message), json_wrapper)
+        else:
+            self._dispatch_all(requests, json_wrapper)
+
+    def _dispatch_all(self, requests, json_wrapper):
+        for request in requests:
+            self._dispatch(request, json_wrapper)
+
+    def _observe_time(self, json_wrapper):
+        timestamp = exchange_time_ms(json_wrapper)
+        if timestamp is None:
+            return
+        lag = self.last_receive_time - timestamp
+        if self.clock_sync is not None:
+            self.clock_sync.observe_event(timestamp, self.last_receive_time)
+            lag = self.clock_sync.latency_ms(timestamp, self.last_receive_time)
+        if self.instrumentation is not None:
+            self.instrumentation.on_lag(json_wrapper.get('channel'), lag)
+
+    def _dispatch(self, request, json_wrapper):
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter_ns()
         res = None
         try:
-            if self.request.json_parser is not None:
-                res = self.request.json_parser(json_wrapper)
+            if request.json_parser is not None:
+                res = request.json_parser(json_wrapper)
         except Exception as e:
-            self.logger.error("[Sub][" + str(self.id) + "] Failed to parse server's response", e)
-            self.on_error("Failed to parse server's response: " + str(e))
+            self.logger.error("[Sub][%s] Failed to parse server's response: %s", self.id, e)
+            self.on_error("Failed to parse server's response: " + str(e), request)
+        if instrumentation is not None:
+            parsed = time.perf_counter_ns()
 
         try:
-            if self.request.update_callback is not None:
-                self.request.update_callback(res)
+            if request.update_callback is not None:
+                request.update_callback(res)
         except Exception as e:
-            self.logger.error("[Sub][" + str(self.id) + "] Failed to call the callback method,message:" + res, e)
-            self.on_error("Process error: " + str(e) + " You should capture the exception in your error handler")
+            self.logger.error("[Sub][%s] Failed to call the callback method, message: %s, %s", self.id, res, e)
+            self.on_error("Process error: " + str(e) + " You should capture the exception in your error handler", request)
+        if instrumentation is not None:
+            instrumentation.on_frame(json_wrapper.get('channel') or request.channel, parsed - start,
+                                     time.perf_counter_ns() - parsed)
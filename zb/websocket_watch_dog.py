@@ -1,61 +1,95 @@
 import threading
-import logging
-from apscheduler.schedulers.blocking import BlockingScheduler
 
+from zb import log
 from zb.model.constant import ConnectionState
+from zb.timer import TimerScheduler
 from zb.utils import Utils
 
 
-def watch_dog_job(*args):
-    watch_dog_instance = args[0]
-    for connection in watch_dog_instance.connection_list:
-        if connection.state == ConnectionState.CONNECTED:
-            if watch_dog_instance.is_auto_connect:
-                ts = Utils.milliseconds() - connection.last_receive_time
-                if ts > watch_dog_instance.receive_limit_ms:
-                    watch_dog_instance.logger.warning("[Sub][" + str(connection.id) + "] No response from server")
-                    connection.re_connect_in_delay(watch_dog_instance.connection_delay_failure)
-        elif connection.in_delay_connection():
-            watch_dog_instance.logger.warning("[Sub] call re_connect")
-            connection.re_connect()
-            pass
-        elif connection.state == ConnectionState.CLOSED_ON_ERROR:
-            if watch_dog_instance.is_auto_connect:
-                connection.re_connect_in_delay(watch_dog_instance.connection_delay_failure)
-                pass
-
-
-def pong(*args):
-    watch_dog_instance = args[0]
-    for connection in watch_dog_instance.connection_list:
-        if connection.state == ConnectionState.CONNECTED:
-            connection.send('{"action":"ping"}')
-
-
-class WebSocketWatchDog(threading.Thread):
-    mutex = threading.Lock()
-    connection_list = list()
+class WebSocketWatchDog(object):
+    """
+    Keeps the connections of a client alive: pings every ``ping_interval`` seconds, reconnects a connection that
+    received nothing within ``receive_limit_ms`` or failed. Every connection has its own deadlines on the shared
+    TimerScheduler, a liveness check only runs when the deadline of its connection expires.
+    """
+    ping_interval = 5
 
-    def __init__(self, is_auto_connect=True, receive_limit_ms=60000, connection_delay_failure=15):
-        threading.Thread.__init__(self)
+    def __init__(self, is_auto_connect=True, receive_limit_ms=60000, connection_delay_failure=15, scheduler=None):
         self.is_auto_connect = is_auto_connect
         self.receive_limit_ms = receive_limit_ms
         self.connection_delay_failure = connection_delay_failure
-        self.logger = logging.getLogger("zb-client")
-        self.scheduler = BlockingScheduler()
-        self.scheduler.add_job(watch_dog_job, "interval", max_instances=10, seconds=1, args=[self])
-        self.scheduler.add_job(pong, "interval", max_instances=10, seconds=5, args=[self])
-        self.start()
-
-    def run(self):
-        self.scheduler.start()
+        self.logger = log.get_logger(log.WATCH_DOG)
+        self.scheduler = scheduler if scheduler is not None else TimerScheduler.default()
+        # Key: connection, Value: {timer name: Timer}
+        self._timers = dict()
+        self._lock = threading.Lock()
 
     def on_connection_created(self, connection):
-        self.mutex.acquire()
-        self.connection_list.append(connection)
-        self.mutex.release()
+        with self._lock:
+            self._cancel(self._timers.pop(connection, None))
+            self._timers[connection] = dict()
+        self._schedule(connection, 'check', self.receive_limit_ms / 1000.0, self._check)
+        self._schedule(connection, 'ping', self.ping_interval, self._ping)
 
     def on_connection_closed(self, connection):
-        self.mutex.acquire()
-        self.connection_list.remove(connection)
-        self.mutex.release()
+        with self._lock:
+            timers = self._timers.pop(connection, None)
+            # the socket closed by a delayed reconnect keeps its reconnect timer
+            if timers is not None and connection.in_delay_connection() and 'reconnect' in timers:
+                self._timers[connection] = {'reconnect': timers.pop('reconnect')}
+        self._cancel(timers)
+
+    def on_connection_failed(self, connection):
+        if self.is_auto_connect:
+            self._reconnect_in_delay(connection)
+
+    def connection_count(self):
+        return len(self._timers)
+
+    @staticmethod
+    def _cancel(timers):
+        if timers:
+            for timer in timers.values():
+                timer.cancel()
+
+    def _schedule(self, connection, name, delay, job):
+        with self._lock:
+            timers = self._timers.get(connection)
+            if timers is None:
+                return
+            if name in timers:
+                timers[name].cancel()
+            timers[name] = self.scheduler.call_later(delay, lambda: job(connection))
+
+    def _check(self, connection):
+        if connection.state == ConnectionState.CONNECTED:
+            idle = Utils.milliseconds() - connection.last_receive_time
+            if idle <= self.receive_limit_ms:
+                self._schedule(connection, 'check', (self.receive_limit_ms - idle) / 1000.0 + 0.001, self._check)
+            elif self.is_auto_connect:
+                self.logger.warning("[Sub][%s] No response from server", connection.id)
+                self._reconnect_in_delay(connection)
+        elif connection.state == ConnectionState.CLOSED_ON_ERROR and self.is_auto_connect:
+            self._reconnect_in_delay(connection)
+        else:
+            self._schedule(connection, 'check', self.receive_limit_ms / 1000.0, self._check)
+
+    def _ping(self, connection):
+        if connection.state == ConnectionState.CONNECTED:
+            connection.send('{"action":"ping"}')
+        self._schedule(connection, 'ping', self.ping_interval, self._ping)
+
+    def _reconnect_in_delay(self, connection):
+        with self._lock:
+            timers = self._timers.setdefault(connection, dict())
+            if 'reconnect' in timers and not timers['reconnect'].cancelled and connection.in_delay_connection():
+                return
+        self._schedule(connection, 'reconnect', self.connection_delay_failure, self._reconnect)
+        connection.re_connect_in_delay(self.connection_delay_failure)
+
+    def _reconnect(self, connection):
+        self.logger.warning("[Sub] call re_connect")
+        with self._lock:
+            self._cancel(self._timers.pop(connection, None))
+        connection.state = ConnectionState.IDLE
+        connection.connect()